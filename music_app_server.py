@@ -8,9 +8,15 @@ import tempfile
 import threading
 import time
 import io
+import functools
+import re
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 
-from queue import Queue
-from flask import Flask, request, jsonify, Response, render_template_string, redirect
+from queue import Queue, Empty, Full
+from flask import Flask, request, jsonify, Response, redirect, send_file
+from flask.json.provider import DefaultJSONProvider
 
 import base64
 
@@ -20,17 +26,54 @@ except Exception:  # Pillow may not be available; fall back to sips/JPEG/PNG
     Image = None
 WEBP_ENABLED = Image is not None
 
+try:
+    from waitress import serve as waitress_serve  # type: ignore
+except Exception:  # optional; Flask's threaded dev server is used otherwise
+    waitress_serve = None
+
+try:
+    import xxhash  # type: ignore
+except Exception:  # optional; ETags fall back to SHA-1
+    xxhash = None
+
+try:
+    import orjson  # type: ignore
+except Exception:  # optional; SSE messages use the stdlib encoder otherwise
+    orjson = None
+
+
+def _dumps(obj) -> str:
+    """Compact JSON text (non-ASCII kept as-is), via orjson when installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj).decode('utf-8')
+        except TypeError:
+            pass  # e.g. non-str dict keys; the stdlib encoder copes
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def _content_tag(data: bytes) -> str:
+    """Opaque version tag for bytes (ETags, memo keys); xxh3 when installed, else SHA-1."""
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.sha1(data).hexdigest()
+
 logging.basicConfig(level=logging.DEBUG)  # Enable debug logging for requests
 LIB_LIST_DEBUG = os.getenv("AM_LIB_LIST_DEBUG", "0") == "1"
+_TRUE_SET = frozenset(("true", "yes", "1"))
 
 def _guess_image_mime(data: bytes) -> str:
     """Best-effort guess for artwork bytes without external deps."""
     if not data:
         return "application/octet-stream"
-    header = data[:16]
+    # Only the header is inspected, so cache on that slice
+    return _guess_mime_header(bytes(data[:16]))
+
+@functools.lru_cache(maxsize=128)
+def _guess_mime_header(header: bytes) -> str:
     # WEBP: RIFF....WEBP
     try:
-        if header.startswith(b"RIFF") and len(data) >= 12 and data[8:12] == b"WEBP":
+        if header.startswith(b"RIFF") and len(header) >= 12 and header[8:12] == b"WEBP":
             return "image/webp"
     except Exception:
         pass
@@ -46,10 +89,39 @@ def _guess_image_mime(data: bytes) -> str:
         return "image/tiff"
     return "image/jpeg"
 
+_WEBP_CACHE_MAX = 64
+_webp_cache = OrderedDict()  # (content tag of input, max_size) -> (webp bytes, mime, etag)
+_webp_lock = threading.Lock()
+
+
 def _convert_to_webp(data: bytes, max_size: int | None = None) -> tuple[bytes, str] | None:
     """Convert image bytes to WEBP (optionally resizing to <=max_size). Returns (bytes, mime) or None if unavailable."""
+    out = _webp_cached(data, max_size)
+    return out[:2] if out else None
+
+
+def _webp_cached(data: bytes, max_size: int | None = None) -> tuple[bytes, str, str] | None:
+    """_convert_to_webp plus the output's ETag, memoized on a hash of the input so repeat hits skip encoding."""
     if not data or Image is None:
         return None
+    key = (_content_tag(data), max_size)
+    with _webp_lock:
+        hit = _webp_cache.get(key)
+        if hit:
+            _webp_cache.move_to_end(key)
+            return hit
+    out = _encode_webp(data, max_size)
+    if out is None:
+        return None
+    val = (out[0], out[1], _content_tag(out[0]))
+    with _webp_lock:
+        _webp_cache[key] = val
+        if len(_webp_cache) > _WEBP_CACHE_MAX:
+            _webp_cache.popitem(last=False)
+    return val
+
+
+def _encode_webp(data, max_size):
     try:
         with Image.open(io.BytesIO(data)) as im:
             try:
@@ -58,8 +130,21 @@ def _convert_to_webp(data: bytes, max_size: int | None = None) -> tuple[bytes, s
                 resample = Image.BICUBIC
             if max_size and max_size > 0:
                 im.thumbnail((int(max_size), int(max_size)), resample=resample)
+            # Embedded ICC/EXIF can outweigh a small thumb; an all-opaque alpha channel is dead weight too
+            im.info.pop("icc_profile", None)
+            im.info.pop("exif", None)
+            if im.mode == "P":
+                im = im.convert("RGBA" if "transparency" in im.info else "RGB")
+            if im.mode in ("RGBA", "LA") and im.getchannel("A").getextrema()[0] == 255:
+                im = im.convert("RGB")
+            elif im.mode not in ("RGB", "RGBA"):
+                im = im.convert("RGBA" if "A" in im.getbands() else "RGB")
             buf = io.BytesIO()
-            save_kwargs = {"format": "WEBP", "quality": 85, "method": 4}
+            # Thumbs are encoded once (memoized) and sent many times, so spend the slowest method on them
+            if max_size and max_size > 0:
+                save_kwargs = {"format": "WEBP", "quality": 75, "method": 6}
+            else:
+                save_kwargs = {"format": "WEBP", "quality": 85, "method": 4}
             try:
                 im.save(buf, **save_kwargs)
             except Exception:
@@ -71,7 +156,22 @@ def _convert_to_webp(data: bytes, max_size: int | None = None) -> tuple[bytes, s
         return None
 
 
+class _OrjsonProvider(DefaultJSONProvider):
+    """jsonify() through orjson: the same compact, key-sorted body, encoded in C."""
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        try:
+            body = orjson.dumps(obj, default=self.default,
+                                option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            return super().response(*args, **kwargs)  # e.g. ints beyond 64 bits
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
 app = Flask(__name__)
+if orjson is not None:
+    app.json = _OrjsonProvider(app)
 
 # ---- SSE pub/sub for push updates ----
 _subscribers = set()
@@ -82,8 +182,23 @@ _BLANK_PNG = base64.b64decode(
 )
 
 
+_SSE_QUEUE_MAX = 64
+# Serialized initial snapshot shared by new subscribers; any publish bumps the generation
+_SNAPSHOT_MAX_AGE = 30.0
+# Steady playback publishes nothing, so the now section (with its position) is re-read once it
+# is this old; the coalesced poll keeps that cheap
+_SNAPSHOT_NOW_MAX_AGE = 1.0
+_snapshot_cache = {"gen": -1, "frame": b"", "snap": None, "at": 0.0, "now_at": 0.0}
+_snapshot_lock = threading.Lock()
+_sse_gen = 0
+
+
+def _sse_frame(text: str) -> bytes:
+    return b"data: " + text.encode('utf-8') + b"\n\n"
+
+
 def _sse_subscribe():
-    q = Queue(maxsize=100)
+    q = Queue(maxsize=_SSE_QUEUE_MAX)
     with _sub_lock:
         _subscribers.add(q)
     return q
@@ -94,8 +209,32 @@ def _sse_unsubscribe(q):
         _subscribers.discard(q)
 
 
+def _sse_evict(q):
+    """Drop a slow subscriber's backlog and wake its stream with the None close marker."""
+    try:
+        while True:
+            q.get_nowait()
+    except Empty:
+        pass
+    try:
+        q.put_nowait(None)
+    except Full:
+        pass
+
+
+_sse_last = {}  # event -> serialized data of its last broadcast
+_SSE_ALWAYS = frozenset({'library_changed'})  # notifications, not state: repeat sends are real
+
+
 def _sse_publish(event: str, data):
-    payload = {"event": event, "data": data, "ts": int(time.time() * 1000)}
+    data_text = _dumps(data)
+    if event not in _SSE_ALWAYS:
+        with _sub_lock:
+            # Slider drags and watchers often re-send an unchanged value; subscribers already have it
+            if _sse_last.get(event) == data_text:
+                return
+            _sse_last[event] = data_text
+    payload = {"event": event, "ts": int(time.time() * 1000)}
     # Surface artwork token at the top-level for convenience
     try:
         if isinstance(data, dict):
@@ -114,9 +253,13 @@ def _sse_publish(event: str, data):
                     pass
     except Exception:
         pass
-    msg = json.dumps(payload, ensure_ascii=False)
+    # data is spliced in already serialized rather than encoded a second time, and the queues
+    # carry the finished wire frame so each stream only writes it
+    msg = _sse_frame('{"data":' + data_text + ',' + _dumps(payload)[1:])
+    global _sse_gen
     dead = []
     with _sub_lock:
+        _sse_gen += 1
         for q in list(_subscribers):
             try:
                 q.put_nowait(msg)
@@ -124,33 +267,60 @@ def _sse_publish(event: str, data):
                 dead.append(q)
         for q in dead:
             _subscribers.discard(q)
+            _sse_evict(q)
 
 
 # ---- Minimal state readers ----
 
-def _get_now_playing_dict():
-    # Use the exact robust script shape as /now_playing (no PID), then adapt to a compact dict
-    script = '''
-    tell application "Music"
-        set pstate to player state as text
-        set shuf to false
-        try
-            set shuf to shuffle enabled
-        end try
+# Player state (9 lines) and AirPlay devices (name, selected, volume per line) in one
+# script; each section matches what the separate now/devices/volumes scripts returned.
+# Sets devText to one name<TAB>selected<TAB>volume line per AirPlay device (or "ERROR:...");
+# must run inside a tell application "Music" block
+_DEVICE_ROWS_AS = '''
+    set devLines to {}
+    try
+        repeat with d in AirPlay devices
+            set dnm to ""
+            set isSel to false
+            set volTxt to "-1"
+            try
+                set dnm to (name of d as text)
+            end try
+            try
+                set isSel to (selected of d)
+            end try
+            try
+                set volTxt to ((sound volume of d) as text)
+            end try
+            set end of devLines to dnm & tab & (isSel as text) & tab & volTxt
+        end repeat
+        set AppleScript's text item delimiters to linefeed
+        set devText to devLines as text
+    on error errm number errn
+        set devText to "ERROR:" & errn & ":" & errm
+    end try
+'''
+_POLL_ALL_SCRIPT = '''
+tell application "Music"
+    set pstate to player state as text
+    set shuf to false
+    try
+        set shuf to shuffle enabled
+    end try
+    set rep to "off"
+    try
         set rep to song repeat
-        set vol to 0
-        try
-            set vol to sound volume
-        end try
-        if pstate is "stopped" then
-            set AppleScript's text item delimiters to linefeed
-            return pstate & "\n" & "" & "\n" & "" & "\n" & "" & "\n" & "0" & "\n" & (shuf as text) & "\n" & (rep as text) & "\n" & (vol as text) & "\n" & "0"
-        end if
-        set nm to ""
-        set ar to ""
-        set al to ""
-        set pos to 0
-        set dur to 0
+    end try
+    set vol to 0
+    try
+        set vol to sound volume
+    end try
+    set nm to ""
+    set ar to ""
+    set al to ""
+    set pos to 0
+    set dur to 0
+    if pstate is not "stopped" then
         try
             set pos to player position
         end try
@@ -173,84 +343,117 @@ def _get_now_playing_dict():
                 set dur to (duration of t)
             end try
         end if
-        set AppleScript's text item delimiters to linefeed
-        return pstate & "\n" & nm & "\n" & ar & "\n" & al & "\n" & (pos as text) & "\n" & (shuf as text) & "\n" & (rep as text) & "\n" & (vol as text) & "\n" & (dur as text)
-    end tell
-    '''
-    r = run_applescript(script)
-    if isinstance(r, dict):
-        return {"state": "unknown"}
-    if not isinstance(r, str) or not r:
+    end if
+    set nowText to pstate & linefeed & nm & linefeed & ar & linefeed & al & linefeed & (pos as text) & linefeed & (shuf as text) & linefeed & (rep as text) & linefeed & (vol as text) & linefeed & (dur as text)
+''' + _DEVICE_ROWS_AS + '''
+    return nowText & linefeed & (character id 30) & linefeed & devText
+end tell
+'''
+_POLL_COALESCE = 0.5
+_poll_cache = {"gen": -1, "at": 0.0, "val": None}
+_poll_lock = threading.Lock()
+_poll_gen = 0
+
+
+def _poll_invalidate():
+    global _poll_gen
+    _poll_gen += 1
+
+
+@app.before_request
+def _poll_invalidate_on_write():
+    # Anything that may change player or device state must not be answered from the shared poll
+    if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        _poll_invalidate()
+
+
+def _poll_all():
+    """Return (now_text, devices_text) from one AppleScript, or {'error': ...}.
+
+    Readers within _POLL_COALESCE of each other share a result, so now playing,
+    device states and device volumes cost one osascript per poll tick.
+    devices_text starts with "ERROR:" when AirPlay devices could not be read.
+    """
+    with _poll_lock:
+        gen = _poll_gen
+        if _poll_cache["gen"] == gen and time.monotonic() - _poll_cache["at"] < _POLL_COALESCE:
+            return _poll_cache["val"]
+        r = run_applescript(_POLL_ALL_SCRIPT)
+        if isinstance(r, dict):
+            return r
+        now_text, _, dev_text = (r or "").partition("\x1e")
+        val = (now_text.rstrip("\n"), dev_text.lstrip("\n"))
+        _poll_cache.update(gen=gen, at=time.monotonic(), val=val)
+        return val
+
+
+# When _last_snapshot['master'] was last confirmed (watcher read or our own set)
+_MASTER_TTL = 0.75
+_master_seen = {"at": 0.0}
+
+
+def _note_master_volume(v):
+    _last_snapshot['master'] = v
+    _master_seen["at"] = time.monotonic()
+
+
+def _split_now_fields(text):
+    """The poll's now-playing section as exactly 9 lines (missing ones blank)."""
+    parts = text.split("\n", 8)
+    parts.extend([""] * (9 - len(parts)))
+    return parts
+
+
+def _poll_now_fields():
+    """The 9 now-playing lines of the shared poll, or None when the poll failed."""
+    r = _poll_all()
+    if isinstance(r, dict) or not r[0]:
+        return None
+    return _split_now_fields(r[0])
+
+
+def _get_now_playing_dict():
+    parts = _poll_now_fields()
+    if parts is None:
         return {"state": "unknown"}
-    lines = r.splitlines()
-    while len(lines) < 9:
-        lines.append("")
-    state, title, artist, album, position, shuffle_txt, repeat_txt, volume_txt, duration = lines[:9]
-    def _to_float(s):
-        try:
-            return float(s)
-        except Exception:
-            return 0.0
-    def _to_bool(s):
-        s = (s or "").strip().lower()
-        return s in ("true", "yes", "1")
+    state, title, artist, album, position, shuffle_txt, repeat_txt, volume_txt, duration = parts
+    try:
+        pos_f = float(position)
+    except Exception:
+        pos_f = 0.0
     out = {
         "state": state or "unknown",
         "title": title or "",
         "artist": artist or "",
         "album": album or "",
         "pid": "",
-        "position": _to_float(position),
+        "position": pos_f,
         "is_playing": (state or "").lower().startswith("play"),
-        "shuffle": _to_bool(shuffle_txt) if shuffle_txt != '' else None,
-        "repeat": _to_bool(repeat_txt) if repeat_txt != '' else None,
+        "shuffle": (shuffle_txt.strip().lower() in _TRUE_SET) if shuffle_txt != '' else None,
+        "repeat": (repeat_txt.strip().lower() in _TRUE_SET) if repeat_txt != '' else None,
     }
     return out
 
 
 def _get_master_volume_percent():
-    script = '''
-    tell application "Music"
-        try
-            return (sound volume as integer)
-        on error
-            return -1
-        end try
-    end tell
-    '''
-    r = run_applescript(script)
+    # The shared poll already carries the master volume, so readers don't need their own osascript
+    fields = _poll_now_fields()
+    r = fields[7] if fields else run_applescript(_GET_MASTER_VOLUME_SCRIPT)
     try:
-        v = int(r)
+        v = int(float(r))
         return max(0, min(100, v))
     except Exception:
         return -1
 
 ### AirPlay device status.
 def _read_airplay_full():
-    """Return list of {name, active} for AirPlay devices."""
-    script_primary = '''
-    tell application "Music"
-        set outLines to {}
-        try
-            repeat with d in AirPlay devices
-                set nm to ""
-                set isSel to false
-                try
-                    set nm to (name of d as text)
-                end try
-                try
-                    set isSel to (selected of d)
-                end try
-                set end of outLines to nm & tab & (isSel as text)
-            end repeat
-        on error errm number errn
-            return "ERROR:" & errn & ":" & errm
-        end try
-        set AppleScript's text item delimiters to linefeed
-        return outLines as text
-    end tell
-    '''
-    result = run_applescript(script_primary)
+    """Return list of {name, canon, active} for AirPlay devices, active first then by name.
+
+    canon is the NFKC-normalized name the web UI matches rows on.
+    """
+    result = _poll_all()
+    if isinstance(result, tuple):
+        result = result[1]
     if isinstance(result, dict) or (isinstance(result, str) and result.startswith("ERROR:")):
         app.logger.warning(f"/airplay_full primary failure: {result if isinstance(result, dict) else result}")
         script_fallback = '''
@@ -281,15 +484,58 @@ def _read_airplay_full():
             app.logger.error(f"/airplay_full fallback AppleScript error: {result.get('error')}")
             return []
 
+    return _airplay_items(result if isinstance(result, str) else "")
+
+
+def _airplay_with_volumes():
+    """_read_airplay_full() items with each device's volume merged in (both from one shared poll)."""
+    statuses = _read_airplay_full()
+    volumes = _get_airplay_volumes()
+    for item in statuses:
+        item['volume'] = volumes.get(item['name'], None)
+    return statuses
+
+
+# After a device write, the fresh AirPlay state is only needed by SSE subscribers, so it is read
+# and published here instead of before the HTTP response goes out
+_sse_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='sse-refresh')
+
+
+def _publish_airplay(statuses):
+    _last_snapshot['airplay'] = statuses
+    _sse_publish('airplay_full', statuses)
+
+
+def _refresh_airplay_and_publish():
+    try:
+        _poll_invalidate()  # the write has finished; don't reuse a poll taken while it ran
+        _publish_airplay(_airplay_with_volumes())
+    except Exception as e:
+        app.logger.debug(f"airplay refresh error: {e}")
+
+
+def _publish_airplay_soon():
+    _sse_refresh_pool.submit(_refresh_airplay_and_publish)
+
+
+def _airplay_items(text, with_volume=False):
+    """Parse name<TAB>selected[<TAB>volume] lines into sorted {name, canon, active[, volume]} items."""
     items = []
-    if isinstance(result, str) and result:
-        for line in result.splitlines():
-            parts = line.split("\t")
-            if len(parts) >= 2:
-                name = parts[0].strip()
-                sel = parts[1].strip().lower()
-                if name:
-                    items.append({"name": name, "active": sel in ("true", "yes", "1")})
+    for line in (text or "").splitlines():
+        parts = line.split("\t")
+        if len(parts) >= 2:
+            name = parts[0].strip()
+            sel = parts[1].strip().lower()
+            if name:
+                item = {
+                    "name": name,
+                    "canon": unicodedata.normalize("NFKC", name).strip(),
+                    "active": sel in ("true", "yes", "1"),
+                }
+                if with_volume:
+                    m = _VOL_RE.match(parts[2]) if len(parts) >= 3 else None
+                    item["volume"] = max(0, min(100, int(m.group(1)))) if m else None
+                items.append(item)
     try:
         items.sort(key=lambda d: (not bool(d.get("active")), str(d.get("name", "")).casefold()))
     except Exception:
@@ -299,6 +545,9 @@ def _read_airplay_full():
 
 def _get_airplay_volumes():
     """Return dict of device name -> volume (0-100) for AirPlay devices."""
+    polled = _poll_all()
+    if isinstance(polled, tuple) and not polled[1].startswith("ERROR:"):
+        return _parse_device_volumes(polled[1], lambda v: max(0, min(100, v)))
     script = '''
     tell application "Music"
         try
@@ -324,18 +573,19 @@ def _get_airplay_volumes():
     end tell
     '''
     result = run_applescript(script)
-    volumes = {}
-    if isinstance(result, str) and result:
-        for line in result.splitlines():
-            if "\t" in line:
-                name, vol = line.split("\t", 1)
-                name = name.strip()
-                try:
-                    v = int(float(vol.strip()))
-                    volumes[name] = max(0, min(100, v))
-                except Exception:
-                    volumes[name] = None
-    return volumes
+    if not isinstance(result, str):
+        return {}
+    return _parse_device_volumes(result, lambda v: max(0, min(100, v)))
+
+
+_VOL_RE = re.compile(r"\s*(-?\d+)")  # leading integer part, as int(float(...)) truncated it
+
+
+def _parse_device_volumes(text, clamp):
+    """Map name -> clamp(volume) from tab-separated lines whose last column is the volume."""
+    rows = (line.split("\t") for line in (text or "").splitlines())
+    return {p[0].strip(): (clamp(int(m.group(1))) if (m := _VOL_RE.match(p[-1])) else None)
+            for p in rows if len(p) >= 2}
 
 
 def _set_airplay_device_volume(device, level):
@@ -347,18 +597,7 @@ def _set_airplay_device_volume(device, level):
     except Exception:
         return False
     level = max(0, min(100, level))
-    device_safe = applescript_escape(device)
-    script = f'''
-    tell application "Music"
-        try
-            set sound volume of (first AirPlay device whose name is "{device_safe}") to {level}
-            return "ok"
-        on error errm number errn
-            return "ERROR:" & errn & ":" & errm
-        end try
-    end tell
-    '''
-    result = run_applescript(script)
+    result = run_applescript(_SET_DEVICE_VOLUME_SCRIPT, device, level)
     if isinstance(result, str) and result.startswith('ERROR:'):
         return False
     if isinstance(result, dict) and 'error' in result:
@@ -368,25 +607,53 @@ def _set_airplay_device_volume(device, level):
 
 def _current_snapshot():
     now = _get_now_playing_dict()
-    shuffle = bool(get_shuffle_enabled())
+    shuffle = now.get('shuffle')
+    shuffle = bool(get_shuffle_enabled()) if shuffle is None else shuffle
     master = _get_master_volume_percent()
-    air_status = _read_airplay_full()
-    air_volumes = _get_airplay_volumes()
-    for item in air_status:
-        name = item['name']
-        item['volume'] = air_volumes.get(name, None)
-    air = air_status
+    air = _airplay_with_volumes()
+    repeat = _last_snapshot.get('repeat') or get_repeat_enabled()
     return {
         "now": now,
         "shuffle": shuffle,
+        "repeat": repeat,
         "master": master,
         "airplay": air,
         "artwork_token": _last_snapshot.get("art_tok", int(time.time()))
     }
 
 
+def _snapshot_frame():
+    """SSE frame of the snapshot event, rebuilt only after a publish or once it is _SNAPSHOT_MAX_AGE old.
+
+    In between, only its now section is refreshed, once that is _SNAPSHOT_NOW_MAX_AGE old.
+    """
+    with _snapshot_lock:
+        gen = _sse_gen
+        t = time.monotonic()
+        if _snapshot_cache["gen"] == gen and t - _snapshot_cache["at"] < _SNAPSHOT_MAX_AGE:
+            if t - _snapshot_cache["now_at"] < _SNAPSHOT_NOW_MAX_AGE:
+                return _snapshot_cache["frame"]
+            snap = {**_snapshot_cache["snap"], "now": _get_now_playing_dict()}
+        else:
+            snap = _current_snapshot()
+            _snapshot_cache.update(gen=gen, at=t)
+        frame = _sse_frame(_dumps({"event": "snapshot", "data": snap, "ts": int(time.time() * 1000)}))
+        _snapshot_cache.update(frame=frame, snap=snap, now_at=time.monotonic())
+        return frame
+
+
 # ---- Background watchers ----
 _watchers_started = False
+# Bumped whenever the now-playing watcher stores a new track/state, so waiters wake at once
+_now_cond = threading.Condition()
+_now_seq = 0
+
+
+def _note_now_changed():
+    global _now_seq
+    with _now_cond:
+        _now_seq += 1
+        _now_cond.notify_all()
 
 
 def _start_watchers_once():
@@ -444,6 +711,7 @@ def _watch_now_loop():
                 if (pid and pid != prev_pid) or (not pid and meta_key and meta_key != prev_key) or restarted:
                     _last_snapshot['art_tok'] = int(time.time() * 1000)
                 _last_snapshot['now'] = now
+                _note_now_changed()
                 _sse_publish('now', {**now, 'artwork_token': _last_snapshot['art_tok']})
                 # Prefetch and cache current artwork in the background (do not probe "next track" to avoid accidental skips)
                 try:
@@ -452,10 +720,10 @@ def _watch_now_loop():
                         app.logger.debug(f"prefetch: current album='{album}'")
                         def _do_prefetch_and_hash():
                             try:
-                                b = _album_art_bytes(album)
+                                b = _artwork_shared(('album', album), lambda: _album_art_bytes(album))
                                 if b:
                                     try:
-                                        _last_snapshot['art_hash'] = hashlib.sha1(b).hexdigest()
+                                        _last_snapshot['art_hash'] = _content_tag(b)
                                     except Exception:
                                         pass
                             except Exception:
@@ -478,11 +746,7 @@ def _watch_airplay_loop():
         s = load_settings()
         itv = max(1.0, (s.get('poll_devices_ms', 3000) / 1000.0))
         try:
-            items = _read_airplay_full()
-            volumes = _get_airplay_volumes()
-            for item in items:
-                name = item['name']
-                item['volume'] = volumes.get(name, None)
+            items = _airplay_with_volumes()
             if items != last:
                 last = items
                 _last_snapshot['airplay'] = items
@@ -505,16 +769,22 @@ def _watch_master_loop():
         itv = max(0.8, pm / 1000.0)
         try:
             v = _get_master_volume_percent()
+            if v >= 0:
+                _note_master_volume(v)
             if v >= 0 and v != last_v:
                 last_v = v
-                _last_snapshot['master'] = v
                 _sse_publish('master_volume', v)
-            sh = bool(get_shuffle_enabled())
+            # Shuffle and repeat come from the same coalesced poll as the volume when it succeeds
+            fields = _poll_now_fields()
+            shuf_txt = fields[5].strip().lower() if fields else ""
+            sh = (shuf_txt in _TRUE_SET) if shuf_txt else bool(get_shuffle_enabled())
             if sh != last_shuffle:
                 last_shuffle = sh
                 _last_snapshot['shuffle'] = sh
                 _sse_publish('shuffle', {"enabled": sh})
-            rp = get_repeat_enabled()
+            rp = fields[6].strip().lower() if fields else ""
+            if rp not in ("off", "one", "all"):
+                rp = get_repeat_enabled()
             if rp != last_repeat:
                 last_repeat = rp
                 _last_snapshot['repeat'] = rp
@@ -523,64 +793,546 @@ def _watch_master_loop():
             app.logger.debug(f"watch master/shuffle/repeat error: {e}")
         time.sleep(itv)
 
-def run_applescript(script):
-    """Execute AppleScript and return the output."""
-    process = subprocess.Popen(['osascript', '-e', script], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    output, error = process.communicate()
-    code = process.returncode
-    if code != 0:
-        return {'error': (error or b'').decode('utf-8').strip() or f'osascript exited {code}'}
-    return (output or b'').decode('utf-8').strip()
+# Named by source digest. Argv and hot scripts keep their compiled copies in the user cache so
+# they outlive restarts; other repeat bodies can carry request values, so they stay in the temp dir
+_SCPT_DIR = os.path.join(os.path.expanduser("~"), "Library", "Caches", "Music App Server", "Scripts")
+_SCPT_TMP_DIR = os.path.join(tempfile.gettempdir(), 'music_app_server_scpt')
+_SCPT_KEEP_DAYS = 30  # persisted copies unused for this long are pruned at startup
+_script_uses = {}  # source -> run count, to spot fixed scripts worth compiling
+
+
+def _is_repeat_script(script: str) -> bool:
+    """True once a script body has been run before (fixed polling/listing scripts)."""
+    n = _script_uses.get(script, 0)
+    if n == 0 and len(_script_uses) >= 1024:
+        _script_uses.clear()
+    _script_uses[script] = n + 1
+    return n > 0
+
+
+# Fixed one-line transport commands, precompiled at startup with the poll script
+_TRANSPORT_SCRIPTS = {
+    'pause': 'tell application "Music" to pause',
+    'stop': 'tell application "Music" to stop',
+    'next': 'tell application "Music" to next track',
+    'previous': 'tell application "Music" to previous track',
+    'playpause': '''
+    tell application "Music"
+        try
+            playpause
+            return "ok"
+        on error errm number errn
+            return "ERROR:" & errn & ":" & errm
+        end try
+    end tell
+    ''',
+}
+# Volume and device scripts take their values via argv, so each body is compiled once and reused
+_GET_MASTER_VOLUME_SCRIPT = 'tell application "Music" to get sound volume'
+_SET_MASTER_VOLUME_SCRIPT = '''
+on run argv
+    tell application "Music" to set sound volume to ((item 1 of argv) as integer)
+end run
+'''
+# Answers "ok", then the device table, so callers can publish new states without another poll
+_SET_DEVICE_VOLUME_SCRIPT = '''
+on run argv
+    tell application "Music"
+        try
+            set sound volume of (first AirPlay device whose name is (item 1 of argv)) to ((item 2 of argv) as integer)
+        on error errm number errn
+            return "ERROR:" & errn & ":" & errm
+        end try
+''' + _DEVICE_ROWS_AS + '''
+        return "ok" & linefeed & devText
+    end tell
+end run
+'''
+_SELECTED_DEVICES_SCRIPT = '''
+tell application "Music"
+    set out to {}
+    try
+        repeat with d in AirPlay devices
+            try
+                set dnm to (name of d as text)
+                if (selected of d) is true and out does not contain {dnm} then set end of out to dnm
+            end try
+        end repeat
+    end try
+    set AppleScript's text item delimiters to linefeed
+    return out as text
+end tell
+'''
 
-def applescript_escape(s: str) -> str:
-    """Escape a string for safe use inside AppleScript quotes."""
-    return s.replace('"', '\\"') if isinstance(s, str) else s
 
+def _argv_devices_as(first: int) -> str:
+    """AppleScript selecting the AirPlay devices named by argv items first..end; a no-op when there
+    are none, and unknown names are skipped. Must run inside a tell application "Music" block."""
+    return f'''
+            set outDevs to {{}}
+            repeat with i from {int(first)} to (count of argv)
+                set devName to (item i of argv)
+                try
+                    set end of outDevs to (first AirPlay device whose name is devName)
+                end try
+            end repeat
+            if (count of outDevs) > 0 then set current AirPlay devices to outDevs'''
 
-# --- Simple persisted settings (port, auto-apply, open_browser) ---
-CONFIG_DIR = os.path.join(os.path.expanduser("~"), "Library", "Application Support", "Music App Server")
-ARTWORK_DIR = os.path.join(CONFIG_DIR, "Artwork")
-CONFIG_PATH = os.path.join(CONFIG_DIR, "config.json")
 
-_DEF_SETTINGS = {
-    "port": 7766,
-    "auto_apply": False,
-    "open_browser": True,
-    "confirm_quit": True,
-    "poll_now_ms": 1500,       # now-playing poll interval (ms)
-    "poll_devices_ms": 3000,   # devices poll interval (ms)
-    "poll_master_ms": 1500,   # master volume poll interval (ms); 0 disables
-}
+# argv is the device names; answers the names Music actually accepted, comma separated
+_SET_DEVICES_SCRIPT = '''
+on run argv
+    tell application "Music"
+        try''' + _argv_devices_as(1) + '''
+            -- Reflect what Music actually accepted:
+            set appliedNames to {}
+            try
+                repeat with d in current AirPlay devices
+                    set end of appliedNames to (name of d as text)
+                end repeat
+            on error
+                -- Fallback if class not scriptable on this version
+                repeat with d in outDevs
+                    set end of appliedNames to (name of d as text)
+                end repeat
+            end try
+            set AppleScript's text item delimiters to ","
+            return appliedNames as text
+        on error errm number errn
+            return "ERROR:" & errn & ":" & errm
+        end try
+    end tell
+end run
+'''
 
-def load_settings():
-    try:
-        with open(CONFIG_PATH, 'r') as f:
-            data = json.load(f)
-            if not isinstance(data, dict):
-                return dict(_DEF_SETTINGS)
-            out = dict(_DEF_SETTINGS)
-            out.update({k: data.get(k, v) for k, v in _DEF_SETTINGS.items()})
-            return out
-    except Exception:
-        return dict(_DEF_SETTINGS)
 
-def save_settings(data: dict):
-    os.makedirs(CONFIG_DIR, exist_ok=True)
-    # ensure artwork cache dir exists proactively
+def _hot_scripts():
+    return (*_TRANSPORT_SCRIPTS.values(), _POLL_ALL_SCRIPT, _CURRENT_ART_FILE_SCRIPT,
+            _GET_MASTER_VOLUME_SCRIPT, _SET_MASTER_VOLUME_SCRIPT, _SET_DEVICE_VOLUME_SCRIPT,
+            _SELECTED_DEVICES_SCRIPT, _QUEUE_ARTIST_SHUFFLED_SCRIPT)
+
+
+@functools.lru_cache(maxsize=1)
+def _hot_script_set():
+    return frozenset(_hot_scripts())
+
+
+def _precompile_scripts():
+    """Compile the hottest fixed scripts in the background so even their first osascript run skips parsing."""
+    def _run():
+        _prune_compiled_scripts()
+        for script in _hot_scripts():
+            if _compiled_script(script, True):
+                _script_uses.setdefault(script, 1)
+    threading.Thread(target=_run, daemon=True).start()
+
+
+def _prune_compiled_scripts():
+    """Drop persisted .scpt files not used for _SCPT_KEEP_DAYS (older releases' scripts, mostly)."""
+    cutoff = time.time() - _SCPT_KEEP_DAYS * 86400
     try:
-        os.makedirs(ARTWORK_DIR, exist_ok=True)
-    except Exception:
+        with os.scandir(_SCPT_DIR) as it:
+            for entry in it:
+                try:
+                    if entry.name.endswith('.scpt') and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
+    except OSError:
         pass
-    base = load_settings()
-    base.update(data or {})
-    with open(CONFIG_PATH, 'w') as f:
-        json.dump(base, f, indent=2)
-    return base
 
-def schedule_restart(delay=1.0):
-    def _restart():
-        import time
-        time.sleep(delay)
+
+@functools.lru_cache(maxsize=256)
+def _compiled_script(script: str, persist: bool = False):
+    """Path to an osacompile'd copy of a static script, or None if compiling fails.
+
+    persist=True keeps it in the user cache (argv and hot scripts), otherwise in the temp dir.
+    """
+    base = _SCPT_DIR if persist else _SCPT_TMP_DIR
+    try:
+        os.makedirs(base, exist_ok=True)
+        digest = hashlib.sha1(script.encode('utf-8')).hexdigest()
+        path = os.path.join(base, digest + '.scpt')
+        if os.path.exists(path):
+            if persist:
+                os.utime(path)  # first use this run; keeps it clear of the startup prune
+        else:
+            tmp = os.path.join(base, f'{digest}.{os.getpid()}.scpt')
+            r = subprocess.run(['osacompile', '-o', tmp, '-e', script], capture_output=True)
+            if r.returncode != 0:
+                return None
+            os.replace(tmp, path)
+        return path
+    except Exception:
+        return None
+
+
+# ---- Persistent osascript helpers ----
+# A few long-lived JXA processes run scripts through NSAppleScript, one JSON request per
+# line on stdin ({s: source, a: argv}) and one JSON reply per line on stdout
+# ({out} | {err} | {fallback}, or {data: base64} for binary requests; {s, c: 1} only compiles). This skips a
+# fork/exec and Music binding per call.
+# Booleans and lists are formatted as osascript prints them; other results that don't coerce
+# to text answer {fallback} and are rerun with osascript.
+_OSA_HELPER_SRC = r'''
+ObjC.import('Foundation');
+var stdin = $.NSFileHandle.fileHandleWithStandardInput;
+var stdout = $.NSFileHandle.fileHandleWithStandardOutput;
+var compiled = new Map();  // source -> NSAppleScript, least recently used first
+function send(o) {
+  stdout.writeData($(JSON.stringify(o) + '\n').dataUsingEncoding($.NSUTF8StringEncoding));
+}
+// Text the way osascript prints it, or null for results it would need to format itself
+function asText(d) {
+  var t = d.descriptorType;
+  if (t === 0x74727565) return 'true';
+  if (t === 0x66616c73) return 'false';
+  if (t === 0x626f6f6c) return d.booleanValue ? 'true' : 'false';
+  if (t === 0x6c697374) {
+    var parts = [];
+    for (var i = 1; i <= d.numberOfItems; i++) {
+      var item = asText(d.descriptorAtIndex(i));
+      if (item === null) return null;
+      parts.push(item);
+    }
+    return parts.join(', ');
+  }
+  var s = d.stringValue;
+  return (!s || s.isNil()) ? null : s.js;
+}
+function runOne(req) {
+  var args = req.a || [];
+  var scpt = compiled.get(req.s);
+  if (scpt) {
+    compiled.delete(req.s);
+  } else {
+    scpt = $.NSAppleScript.alloc.initWithSource($(req.s));
+    if (compiled.size >= 64) compiled.delete(compiled.keys().next().value);
+  }
+  compiled.set(req.s, scpt);
+  var err = Ref();
+  if (req.c) return scpt.compileAndReturnError(err) ? {out: ''} : {err: 'compile failed'};
+  var res;
+  if (args.length) {
+    var list = $.NSAppleEventDescriptor.listDescriptor;
+    for (var i = 0; i < args.length; i++) {
+      list.insertDescriptorAtIndex($.NSAppleEventDescriptor.descriptorWithString($(args[i])), i + 1);
+    }
+    var ev = $.NSAppleEventDescriptor.appleEventWithEventClassEventIDTargetDescriptorReturnIDTransactionID(
+      0x61657674, 0x6f617070, $.NSAppleEventDescriptor.nullDescriptor, -1, 0);
+    ev.setParamDescriptorForKeyword(list, 0x2d2d2d2d);
+    res = scpt.executeAppleEventError(ev, err);
+  } else {
+    res = scpt.executeAndReturnError(err);
+  }
+  if (!res || res.isNil()) {
+    var info = err[0];
+    var msg = (info && !info.isNil()) ? ObjC.unwrap(info.objectForKey('NSAppleScriptErrorMessage')) : '';
+    return {err: String(msg || 'AppleScript error')};
+  }
+  if (res.descriptorType === 0x6e756c6c) return {out: ''};
+  var s = asText(res);
+  if (s === null) {
+    if (req.b && !res.data.isNil()) return {data: res.data.base64EncodedStringWithOptions(0).js};
+    return {fallback: true};
+  }
+  return {out: s};
+}
+var buf = '';
+while (true) {
+  var data = stdin.availableData;
+  if (data.length === 0) break;
+  buf += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+  var nl;
+  while ((nl = buf.indexOf('\n')) >= 0) {
+    var line = buf.slice(0, nl);
+    buf = buf.slice(nl + 1);
+    if (!line) continue;
+    var out;
+    try { out = runOne(JSON.parse(line)); } catch (e) { out = {fallback: true}; }
+    send(out);
+  }
+}
+'''
+_OSA_HELPERS = max(0, int(os.getenv("AM_OSA_HELPERS", "2") or 0))  # 0 disables
+_osa_idle = Queue()
+_osa_lock = threading.Lock()
+_osa_state = {"count": 0, "failures": 0, "disabled_at": 0.0}
+# After repeated helper crashes, stay on one-shot osascript for a while, then try a fresh helper
+_OSA_RETRY_AFTER = 60.0
+# One-shot osascripts slow each other down when many run at once; the helpers are bounded already
+_OSA_GATE = threading.BoundedSemaphore(max(2, (os.cpu_count() or 4) // 2))
+# A helper round trip is far cheaper than a cold osascript, so briefly queue for one
+_OSA_WAIT = float(os.getenv("AM_OSA_WAIT", "0.25") or 0)
+
+
+def _osa_acquire():
+    try:
+        return _osa_idle.get_nowait()
+    except Empty:
+        pass
+    with _osa_lock:
+        if _osa_state["failures"] >= 3:
+            if time.monotonic() - _osa_state["disabled_at"] < _OSA_RETRY_AFTER:
+                return None
+            _osa_state["failures"] = 2  # one more crash backs off again
+        if _osa_state["count"] < _OSA_HELPERS:
+            try:
+                p = subprocess.Popen(['osascript', '-l', 'JavaScript', '-e', _OSA_HELPER_SRC],
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            except Exception:
+                _osa_state["failures"] = 3
+                _osa_state["disabled_at"] = time.monotonic()
+                return None
+            _osa_state["count"] += 1
+            return p
+    # All helpers busy: wait a moment for one, then let the caller fall back to a one-shot osascript
+    if _OSA_WAIT <= 0:
+        return None
+    try:
+        return _osa_idle.get(timeout=_OSA_WAIT)
+    except Empty:
+        return None
+
+
+def _osa_release(p, healthy):
+    if healthy:
+        _osa_idle.put(p)
+        return
+    try:
+        p.kill()
+    except Exception:
+        pass
+    with _osa_lock:
+        _osa_state["count"] -= 1
+        _osa_state["failures"] += 1
+        if _osa_state["failures"] >= 3:
+            _osa_state["disabled_at"] = time.monotonic()
+
+
+def _osa_prewarm():
+    """Start the helper pool in the background, with the hot scripts already compiled in each."""
+    def _warm_one():
+        p = _osa_acquire()
+        if p is None:
+            return
+        healthy = True
+        try:
+            for script in _hot_scripts():
+                p.stdin.write((json.dumps({"s": script, "c": 1}) + "\n").encode("ascii"))
+                p.stdin.flush()
+                if not p.stdout.readline():
+                    raise EOFError("osascript helper exited")
+        except Exception as e:
+            app.logger.debug(f"osascript helper prewarm failed: {e}")
+            healthy = False
+        _osa_release(p, healthy)
+
+    for _ in range(_OSA_HELPERS):
+        # Concurrent acquires make each thread spawn (and warm) its own helper
+        threading.Thread(target=_warm_one, daemon=True).start()
+
+
+def _run_via_helper(script, args, binary=False):
+    """Run through a persistent helper; None means use a one-shot osascript instead.
+
+    With binary=True a raw data result (e.g. artwork) comes back as bytes.
+    """
+    p = _osa_acquire()
+    if p is None:
+        return None
+    try:
+        req = {"s": script, "a": [str(a) for a in args]}
+        if binary:
+            req["b"] = 1
+        p.stdin.write((json.dumps(req) + "\n").encode("ascii"))
+        p.stdin.flush()
+        line = p.stdout.readline()
+        if not line:
+            raise EOFError("osascript helper exited")
+        resp = json.loads(line)
+    except Exception as e:
+        app.logger.debug(f"osascript helper failed: {e}")
+        _osa_release(p, False)
+        return None
+    _osa_release(p, True)
+    with _osa_lock:
+        _osa_state["failures"] = 0
+    if 'err' in resp:
+        return {'error': resp.get('err') or 'AppleScript error'}
+    if resp.get('fallback'):
+        return None
+    if 'data' in resp:
+        try:
+            return base64.b64decode(resp['data'])
+        except Exception:
+            return None
+    return (resp.get('out') or '').strip()
+
+
+def run_applescript(script, *args):
+    """Execute AppleScript and return the output.
+
+    Extra args reach the script's ``on run argv`` handler as strings. Argv scripts,
+    and any body seen before, are compiled once and the .scpt is reused.
+    Calls go to an idle persistent helper when one is available.
+    """
+    if _OSA_HELPERS:
+        r = _run_via_helper(script, args)
+        if r is not None:
+            return r
+    cmd = ['osascript', '-e', script]
+    if args or _is_repeat_script(script):
+        compiled = _compiled_script(script, bool(args) or script in _hot_script_set())
+        if compiled:
+            cmd = ['osascript', compiled]
+    cmd += [str(a) for a in args]
+    with _OSA_GATE:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        output, error = process.communicate()
+    code = process.returncode
+    if code != 0:
+        return {'error': (error or b'').decode('utf-8').strip() or f'osascript exited {code}'}
+    return (output or b'').decode('utf-8').strip()
+
+def applescript_escape(s: str) -> str:
+    """Escape a string for safe use inside AppleScript quotes."""
+    return _applescript_escape_cached(s) if isinstance(s, str) else s
+
+@functools.lru_cache(maxsize=4096)
+def _applescript_escape_cached(s: str) -> str:
+    return s.replace('\\', '\\\\').replace('"', '\\"')
+
+def _jsonify_etag(obj):
+    """jsonify() with a content ETag; returns 304 when If-None-Match already matches."""
+    resp = jsonify(obj)
+    try:
+        etag = _content_tag(resp.get_data())
+    except Exception:
+        return resp
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={'ETag': etag})
+    resp.headers['ETag'] = etag
+    return resp
+
+
+# ---- Library list cache (albums/artists/playlists) ----
+_LIB_CACHE_TTL = 300.0
+_lib_cache = {}     # key -> (monotonic ts, list)
+_lib_inflight = {}  # key -> Future shared by concurrent misses
+_lib_lock = threading.Lock()
+
+
+def _lib_cached(key, loader):
+    """Return loader() for key, cached for _LIB_CACHE_TTL seconds.
+
+    Concurrent misses wait on the one in-flight run. Only lists are cached, so
+    AppleScript errors (dicts) are returned but retried on the next call.
+    """
+    with _lib_lock:
+        hit = _lib_cache.get(key)
+        if hit and time.monotonic() - hit[0] < _LIB_CACHE_TTL:
+            return hit[1]
+        fut = _lib_inflight.get(key)
+        owner = fut is None
+        if owner:
+            fut = _lib_inflight[key] = Future()
+    if not owner:
+        return fut.result()
+    try:
+        value = loader()
+    except Exception as e:
+        with _lib_lock:
+            _lib_inflight.pop(key, None)
+        fut.set_exception(e)
+        raise
+    with _lib_lock:
+        if isinstance(value, list):
+            _lib_cache[key] = (time.monotonic(), value)
+        _lib_inflight.pop(key, None)
+    fut.set_result(value)
+    return value
+
+
+def _lib_invalidate(*keys):
+    """Drop cached library lists (all of them when no keys are given) and tell clients."""
+    with _lib_lock:
+        if not keys:
+            _lib_cache.clear()
+        for k in keys:
+            _lib_cache.pop(k, None)
+    _sse_publish('library_changed', {"keys": list(keys)})
+
+
+def _list_response(items):
+    """List payload as JSON, or as NDJSON (one value per line) when ?stream=1; both carry an ETag."""
+    if not request.args.get('stream'):
+        return _jsonify_etag(items)
+    lines = [json.dumps(x, ensure_ascii=False) + "\n" for x in items]
+    etag = _content_tag("".join(lines).encode("utf-8"))
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={'ETag': etag})
+
+    def _gen():
+        for i in range(0, len(lines), 256):
+            yield "".join(lines[i:i + 256])
+    return Response(_gen(), mimetype='application/x-ndjson', headers={'ETag': etag})
+
+
+# --- Simple persisted settings (port, auto-apply, open_browser) ---
+CONFIG_DIR = os.path.join(os.path.expanduser("~"), "Library", "Application Support", "Music App Server")
+ARTWORK_DIR = os.path.join(CONFIG_DIR, "Artwork")
+CONFIG_PATH = os.path.join(CONFIG_DIR, "config.json")
+
+_DEF_SETTINGS = {
+    "port": 7766,
+    "auto_apply": False,
+    "open_browser": True,
+    "confirm_quit": True,
+    "poll_now_ms": 1500,       # now-playing poll interval (ms)
+    "poll_devices_ms": 3000,   # devices poll interval (ms)
+    "poll_master_ms": 1500,   # master volume poll interval (ms); 0 disables
+}
+
+def load_settings():
+    """Current settings merged over the defaults; the file is only re-parsed after it changes."""
+    try:
+        st = os.stat(CONFIG_PATH)
+    except OSError:
+        return dict(_DEF_SETTINGS)
+    return dict(_settings_cached(st.st_mtime_ns, st.st_size))
+
+
+@functools.lru_cache(maxsize=1)
+def _settings_cached(mtime_ns, size):
+    try:
+        with open(CONFIG_PATH, 'r') as f:
+            data = json.load(f)
+            if not isinstance(data, dict):
+                return dict(_DEF_SETTINGS)
+            out = dict(_DEF_SETTINGS)
+            out.update({k: data.get(k, v) for k, v in _DEF_SETTINGS.items()})
+            return out
+    except Exception:
+        return dict(_DEF_SETTINGS)
+
+def save_settings(data: dict):
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+    # ensure artwork cache dir exists proactively
+    try:
+        os.makedirs(ARTWORK_DIR, exist_ok=True)
+    except Exception:
+        pass
+    base = load_settings()
+    base.update(data or {})
+    with open(CONFIG_PATH, 'w') as f:
+        json.dump(base, f, indent=2)
+    return base
+
+def schedule_restart(delay=1.0):
+    def _restart():
+        import time
+        time.sleep(delay)
         try:
             # If running as a PyInstaller macOS app bundle, relaunch via `open`
             if getattr(sys, 'frozen', False) or os.environ.get('PYINSTALLER_BUNDLED') == '1':
@@ -732,15 +1484,8 @@ def repeat_toggle():
 
 # --- UI route ---
 
-@app.route("/ui")
-def web_ui():
-    """Serve a minimal, nice-looking control page for Apple Music & AirPlay."""
-    try:
-        _start_watchers_once()
-    except Exception:
-        pass
-    return render_template_string(
-        r'''<!doctype html>
+# The page has no template variables, so it is encoded and tagged once at import
+_UI_HTML = r'''<!doctype html>
 <html lang="en">
 <head>
 <meta charset="utf-8">
@@ -785,6 +1530,17 @@ def web_ui():
   .dev .left{display:flex;align-items:center;gap:10px}
   .dev input[type=checkbox]{width:18px;height:18px}
   .dev .name{min-width:160px}
+  .dev .right{flex:1;display:flex;align-items:center;gap:10px}
+  .dev .right input[type=range]{width:100%}
+  .bhead{margin-bottom:16px;padding:12px;border:1px solid var(--border);border-radius:8px;background:#0f1520}
+  .bhead .top{display:flex;gap:8px;align-items:center;margin-bottom:8px}
+  .bhead .acts{display:flex;gap:8px}
+  .bhead h3{margin:0;color:var(--text)}
+  .bsec{margin-bottom:16px}
+  .bsec h4{margin:0 0 8px;color:var(--text)}
+  .vlist{position:relative;height:400px;overflow-y:auto;padding-right:4px}
+  .vlist .dev{position:absolute;left:0;right:4px;top:0;height:64px;box-sizing:border-box}
+  .vlist .dev .name{overflow:hidden;text-overflow:ellipsis;white-space:nowrap}
   .status-dot{width:10px;height:10px;border-radius:50%;border:1px solid var(--border2);display:inline-block}
   .status-on{background:var(--good)}
   .status-off{background:#2a3a54}
@@ -805,7 +1561,7 @@ def web_ui():
   <div class="grid cols">
     <div class="card">
       <div class="now">
-        <img id="art" class="art" src="/artwork" alt="artwork" onerror="this.src='data:image/svg+xml;utf8,<svg xmlns=\'http://www.w3.org/2000/svg\' viewBox=\'0 0 128 128\'><rect width=\'128\' height=\'128\' fill=\'%231d2633\'/><text x=\'50%\' y=\'55%\' dominant-baseline=\'middle\' text-anchor=\'middle\' font-size=\'14\' fill=\'%237b8a9a\'>No Art</text></svg>'">
+        <img id="art" class="art" src="/artwork" alt="artwork" decoding="async" onerror="this.src='data:image/svg+xml;utf8,<svg xmlns=\'http://www.w3.org/2000/svg\' viewBox=\'0 0 128 128\'><rect width=\'128\' height=\'128\' fill=\'%231d2633\'/><text x=\'50%\' y=\'55%\' dominant-baseline=\'middle\' text-anchor=\'middle\' font-size=\'14\' fill=\'%237b8a9a\'>No Art</text></svg>'">
         <div>
           <div class="kv"><span class="label">Track:</span> <span id="trk" class="title">—</span></div>
           <div class="kv"><span class="label">Artist:</span> <span id="artst">—</span></div>
@@ -855,17 +1611,7 @@ def web_ui():
         <button class="btn" onclick="action(this, () => loadBrowseTab(this.dataset.tab))" data-tab="playlists">Playlists</button>
       </div>
       <div id="letterNav" class="row" style="margin-bottom:12px;gap:4px;flex-wrap:wrap"></div>
-      <div id="browseResults" class="devs"></div>
-      <div id="pagination" class="row" style="justify-content:space-between;margin-top:24px;gap:8px">
-        <div class="row" style="gap:8px">
-          <button class="btn" onclick="changePage(currentPage - 1)" id="prevBtn">Prev</button>
-          <span>Page <input type="number" id="pageInput" min="1" value="1" style="width:60px;text-align:center;border:1px solid var(--border2);border-radius:6px;background:#0f1520;color:var(--text);padding:4px"> of <span id="totalPages">1</span></span>
-          <button class="btn" onclick="changePage(currentPage + 1)" id="nextBtn">Next</button>
-        </div>
-        <div class="row" style="gap:8px">
-          <button class="btn" onclick="changePage(parseInt($('#pageInput').value) || 1)">Go</button>
-        </div>
-      </div>
+      <div id="browseResults"></div>
     </div>
 
     <div class="card">
@@ -916,12 +1662,56 @@ def web_ui():
   </div>
 
   <div id="toast" class="toast" role="status" aria-live="polite"></div>
+  <template id="browseRowTpl">
+    <div class="dev">
+      <div class='left'>
+        <div class='name'></div>
+      </div>
+      <div class='right'>
+        <span class='chip'></span>
+        <button class="btn" data-act="play">Play</button>
+        <button class="btn" data-act="shuffle">Shuffle</button>
+        <button class="btn" data-act="browse">Browse</button>
+      </div>
+    </div>
+  </template>
+  <template id="browseHeadTpl">
+    <div class="bhead">
+      <div class="top">
+        <button class="btn" data-act="back">← Back</button>
+        <h3></h3>
+      </div>
+      <div class="acts">
+        <button class="btn" data-act="play"></button>
+        <button class="btn" data-act="shuffle"></button>
+      </div>
+    </div>
+  </template>
+  <template id="browseSectionTpl">
+    <div class="bsec">
+      <h4></h4>
+      <div></div>
+    </div>
+  </template>
 <script>
 const $ = sel => document.querySelector(sel);
 const devBox = $('#devs');
-function escHtml(s){ return String(s).replace(/&/g,'&amp;').replace(/</g,'&lt;').replace(/>/g,'&gt;'); }
-function attrQuote(s){ return String(s).replace(/&/g,'&amp;').replace(/"/g,'&quot;').replace(/</g,'&lt;'); }
-function canonName(s){ try { return String(s).normalize('NFKC').trim(); } catch(e){ return String(s||'').trim(); } }
+// Bounded memo for pure string helpers; the same device/library names recur every render
+function memo1(fn, cap=4096){
+  const m = new Map();
+  return s => {
+    let v = m.get(s);
+    if (v !== undefined) return v;
+    v = fn(s);
+    if (m.size >= cap) m.delete(m.keys().next().value);
+    m.set(s, v);
+    return v;
+  };
+}
+const escHtml = memo1(s => String(s).replace(/&/g,'&amp;').replace(/</g,'&lt;').replace(/>/g,'&gt;'));
+const attrQuote = memo1(s => String(s).replace(/&/g,'&amp;').replace(/"/g,'&quot;').replace(/</g,'&lt;'));
+const canonName = memo1(s => { try { return String(s).normalize('NFKC').trim(); } catch(e){ return String(s||'').trim(); } });
+const cssId = memo1(s => s.replace(/[^a-z0-9]+/gi,'-'));
 function unescHtml(s){ return String(s).replace(/&quot;/g,'"').replace(/&lt;/g,'<').replace(/&gt;/g,'>').replace(/&amp;/g,'&'); }
 function showToast(msg, ok=true){
   const t = document.getElementById('toast');
@@ -929,9 +1719,8 @@ function showToast(msg, ok=true){
   t.textContent = String(msg);
   t.classList.remove('good','warn','show');
   t.classList.add(ok ? 'good' : 'warn');
-  // Force reflow to restart transition
-  void t.offsetWidth;
-  t.classList.add('show');
+  // Re-add on the frame after next so the transition restarts without a forced reflow
+  requestAnimationFrame(() => requestAnimationFrame(() => t.classList.add('show')));
   clearTimeout(showToast._timer);
   showToast._timer = setTimeout(()=>{ t.classList.remove('show'); }, 2500);
 }
@@ -944,7 +1733,7 @@ function action(btn, fn){
       setTimeout(()=>btn.classList.remove('clicked'), 160);
     }
     const p = Promise.resolve().then(fn);
-    return p.finally(()=>{ if(btn && btn.classList) btn.classList.remove('busy'); });
+    return p.finally(()=>{ if(btn && btn.classList) btn.classList.remove('busy'); pollKick(); });
   }catch(e){
     if(btn && btn.classList) btn.classList.remove('busy');
     throw e;
@@ -982,6 +1771,28 @@ let devicesApplyTimer = null;
 let POLL_NOW_MS = 1500;
 let POLL_DEVICES_MS = 3000;
 let POLL_MASTER_MS = 1500;  // 0 disables
+// Fallback pollers back off while responses repeat (x1.5 up to 10x base) and
+// speed up on change (x0.5 down to base); pollKick() snaps them back after an action.
+// Each poll fn resolves to false when nothing changed.
+function adaptivePoll(fn, baseMs){
+  const p = {next: baseMs, timer: null, live: true};
+  const schedule = ms => { clearTimeout(p.timer); p.timer = setTimeout(tick, ms); };
+  async function tick(){
+    let changed = true;
+    try { changed = (await fn()) !== false; } catch(_){}
+    if (!p.live) return;
+    p.next = Math.min(baseMs * 10, Math.max(baseMs, p.next * (changed ? 0.5 : 1.5)));
+    schedule(p.next);
+  }
+  p.stop = ()=>{ p.live = false; clearTimeout(p.timer); };
+  p.kick = ()=>{ p.next = baseMs; schedule(baseMs); };
+  schedule(baseMs);
+  return p;
+}
+function pollKick(){
+  for (const p of [_timerNow, _timerDev, _timerMaster]) if (p) p.kick();
+}
+
 let _timerNow = null;
 let _timerDev = null;
 let _timerMaster = null;
@@ -989,16 +1800,90 @@ function applyPollingIntervals(nowMs, devMs, masterMs){
   if (typeof nowMs === 'number') POLL_NOW_MS = nowMs;
   if (typeof devMs === 'number') POLL_DEVICES_MS = devMs;
   if (typeof masterMs === 'number') POLL_MASTER_MS = masterMs;
+  // Polling is only a fallback while the /events stream is down
+  if (sseLive) stopPolling(); else startPolling();
+}
 
-  if (_timerNow)    clearInterval(_timerNow);
-  if (_timerDev)    clearInterval(_timerDev);
-  if (_timerMaster) clearInterval(_timerMaster);
+function stopPolling(){
+  if (_timerNow)    _timerNow.stop();
+  if (_timerDev)    _timerDev.stop();
+  if (_timerMaster) _timerMaster.stop();
+  _timerNow = _timerDev = _timerMaster = null;
+}
 
-  _timerNow = setInterval(loadNow, POLL_NOW_MS);
-  _timerDev = setInterval(loadDevicesLive, POLL_DEVICES_MS);
+function startPolling(){
+  stopPolling();
+  if (!pageActive()) return;
+  _timerNow = adaptivePoll(loadNow, POLL_NOW_MS);
+  _timerDev = adaptivePoll(loadDevicesLive, POLL_DEVICES_MS);
 
   if (POLL_MASTER_MS > 0) {
-    _timerMaster = setInterval(loadMaster, POLL_MASTER_MS);
+    _timerMaster = adaptivePoll(loadMaster, POLL_MASTER_MS);
+  }
+}
+
+// --- Push updates (SSE) ---
+let es = null;
+let sseLive = false;
+function connectEvents(){
+  if (es || !pageActive()) return;
+  if (!window.EventSource) { startPolling(); return; }
+  const src = es = new EventSource('/events');
+  src.onopen = ()=>{ sseLive = true; stopPolling(); };
+  src.onmessage = (e)=>{
+    let msg;
+    try { msg = JSON.parse(e.data); } catch(_) { return; }
+    handleEvent(msg);
+  };
+  src.onerror = ()=>{
+    if (es !== src) return; // superseded by suspendUpdates()/reconnect
+    if (sseLive || !_timerNow) startPolling();
+    sseLive = false;
+    // The browser retries on its own unless the stream is closed for good
+    if (src.readyState === EventSource.CLOSED){
+      es = null;
+      setTimeout(connectEvents, 30000);
+    }
+  };
+}
+
+// Pause all live updates while the tab is hidden or the device is offline
+function pageActive(){ return !document.hidden && navigator.onLine !== false; }
+function suspendUpdates(){
+  stopPolling();
+  if (es){ es.close(); es = null; }
+  sseLive = false;
+}
+function resumeUpdates(){
+  if (!pageActive()) return;
+  if (window.EventSource){
+    connectEvents(); // the initial snapshot refreshes everything
+  } else {
+    startPolling();
+    loadNow(); loadDevicesLive(); loadMaster();
+  }
+}
+document.addEventListener('visibilitychange', ()=>{ if (document.hidden) suspendUpdates(); else resumeUpdates(); });
+window.addEventListener('offline', suspendUpdates);
+window.addEventListener('online', resumeUpdates);
+
+function handleEvent(msg){
+  const d = msg ? msg.data : null;
+  switch (msg && msg.event){
+    case 'snapshot':
+      if (!d) return;
+      if (d.now) applyNow(d.now);
+      if (typeof d.shuffle === 'boolean') applyShuffle(d.shuffle);
+      if (typeof d.repeat === 'string') updateRepeatButton(d.repeat || 'off');
+      if (typeof d.master === 'number') applyMaster(d.master);
+      if (Array.isArray(d.airplay)) applyDevicesLive(d.airplay);
+      break;
+    case 'now':          if (d) applyNow(d); break;
+    case 'master_volume': applyMaster(d); break;
+    case 'airplay_full': if (Array.isArray(d)) applyDevicesLive(d); break;
+    case 'shuffle':      if (d) applyShuffle(!!d.enabled); break;
+    case 'repeat':       if (d) updateRepeatButton(d.mode || 'off'); break;
+    case 'library_changed': onLibraryChanged(d && d.keys); break;
   }
 }
 
@@ -1031,6 +1916,109 @@ function updatePP(isPlaying){
   pp.classList.toggle('btn-primary', !isPlaying);
 }
 
+// Conditional GET: replay the last ETag and reuse the cached JSON on 304
+const etags = new Map();
+const jsonCache = new Map();
+// Concurrent callers for the same key share one request
+const inflight = new Map();
+function dedupe(key, start){
+  let p = inflight.get(key);
+  if (!p){
+    p = start().finally(() => inflight.delete(key));
+    inflight.set(key, p);
+  }
+  return p;
+}
+function cachedFetch(url){
+  return dedupe('json:' + url, () => _cachedFetch(url));
+}
+async function _cachedFetch(url){
+  const headers = {};
+  if (etags.has(url) && jsonCache.has(url)) headers['If-None-Match'] = etags.get(url);
+  const r = await fetch(url, {headers});
+  if (r.status === 304 && jsonCache.has(url)) return jsonCache.get(url);
+  if (!r.ok) throw new Error(`HTTP ${r.status}: ${r.statusText}`);
+  const data = await r.json();
+  const tag = r.headers.get('ETag');
+  if (tag){ etags.set(url, tag); jsonCache.set(url, data); }
+  return data;
+}
+
+// Drill-down results (artist albums/songs, album tracks) kept by URL, most recent last
+const browseLRU = new Map();
+const LRU_MAX = 64;
+function lruGet(k){
+  const v = browseLRU.get(k);
+  if (v !== undefined){ browseLRU.delete(k); browseLRU.set(k, v); }
+  return v;
+}
+function lruSet(k, v){
+  browseLRU.delete(k);
+  browseLRU.set(k, v);
+  if (browseLRU.size > LRU_MAX) browseLRU.delete(browseLRU.keys().next().value);
+}
+async function browseFetch(url, onItems){
+  let v = lruGet(url);
+  if (v === undefined){ v = await streamList(url, onItems); lruSet(url, v); }
+  return v;
+}
+
+// Like cachedFetch() for NDJSON lists; onItems(list) fires as lines arrive.
+// Lists fetched within LIST_TTL are served from jsonCache without a request
+// until a 'library_changed' push drops them.
+const LIST_TTL = 60000;
+const fetchedAt = new Map();
+function streamList(url, onItems){
+  if (jsonCache.has(url) && Date.now() - (fetchedAt.get(url) || 0) < LIST_TTL){
+    return Promise.resolve(jsonCache.get(url));
+  }
+  return dedupe('list:' + url, () => _streamList(url, onItems).then(v => { fetchedAt.set(url, Date.now()); return v; }));
+}
+function onLibraryChanged(keys){
+  if (!Array.isArray(keys) || !keys.length){
+    fetchedAt.clear();
+    browseLRU.clear();
+    return;
+  }
+  for (const k of keys) fetchedAt.delete(`/${k}?stream=1`);
+}
+async function _streamList(url, onItems){
+  const headers = {};
+  if (etags.has(url) && jsonCache.has(url)) headers['If-None-Match'] = etags.get(url);
+  const r = await fetch(url, {headers});
+  if (r.status === 304 && jsonCache.has(url)) return jsonCache.get(url);
+  if (!r.ok) throw new Error(`HTTP ${r.status}: ${r.statusText}`);
+  let out;
+  if (!(r.headers.get('Content-Type') || '').includes('ndjson')){
+    out = await r.json();
+  }else if (!r.body || typeof TextDecoderStream === 'undefined'){
+    out = (await r.text()).split('\n').filter(Boolean).map(l => JSON.parse(l));
+  }else{
+    out = [];
+    const reader = r.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buf = '';
+    for (;;){
+      const {value, done} = await reader.read();
+      if (done) break;
+      buf += value;
+      const before = out.length;
+      let i;
+      while ((i = buf.indexOf('\n')) >= 0){
+        const line = buf.slice(0, i);
+        buf = buf.slice(i + 1);
+        if (line) out.push(JSON.parse(line));
+      }
+      if (onItems && out.length > before) onItems(out);
+    }
+    if (buf.trim()) out.push(JSON.parse(buf));
+  }
+  const tag = r.headers.get('ETag');
+  // A changed library list means drill-down results may be stale too
+  if (etags.has(url) && etags.get(url) !== tag) browseLRU.clear();
+  if (tag){ etags.set(url, tag); jsonCache.set(url, out); }
+  return out;
+}
+
 async function call(url, method='GET', body=null){
   const opt = {method, headers:{'Content-Type':'application/json'}};
   if(body) opt.body = JSON.stringify(body);
@@ -1039,43 +2027,118 @@ async function call(url, method='GET', body=null){
 
 function fmt(x){ return (x==null||isNaN(x))? '—' : x }
 
+let lastTrackKey = '';
+// Now-playing nodes looked up once; applyNow() writes only the fields that changed
+const NOW = {trk: $('#trk'), artst: $('#artst'), albm: $('#albm'), state: $('#state')};
+let lastNow = {};
+function applyNow(data){
+  const st = (data.is_playing===true || data.state==='playing')? 'Playing' : (data.state||'Paused');
+  const next = {
+    trk: data.title || '—',
+    artst: data.artist || '—',
+    albm: data.album || '—',
+    state: st + (data.position? ` — ${Math.round(data.position)}s` : ''),
+    playing: st === 'Playing',
+  };
+  for (const k in NOW){
+    if (next[k] !== lastNow[k]) NOW[k].textContent = next[k];
+  }
+  if (next.playing !== lastNow.playing) updatePP(next.playing);
+  lastNow = next;
+  nowAnchor = {pos: Number(data.position) || 0, at: Date.now()};
+  applyShuffle(data.shuffle === true);
+  // Pushed 'now' events carry repeat separately (see the 'repeat' event)
+  if (typeof data.repeat === 'string') updateRepeatButton(data.repeat || 'off');
+  // Only re-fetch artwork when the track changes; the key doubles as the cache-bust
+  const key = (data.title||'') + '|' + (data.artist||'') + '|' + (data.album||'');
+  if (key !== lastTrackKey){
+    lastTrackKey = key;
+    const url = '/artwork?ts=' + encodeURIComponent(key);
+    // Decode off the main thread first, then swap; a failed decode still swaps so onerror shows the placeholder
+    const next = new Image();
+    next.src = url;
+    (next.decode ? next.decode() : Promise.resolve()).catch(()=>{}).then(()=>{
+      if (lastTrackKey === key) $('#art').src = url;
+    });
+  }
+}
+
+// Pushed 'now' events only arrive on track/state changes, so the shown position
+// advances locally from the last reported one instead of polling for it
+let nowAnchor = null;
+setInterval(()=>{
+  if (!lastNow.playing || !nowAnchor || document.hidden) return;
+  const s = `Playing — ${Math.round(nowAnchor.pos + (Date.now() - nowAnchor.at) / 1000)}s`;
+  if (s !== lastNow.state){ NOW.state.textContent = s; lastNow.state = s; }
+}, 1000);
+
+let lastNowBody = '';
 async function loadNow(){
   try{
-    const data = await (await fetch('/now_playing')).json();
-    $('#trk').textContent = data.title || '—';
-    $('#artst').textContent = data.artist || '—';
-    $('#albm').textContent = data.album || '—';
-    const st = (data.is_playing===true || data.state==='playing')? 'Playing' : (data.state||'Paused');
-    $('#state').textContent = st + (data.position? ` — ${Math.round(data.position)}s` : '');
-    updatePP(st==='Playing');
-    $('#btn_shuffle').classList.toggle('btn-primary', data.shuffle === true);
-    updateRepeatButton(data.repeat || 'off');
-    $('#art').src = '/artwork?ts=' + Date.now();
+    const body = await (await fetch('/now_playing')).text();
+    if (body === lastNowBody) return false;
+    lastNowBody = body;
+    applyNow(JSON.parse(body));
   }catch(e){ console.warn('now_playing', e); }
 }
 
+let shownShuffle = null;
+function applyShuffle(on){
+  if (on === shownShuffle) return;
+  shownShuffle = on;
+  $('#btn_shuffle').classList.toggle('btn-primary', on);
+}
+
+function applyMaster(v){
+  v = parseInt(v);
+  $('#master').value = isFinite(v)? v:0; $('#mv').textContent = (isFinite(v)? v:0) + '%';
+}
+
+let lastMaster = null;
 async function loadMaster(){
   try{
     const r = await fetch('/master_volume');
     const v = r.ok ? parseInt(await r.text()) : 0;
-    $('#master').value = isFinite(v)? v:0; $('#mv').textContent = (isFinite(v)? v:0) + '%';
+    if (v === lastMaster) return false;
+    lastMaster = v;
+    applyMaster(v);
   }catch(e){ console.warn('master', e); }
 }
 
-let masterTimer=null;
+// Slider throttle: rAF-coalesced, at most one send per SLIDER_MIN_MS while dragging;
+// flush() commits the final value immediately (wired to the 'change' event).
+const SLIDER_MIN_MS = 64;
+function rafThrottle(send){
+  let raf = 0, pending = false, lastSent = 0;
+  const tick = ()=>{
+    const now = performance.now();
+    if (pending && now - lastSent >= SLIDER_MIN_MS){ pending = false; lastSent = now; send(); }
+    raf = pending ? requestAnimationFrame(tick) : 0;
+  };
+  const fn = ()=>{ pending = true; if (!raf) raf = requestAnimationFrame(tick); };
+  fn.flush = ()=>{
+    pending = false;
+    if (raf){ cancelAnimationFrame(raf); raf = 0; }
+    lastSent = performance.now();
+    send();
+  };
+  return fn;
+}
+
 async function setMaster(){
   const v = parseInt($('#master').value);
   $('#mv').textContent = v+'%';
   try{ await call('/master_volume','POST',{level:v}); }catch(e){ console.warn('set master', e); }
 }
-function debouncedMaster(){ clearTimeout(masterTimer); masterTimer=setTimeout(setMaster, 150); }
+const debouncedMaster = rafThrottle(setMaster);
+$('#master').addEventListener('change', ()=> debouncedMaster.flush());
 
-function cssId(s){ return s.replace(/[^a-z0-9]+/gi,'-'); }
 
 async function purgeArtworkCache(){
   try{
     const r = await fetch('/purge_album_cache', { method:'POST' });
     if (!r.ok){ throw new Error('HTTP '+r.status); }
+    browseLRU.clear();
     showToast('Artwork cache purged', true);
     try { document.getElementById('art').src = '/artwork?refresh=1&ts=' + Date.now(); } catch(_){}
   }catch(e){
@@ -1086,132 +2149,172 @@ async function purgeArtworkCache(){
 
 async function loadDevices(){
   try{
-    const full = await (await fetch('/airplay_full')).json(); // [{name, volume, active}]
-    const showDisabled = $('#showDisabled').checked;
-    // Filter devices based on showDisabled setting
-    const filtered = showDisabled ? full : full.filter(d => d.active);
-    // Sort active first, then by name (case-insensitive)
-    filtered.sort((a, b) => {
-      const ax = a && a.active ? 0 : 1;
-      const bx = b && b.active ? 0 : 1;
-      if (ax !== bx) return ax - bx;
-      return String(a.name).localeCompare(String(b.name), undefined, { sensitivity: 'base' });
-    });
-    devBox.innerHTML = '';
+    renderDevices(await cachedFetch('/airplay_full')); // [{name, volume, active}]
+  }catch(e){ console.warn('devices', e); }
+}
 
-    // Seed selection on first render from active devices
-    if (selected.size === 0) {
-      full.filter(d => d.active).forEach(d => selected.add(String(d.name)));
-    }
+// Server stamps canon on each device; normalize client-side only for older payloads
+function devCanon(d){ return d.canon || canonName(String(d.name)); }
 
-    filtered.forEach(d => {
-      const name = String(d.name);
-      const cn = canonName(name);
-      const vol = isFinite(parseInt(d.volume)) ? Math.max(0, Math.min(100, parseInt(d.volume))) : 0;
-      const checked = selected.has(name) ? 'checked' : '';
-      const onClass = d.active ? 'status-on' : 'status-off';
-      const onTitle = d.active ? 'On' : 'Off';
-      const nameAttr = attrQuote(name);
-      const nameText = escHtml(name);
-      const row = document.createElement('div'); row.className='dev';
-      row.innerHTML = `
-        <div class='left'>
-          <span class='status-dot ${onClass}' id='st-${cssId(name)}' title='${onTitle}'></span>
-          <input type='checkbox' ${checked} data-name="${nameAttr}">
-          <div class='name'>${nameText}</div>
-        </div>
-        <div style='flex:1;display:flex;align-items:center;gap:10px'>
-          <input type='range' min='0' max='100' step='1' value='${vol}' data-vol='${nameAttr}' style='width:100%'>
-          <span class='chip' id='v-${cssId(name)}'>${vol}%</span>
-        </div>`;
-      devBox.appendChild(row);
-      const cb = row.querySelector('input[type=checkbox]');
-      const sl = row.querySelector('input[type=range]');
-      cb.addEventListener('change', (e)=>{
-        const n = unescHtml(e.target.getAttribute('data-name')); // RAW name
-        if(e.target.checked) selected.add(n); else selected.delete(n);
-      });
-      sl.addEventListener('input', (e)=>{
-        const n = unescHtml(e.target.getAttribute('data-vol')); // RAW name
-        const v = parseInt(e.target.value)||0;
-        document.getElementById('v-'+cssId(n)).textContent = v+'%';
-        debounceDevice(n, v);
-      });
-      sl.addEventListener('pointerdown', ()=>{ dragging.add(name); });
-      sl.addEventListener('pointerup',   ()=>{ dragging.delete(name); });
-      sl.addEventListener('pointercancel',()=>{ dragging.delete(name); });
-    });
-    syncCheckboxesToSelected();
-  }catch(e){ console.warn('devices', e); }
+function renderDevices(full){
+  const showDisabled = $('#showDisabled').checked;
+  // Filter devices based on showDisabled setting
+  // Server already orders active first, then by name (case-insensitive)
+  const filtered = showDisabled ? full : full.filter(d => d.active);
+  devBox.innerHTML = '';
+
+  // Seed selection on first render from active devices
+  if (selected.size === 0) {
+    full.filter(d => d.active).forEach(d => selected.add(String(d.name)));
+  }
+
+  filtered.forEach(d => {
+    const name = String(d.name);
+    const vol = isFinite(parseInt(d.volume)) ? Math.max(0, Math.min(100, parseInt(d.volume))) : 0;
+    const checked = selected.has(name) ? 'checked' : '';
+    const onClass = d.active ? 'status-on' : 'status-off';
+    const onTitle = d.active ? 'On' : 'Off';
+    const nameAttr = attrQuote(name);
+    const nameText = escHtml(name);
+    const row = document.createElement('div'); row.className='dev';
+    row.innerHTML = `
+      <div class='left'>
+        <span class='status-dot ${onClass}' id='st-${cssId(name)}' title='${onTitle}'></span>
+        <input type='checkbox' ${checked} data-name="${nameAttr}">
+        <div class='name'>${nameText}</div>
+      </div>
+      <div class='right'>
+        <input type='range' min='0' max='100' step='1' value='${vol}' data-vol='${nameAttr}'>
+        <span class='chip' id='v-${cssId(name)}'>${vol}%</span>
+      </div>`;
+    row._state = {active: !!d.active, vol};
+    row.dataset.canon = devCanon(d);
+    devBox.appendChild(row);
+  });
+  syncCheckboxesToSelected();
+}
+
+// Device row events are delegated to #devs so re-renders allocate no handlers
+devBox.addEventListener('change', (e)=>{
+  const t = e.target;
+  if (t.matches('input[type=checkbox][data-name]')){
+    const n = unescHtml(t.getAttribute('data-name')); // RAW name
+    if(t.checked) selected.add(n); else selected.delete(n);
+  } else if (t.matches('input[type=range][data-vol]')){
+    volQueue.set(unescHtml(t.getAttribute('data-vol')), parseInt(t.value)||0);
+    queueVolFlush.flush();
+  }
+});
+devBox.addEventListener('input', (e)=>{
+  const t = e.target;
+  if (!t.matches('input[type=range][data-vol]')) return;
+  const n = unescHtml(t.getAttribute('data-vol')); // RAW name
+  const v = parseInt(t.value)||0;
+  document.getElementById('v-'+cssId(n)).textContent = v+'%';
+  const row = t.closest('.dev');
+  if (row && row._state) row._state.vol = v;
+  volQueue.set(n, v);
+  queueVolFlush();
+});
+function _devDrag(on){
+  return (e)=>{
+    const t = e.target;
+    if (!t.matches || !t.matches('input[type=range][data-vol]')) return;
+    const n = unescHtml(t.getAttribute('data-vol'));
+    if (on) dragging.add(n); else dragging.delete(n);
+  };
 }
+devBox.addEventListener('pointerdown',   _devDrag(true));
+devBox.addEventListener('pointerup',     _devDrag(false));
+devBox.addEventListener('pointercancel', _devDrag(false));
 
+let lastDevicesLive = null;
 async function loadDevicesLive(){
+  // Just applied: applyDevicesImmediate() is about to re-render, so skip this poll
+  if (Date.now() < pendingApplyUntil) return;
   try{
-    const full = await (await fetch('/airplay_full')).json(); // [{name, volume, active}]
-    // Sort active first, then by name (case-insensitive) to match initial render
-    full.sort((a, b) => {
-      const ax = a && a.active ? 0 : 1;
-      const bx = b && b.active ? 0 : 1;
-      if (ax !== bx) return ax - bx;
-      return String(a.name).localeCompare(String(b.name), undefined, { sensitivity: 'base' });
-    });
-    const namesCanon = full.map(d => canonName(String(d.name)));
-
-    const rows = Array.from(devBox.querySelectorAll('.dev'));
-    const rendered = rows.map(r=> r.querySelector('input[type=checkbox]').getAttribute('data-name'));
-    const renderedCanon = rendered.map(n => canonName(unescHtml(n)));
-    const same = (renderedCanon.length === namesCanon.length) && renderedCanon.every(n => namesCanon.includes(n));
-    if(!same){ return loadDevices(); }
-
-    rows.forEach(row => {
-      const cb = row.querySelector('input[type=checkbox]');
-      const sl = row.querySelector('input[type=range]');
-      const nameAttr = cb.getAttribute('data-name');
-      const rawName = unescHtml(nameAttr);
-      const cn = canonName(rawName);
-      const info = full.find(d => canonName(String(d.name)) === cn);
-      if(!info) return;
-
-      // Checkbox reflects pending selection, not live active set
-      const shouldBeChecked = selected.has(rawName);
-      if(cb.checked !== shouldBeChecked){
-        cb.checked = shouldBeChecked;
-      }
+    const full = await cachedFetch('/airplay_full'); // [{name, volume, active}]
+    // A 304 hands back the very same cached array
+    if (full === lastDevicesLive) return false;
+    lastDevicesLive = full;
+    applyDevicesLive(full);
+  }catch(e){ console.warn('devicesLive', e); }
+}
 
-      // Status dot reflects live active state
-      const dot = row.querySelector('.status-dot');
-      if (dot){
-        const on = !!info.active;
-        dot.classList.toggle('status-on', on);
-        dot.classList.toggle('status-off', !on);
+function applyDevicesLive(full){
+  // Same server-side order as the initial render, so no client sort
+  // Compare against the same filtered set renderDevices() shows
+  const shown = $('#showDisabled').checked ? full : full.filter(d => d.active);
+  const byCanon = new Map();
+  for (const d of shown) byCanon.set(devCanon(d), d);
+
+  const rows = Array.from(devBox.querySelectorAll('.dev'));
+  const renderedCanon = rows.map(r => r.dataset.canon);
+  const same = (renderedCanon.length === byCanon.size) && renderedCanon.every(n => byCanon.has(n));
+  if(!same){ return renderDevices(full); }
+
+  // Diff against each row's last-written state; apply only the changes in one frame
+  const writes = [];
+  rows.forEach(row => {
+    const cb = row.querySelector('input[type=checkbox]');
+    const sl = row.querySelector('input[type=range]');
+    const nameAttr = cb.getAttribute('data-name');
+    const rawName = unescHtml(nameAttr);
+    const info = byCanon.get(row.dataset.canon);
+    if(!info) return;
+    const st = row._state || (row._state = {});
+
+    // Checkbox reflects pending selection, not live active set
+    const shouldBeChecked = selected.has(rawName);
+    if(cb.checked !== shouldBeChecked){
+      writes.push(()=>{ cb.checked = shouldBeChecked; });
+    }
+
+    // Status dot reflects live active state
+    const dot = row.querySelector('.status-dot');
+    const on = !!info.active;
+    if (dot && st.active !== on){
+      st.active = on;
+      writes.push(()=>{
+        dot.className = 'status-dot ' + (on ? 'status-on' : 'status-off');
         dot.title = on ? 'On' : 'Off';
-      }
+      });
+    }
 
-      // Volume live update unless user is dragging
-      if(!dragging.has(rawName)){
-        const vol = isFinite(parseInt(info.volume)) ? Math.max(0, Math.min(100, parseInt(info.volume))) : 0;
-        sl.value = vol;
-        const chip = document.getElementById('v-'+cssId(rawName));
-        if(chip) chip.textContent = vol + '%';
+    // Volume live update unless user is dragging
+    if(!dragging.has(rawName)){
+      const vol = isFinite(parseInt(info.volume)) ? Math.max(0, Math.min(100, parseInt(info.volume))) : 0;
+      if (st.vol !== vol){
+        st.vol = vol;
+        writes.push(()=>{
+          sl.value = vol;
+          const chip = document.getElementById('v-'+cssId(rawName));
+          if(chip) chip.textContent = vol + '%';
+        });
       }
-    });
-  }catch(e){ console.warn('devicesLive', e); }
+    }
+  });
+  if (writes.length) requestAnimationFrame(()=>{ for (const w of writes) w(); });
 }
 
-const devTimers = new Map();
-function debounceDevice(name, v){
-  if(devTimers.has(name)) clearTimeout(devTimers.get(name));
-  devTimers.set(name, setTimeout(()=>setDeviceVolume(name,v), 150));
-}
-async function setDeviceVolume(name, level){
-  try{ await call('/set_device_volume','POST',{device:name, level:level}); }
-  catch(e){ console.warn('dev vol', name, e); }
+// Per-device slider changes are queued and sent as one /set_device_volumes batch
+const volQueue = new Map(); // name -> latest slider value
+async function flushVol(){
+  if (volQueue.size === 0) return;
+  const levels = Object.fromEntries(volQueue);
+  volQueue.clear();
+  try{ await call('/set_device_volumes','POST',{levels}); }
+  catch(e){ console.warn('dev vols', levels, e); }
+  pollKick();
 }
+const queueVolFlush = rafThrottle(flushVol);
 
 function applyDevicesImmediate(){
   const payload = {devices: Array.from(selected).join(',')};
   return call('/set_devices','POST',payload)
     .then(async (res)=>{
+      // Start the ground-truth read right away; it doesn't depend on res
+      const curP = fetch('/current_devices').then(r => r.json());
       const attempted = Array.from(selected);
       // Use server-reported applied list when present
       if(res && Array.isArray(res.applied)){
@@ -1219,7 +2322,7 @@ function applyDevicesImmediate(){
       }
       // Then verify against Music's current devices as ground truth
       try {
-        const cur = await (await fetch('/current_devices')).json();
+        const cur = await curP;
         if (Array.isArray(cur)) {
           selected = new Set(cur.map(String));
         }
@@ -1259,7 +2362,7 @@ async function toggleShuffle(){
   try{
     const r = await call('/shuffle','POST',{enabled: !$('#btn_shuffle').classList.contains('btn-primary')});
     if(r.ok){
-      $('#btn_shuffle').classList.toggle('btn-primary', r.enabled);
+      applyShuffle(!!r.enabled);
       showToast(`Shuffle ${r.enabled ? 'on' : 'off'}`, true);
     }
   }catch(e){ console.warn('toggle shuffle', e); showToast('Failed to toggle shuffle', false); }
@@ -1287,7 +2390,11 @@ async function toggleRepeat(){
   }catch(e){ console.warn('toggle repeat', e); showToast('Failed to toggle repeat', false); }
 }
 
+let shownRepeat = null;
 function updateRepeatButton(mode){
+  // Rebuilding the indicator is the costly part; skip when the mode is unchanged
+  if (mode === shownRepeat) return;
+  shownRepeat = mode;
   const btn = $('#btn_repeat');
   // Remove any existing indicator text
   const existingText = btn.querySelector('.repeat-indicator');
@@ -1308,91 +2415,104 @@ function updateRepeatButton(mode){
   }
 }
 
+// Search results by type, in display order
+const SEARCH_TYPES = [['albums', 'album'], ['artists', 'artist'], ['playlists', 'playlist'], ['songs', 'song']];
+let searchSeq = 0;
+function searchItems(r){
+  const results = [];
+  for (const [key, type] of SEARCH_TYPES){
+    (Array.isArray(r[key]) ? r[key] : []).forEach(name => results.push({name, type}));
+  }
+  return results;
+}
+
 async function performSearch(){
   const query = $('#searchInput').value.trim();
   if(!query) return;
+  const seq = ++searchSeq;
   try{
     const r = await (await fetch(`/search?q=${encodeURIComponent(query)}`)).json();
-    const results = [];
-    r.albums.forEach(name => results.push({name, type: 'album'}));
-    r.artists.forEach(name => results.push({name, type: 'artist'}));
-    r.playlists.forEach(name => results.push({name, type: 'playlist'}));
-    r.songs.forEach(name => results.push({name, type: 'song'}));
+    if (seq !== searchSeq) return; // superseded by a newer search
+    const results = searchItems(r);
     displayBrowseResults(results, 'search');
     showToast(`Found ${results.length} results`, true);
   }catch(e){ console.warn('search', e); showToast('Search failed', false); }
 }
 
 let currentBrowseTab = 'albums';
-let currentPage = 1;
-let itemsPerPage = 5;
 let currentLetter = '';
 let allItems = [];
-let totalPages = 1;
 let currentLetterPage = 1;
 let lettersPerPage = 10;
+let lettersIndex = new Map(); // first letter -> items, rebuilt once per library load
+
+function buildLettersIndex(){
+  lettersIndex = new Map();
+  for (const it of allItems){
+    const L = it.name.charAt(0).toUpperCase();
+    let b = lettersIndex.get(L);
+    if (!b){ b = []; lettersIndex.set(L, b); }
+    b.push(it);
+  }
+}
+
+function itemsForLetter(letter){
+  return letter ? (lettersIndex.get(letter) || []) : allItems;
+}
 
+const BROWSE_TYPES = {albums: 'album', artists: 'artist', playlists: 'playlist'};
 async function loadBrowseTab(tab){
   try{
     currentBrowseTab = tab;
-    currentPage = 1;
     currentLetter = '';
-    let data = [];
-    if(tab === 'albums'){
-      const response = await fetch('/albums');
-      if (!response.ok) {
-        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
-      }
-      data = await response.json();
-      allItems = data.map(name => ({name, type: 'album'}));
-    }else if(tab === 'artists'){
-      const response = await fetch('/artists');
-      if (!response.ok) {
-        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
-      }
-      data = await response.json();
-      allItems = data.map(name => ({name, type: 'artist'}));
-    }else if(tab === 'playlists'){
-      const response = await fetch('/playlists');
-      if (!response.ok) {
-        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
-      }
-      data = await response.json();
-      allItems = data.map(name => ({name, type: 'playlist'}));
-    }
+    const type = BROWSE_TYPES[tab];
+    if (!type) return;
+    // Paint the first streamed rows right away; the full list renders once the stream ends
+    let painted = false;
+    let data = await streamList(`/${tab}?stream=1`, names => {
+      if (painted || currentBrowseTab !== tab) return;
+      painted = true;
+      displayBrowseResults(names.map(name => ({name, type})), tab);
+    });
+    if (currentBrowseTab !== tab) return;
+    if (!Array.isArray(data)) data = [];
+    allItems = data.map(name => ({name, type}));
+    buildLettersIndex();
     updateLetterNavigation();
     displayBrowseResults(allItems, tab);
-    const count = Array.isArray(data) ? data.length : 0;
-    showToast(`Loaded ${count} ${tab}`, true);
+    showToast(`Loaded ${data.length} ${tab}`, true);
   }catch(e){ console.warn('load browse tab', e); showToast(`Failed to load ${tab}: ${e.message}`, false); }
 }
 
 function updateLetterNavigation(){
   const letterNav = $('#letterNav');
-  const letters = new Set();
-  allItems.forEach(item => {
-    const firstLetter = item.name.charAt(0).toUpperCase();
-    if(firstLetter.match(/[A-Z0-9]/)) letters.add(firstLetter);
-  });
-  const sortedLetters = Array.from(letters).sort();
+  const sortedLetters = Array.from(lettersIndex.keys()).filter(L => /[A-Z0-9]/.test(L)).sort();
   const allLetters = ['All', ...sortedLetters];
   const totalPages = Math.ceil(allLetters.length / lettersPerPage);
   const startIndex = (currentLetterPage - 1) * lettersPerPage;
   const endIndex = startIndex + lettersPerPage;
   const pageLetters = allLetters.slice(startIndex, endIndex);
 
-  let html = pageLetters.map(letter => `<button class="btn" onclick="filterByLetter('${letter === 'All' ? '' : letter}')">${letter}</button>`).join('');
+  let html = pageLetters.map(letter => `<button class="btn" data-letter="${letter === 'All' ? '' : letter}">${letter}</button>`).join('');
 
   // Add navigation buttons on a separate row if there are multiple pages
   if (totalPages > 1) {
     const prevDisabled = currentLetterPage === 1 ? 'disabled' : '';
     const nextDisabled = currentLetterPage === totalPages ? 'disabled' : '';
-    html += `<div style="margin-top:8px;display:flex;gap:8px;justify-content:center"><button class="btn" onclick="changeLetterPage(${currentLetterPage - 1})" ${prevDisabled}>‹ Prev</button><button class="btn" onclick="changeLetterPage(${currentLetterPage + 1})" ${nextDisabled}>Next ›</button></div>`;
+    html += `<div style="margin-top:8px;display:flex;gap:8px;justify-content:center"><button class="btn" data-page="${currentLetterPage - 1}" ${prevDisabled}>‹ Prev</button><button class="btn" data-page="${currentLetterPage + 1}" ${nextDisabled}>Next ›</button></div>`;
   }
 
   letterNav.innerHTML = html;
 }
 
+// Letter and page buttons are rebuilt on every tab load; one delegated listener serves them all
+$('#letterNav').addEventListener('click', (e)=>{
+  const b = e.target.closest('button');
+  if (!b) return;
+  if ('letter' in b.dataset) filterByLetter(b.dataset.letter);
+  else if (b.dataset.page) changeLetterPage(Number(b.dataset.page));
+});
+
 function changeLetterPage(page){
   currentLetterPage = page;
   updateLetterNavigation();
@@ -1400,67 +2520,124 @@ function changeLetterPage(page){
 
 function filterByLetter(letter){
   currentLetter = letter;
-  currentPage = 1;
-  const filtered = letter ? allItems.filter(item => item.name.charAt(0).toUpperCase() === letter) : allItems;
+  const filtered = itemsForLetter(letter);
   displayBrowseResults(filtered, currentBrowseTab);
 }
 
-function displayBrowseResults(items, type){
-  const container = $('#browseResults');
-  const pagination = $('#pagination');
-  totalPages = Math.ceil(items.length / itemsPerPage);
-  const startIndex = (currentPage - 1) * itemsPerPage;
-  const endIndex = startIndex + itemsPerPage;
-  const pageItems = items.slice(startIndex, endIndex);
-
-  container.innerHTML = '';
-  pageItems.forEach(item => {
-    const div = document.createElement('div');
-    div.className = 'dev';
-    div.innerHTML = `
-      <div class='left'>
-        <div class='name'>${escHtml(item.name)}</div>
-      </div>
-      <div style='flex:1;display:flex;align-items:center;gap:10px'>
-        <span class='chip'>${item.type}</span>
-        <button class="btn" onclick="action(this, () => playItem('${item.type}', '${attrQuote(item.name)}'))">Play</button>
-        ${item.type === 'album' || item.type === 'artist' || item.type === 'playlist' ?
-          `<button class="btn" onclick="action(this, () => shuffleItem('${item.type}', '${attrQuote(item.name)}'))">Shuffle</button>` : ''}
-        ${item.type === 'album' || item.type === 'artist' || item.type === 'playlist' ?
-          `<button class="btn" onclick="action(this, () => browseItem('${item.type}', '${attrQuote(item.name)}'))">Browse</button>` : ''}
-      </div>`;
-    container.appendChild(div);
-  });
+// Browse rows are cloned from #browseRowTpl; names go in via textContent, never HTML
+const BROWSE_ACTS = {play: playItem, shuffle: shuffleItem, browse: browseItem, back: () => loadBrowseTab(currentBrowseTab)};
+function browseRow(){
+  return $('#browseRowTpl').content.firstElementChild.cloneNode(true);
+}
 
-  // Update pagination
-  const pageInput = $('#pageInput');
-  const totalPagesSpan = $('#totalPages');
-  const prevBtn = $('#prevBtn');
-  const nextBtn = $('#nextBtn');
-  if(pageInput) pageInput.value = currentPage;
-  if(totalPagesSpan) totalPagesSpan.textContent = totalPages;
-  if(prevBtn) prevBtn.disabled = currentPage === 1;
-  if(nextBtn) nextBtn.disabled = currentPage === totalPages;
+function fillRow(row, item){
+  row.dataset.type = item.type;
+  row.dataset.name = item.name;
+  row.querySelector('.name').textContent = item.name;
+  row.querySelector('.chip').textContent = item.type;
+  const isCollection = item.type === 'album' || item.type === 'artist' || item.type === 'playlist';
+  row.querySelectorAll('button[data-act]:not([data-act=play])').forEach(b => { b.hidden = !isCollection; });
 }
 
-async function browseItem(type, name){
-  try{
-    if(type === 'artist'){
-      await browseArtist(name);
-    }else if(type === 'album'){
-      await browseAlbum(name);
+// One delegated click handler serves every browse row button
+$('#browseResults').addEventListener('click', (e)=>{
+  const b = e.target.closest('button[data-act]');
+  const row = b && b.closest('[data-type]');
+  if (!row || !BROWSE_ACTS[b.dataset.act]) return;
+  const {type, name} = row.dataset;
+  action(b, () => BROWSE_ACTS[b.dataset.act](type, name));
+});
+
+// Windowed list: only the rows inside the viewport exist, recycled from a fixed pool on scroll
+const ROW_H = 72, VLIST_H = 400;
+// Returns a handle whose setItems() swaps in a longer/new list (e.g. while it streams in)
+function renderVirtualList(container, items, viewH=VLIST_H){
+  const view = document.createElement('div');
+  view.className = 'vlist';
+  const spacer = document.createElement('div');
+  view.appendChild(spacer);
+
+  const pool = [];
+  const maxPool = Math.ceil(viewH / ROW_H) + 5;
+  let queued = false;
+  function renderWindow(){
+    queued = false;
+    while (pool.length < Math.min(items.length, maxPool)){
+      const row = browseRow();
+      row._idx = -1;
+      pool.push(row);
+      view.appendChild(row);
+    }
+    const poolSize = pool.length;
+    if (!poolSize) return;
+    const start = Math.max(0, Math.floor(view.scrollTop / ROW_H) - 2);
+    const end = Math.min(items.length, start + poolSize);
+    for (let idx = start; idx < end; idx++){
+      const row = pool[idx % poolSize];
+      if (row._idx !== idx){
+        fillRow(row, items[idx]);
+        row._idx = idx;
+        row.style.transform = `translateY(${idx * ROW_H}px)`;
+      }
+      row.style.display = '';
+    }
+    const shown = end - start;
+    for (let i = shown; i < poolSize; i++) pool[(start + i) % poolSize].style.display = 'none';
+  }
+  function setItems(next){
+    items = next;
+    view.style.height = Math.min(viewH, items.length * ROW_H) + 'px';
+    spacer.style.height = (items.length * ROW_H) + 'px';
+    for (const row of pool) row._idx = -1;
+    renderWindow();
+  }
+  view.addEventListener('scroll', ()=>{
+    if (queued) return;
+    queued = true;
+    requestAnimationFrame(renderWindow);
+  }, {passive: true});
+
+  container.replaceChildren(view);
+  setItems(items);
+  return {setItems};
+}
+
+function displayBrowseResults(items, type){
+  renderVirtualList($('#browseResults'), items);
+}
+
+// Drill-down pages: a header (back / play / shuffle for the collection) plus titled windowed lists
+function browseHead(type, name, what){
+  const head = $('#browseHeadTpl').content.firstElementChild.cloneNode(true);
+  head.dataset.type = type;
+  head.dataset.name = name;
+  head.querySelector('h3').textContent = name;
+  head.querySelector('[data-act=play]').textContent = 'Play ' + what;
+  head.querySelector('[data-act=shuffle]').textContent = 'Shuffle ' + what;
+  return head;
+}
+// sec._set(items) refills the list and the "Title (N)" heading as results stream in
+function browseSection(title, items, viewH){
+  const sec = $('#browseSectionTpl').content.firstElementChild.cloneNode(true);
+  const h4 = sec.querySelector('h4');
+  const list = renderVirtualList(sec.lastElementChild, items, viewH);
+  sec._set = next => { h4.textContent = `${title} (${next.length})`; list.setItems(next); };
+  sec._set(items);
+  return sec;
+}
+
+async function browseItem(type, name){
+  try{
+    if(type === 'artist'){
+      await browseArtist(name);
+    }else if(type === 'album'){
+      await browseAlbum(name);
     }else if(type === 'playlist'){
       await browsePlaylist(name);
     }
   }catch(e){ console.warn('browse item', e); showToast('Failed to browse item', false); }
 }
 
-function changePage(page){
-  currentPage = page;
-  const filtered = currentLetter ? allItems.filter(item => item.name.charAt(0).toUpperCase() === currentLetter) : allItems;
-  displayBrowseResults(filtered, currentBrowseTab);
-}
-
 async function shuffleItem(type, name){
   try{
     const r = await call('/play', 'POST', {type, name, shuffle: true});
@@ -1489,129 +2666,39 @@ async function playItem(type, name){
 
 async function browseArtist(artistName){
   try{
-    const albums = await (await fetch(`/albums_by_artist/${encodeURIComponent(artistName)}`)).json();
-    const songs = await (await fetch(`/songs_by_artist/${encodeURIComponent(artistName)}`)).json();
-    const container = $('#browseResults');
-    container.innerHTML = `
-      <div style="margin-bottom:16px;padding:12px;border:1px solid var(--border);border-radius:8px;background:#0f1520">
-        <div style="display:flex;gap:8px;align-items:center;margin-bottom:8px">
-          <button class="btn" onclick="action(this, () => loadBrowseTab(currentBrowseTab))">← Back</button>
-          <h3 style="margin:0;color:var(--text)">${escHtml(artistName)}</h3>
-        </div>
-        <div style="display:flex;gap:8px">
-          <button class="btn" onclick="action(this, () => playItem('artist', '${attrQuote(artistName)}'))">Play All</button>
-          <button class="btn" onclick="action(this, () => shuffleItem('artist', '${attrQuote(artistName)}'))">Shuffle All</button>
-        </div>
-      </div>
-      <div style="margin-bottom:16px">
-        <h4 style="margin:0 0 8px;color:var(--text)">Albums (${albums.length})</h4>
-        <div class="devs" style="max-height:200px">
-          ${albums.map(album => `
-            <div class="dev">
-              <div class='left'>
-                <div class='name'>${escHtml(album)}</div>
-              </div>
-              <div style='flex:1;display:flex;align-items:center;gap:10px'>
-                <span class='chip'>album</span>
-                <button class="btn" onclick="action(this, () => playItem('album', '${attrQuote(album)}'))">Play</button>
-                <button class="btn" onclick="action(this, () => shuffleItem('album', '${attrQuote(album)}'))">Shuffle</button>
-                <button class="btn" onclick="action(this, () => browseItem('album', '${attrQuote(album)}'))">Browse</button>
-              </div>
-            </div>
-          `).join('')}
-        </div>
-      </div>
-      <div>
-        <h4 style="margin:0 0 8px;color:var(--text)">Songs (${songs.length})</h4>
-        <div class="devs" style="max-height:200px">
-          ${songs.slice(0, 10).map(song => `
-            <div class="dev">
-              <div class='left'>
-                <div class='name'>${escHtml(song)}</div>
-              </div>
-              <div style='flex:1;display:flex;align-items:center;gap:10px'>
-                <span class='chip'>song</span>
-                <button class="btn" onclick="action(this, () => playItem('song', '${attrQuote(song)}'))">Play</button>
-              </div>
-            </div>
-          `).join('')}
-          ${songs.length > 10 ? `<div style="text-align:center;padding:8px;color:var(--muted)">... and ${songs.length - 10} more songs</div>` : ''}
-        </div>
-      </div>
-    `;
+    const albumSec = browseSection('Albums', [], 200);
+    const songSec = browseSection('Songs', [], 200);
+    $('#browseResults').replaceChildren(browseHead('artist', artistName, 'All'), albumSec, songSec);
+    const asAlbums = names => albumSec._set(names.map(name => ({name, type: 'album'})));
+    const asSongs = names => songSec._set(names.map(name => ({name, type: 'song'})));
+    const [albums, songs] = await Promise.all([
+      browseFetch(`/albums_by_artist/${encodeURIComponent(artistName)}?stream=1`, asAlbums),
+      browseFetch(`/songs_by_artist/${encodeURIComponent(artistName)}?stream=1`, asSongs),
+    ]);
+    asAlbums(albums);
+    asSongs(songs);
     showToast(`Loaded ${albums.length} albums, ${songs.length} songs`, true);
   }catch(e){ console.warn('browse artist', e); showToast('Failed to load artist details', false); }
 }
 
 async function browseAlbum(albumName){
   try{
-    const songs = await (await fetch(`/songs_by_album/${encodeURIComponent(albumName)}`)).json();
-    const container = $('#browseResults');
-    container.innerHTML = `
-      <div style="margin-bottom:16px;padding:12px;border:1px solid var(--border);border-radius:8px;background:#0f1520">
-        <div style="display:flex;gap:8px;align-items:center;margin-bottom:8px">
-          <button class="btn" onclick="action(this, () => loadBrowseTab(currentBrowseTab))">← Back</button>
-          <h3 style="margin:0;color:var(--text)">${escHtml(albumName)}</h3>
-        </div>
-        <div style="display:flex;gap:8px">
-          <button class="btn" onclick="action(this, () => playItem('album', '${attrQuote(albumName)}'))">Play Album</button>
-          <button class="btn" onclick="action(this, () => shuffleItem('album', '${attrQuote(albumName)}'))">Shuffle Album</button>
-        </div>
-      </div>
-      <div>
-        <h4 style="margin:0 0 8px;color:var(--text)">Tracks (${songs.length})</h4>
-        <div class="devs" style="max-height:300px">
-          ${songs.map(song => `
-            <div class="dev">
-              <div class='left'>
-                <div class='name'>${escHtml(song)}</div>
-              </div>
-              <div style='flex:1;display:flex;align-items:center;gap:10px'>
-                <span class='chip'>song</span>
-                <button class="btn" onclick="action(this, () => playItem('song', '${attrQuote(song)}'))">Play</button>
-              </div>
-            </div>
-          `).join('')}
-        </div>
-      </div>
-    `;
+    const sec = browseSection('Tracks', [], 300);
+    $('#browseResults').replaceChildren(browseHead('album', albumName, 'Album'), sec);
+    const asSongs = names => sec._set(names.map(name => ({name, type: 'song'})));
+    const songs = await browseFetch(`/songs_by_album/${encodeURIComponent(albumName)}?stream=1`, asSongs);
+    asSongs(songs);
     showToast(`Loaded ${songs.length} tracks`, true);
   }catch(e){ console.warn('browse album', e); showToast('Failed to load album details', false); }
 }
 
 async function browsePlaylist(playlistName){
   try{
-    const songs = await (await fetch(`/songs/${encodeURIComponent(playlistName)}`)).json();
-    const container = $('#browseResults');
-    container.innerHTML = `
-      <div style="margin-bottom:16px;padding:12px;border:1px solid var(--border);border-radius:8px;background:#0f1520">
-        <div style="display:flex;gap:8px;align-items:center;margin-bottom:8px">
-          <button class="btn" onclick="action(this, () => loadBrowseTab(currentBrowseTab))">← Back</button>
-          <h3 style="margin:0;color:var(--text)">${escHtml(playlistName)}</h3>
-        </div>
-        <div style="display:flex;gap:8px">
-          <button class="btn" onclick="action(this, () => playItem('playlist', '${attrQuote(playlistName)}'))">Play Playlist</button>
-          <button class="btn" onclick="action(this, () => shuffleItem('playlist', '${attrQuote(playlistName)}'))">Shuffle Playlist</button>
-        </div>
-      </div>
-      <div>
-        <h4 style="margin:0 0 8px;color:var(--text)">Tracks (${songs.length})</h4>
-        <div class="devs" style="max-height:300px">
-          ${songs.slice(0, 20).map(song => `
-            <div class="dev">
-              <div class='left'>
-                <div class='name'>${escHtml(song)}</div>
-              </div>
-              <div style='flex:1;display:flex;align-items:center;gap:10px'>
-                <span class='chip'>song</span>
-                <button class="btn" onclick="action(this, () => playItem('song', '${attrQuote(song)}'))">Play</button>
-              </div>
-            </div>
-          `).join('')}
-          ${songs.length > 20 ? `<div style="text-align:center;padding:8px;color:var(--muted)">... and ${songs.length - 20} more songs</div>` : ''}
-        </div>
-      </div>
-    `;
+    const sec = browseSection('Tracks', [], 300);
+    $('#browseResults').replaceChildren(browseHead('playlist', playlistName, 'Playlist'), sec);
+    const asSongs = names => sec._set(names.map(name => ({name, type: 'song'})));
+    const songs = await streamList(`/songs/${encodeURIComponent(playlistName)}?stream=1`, asSongs);
+    asSongs(songs);
     showToast(`Loaded ${songs.length} tracks`, true);
   }catch(e){ console.warn('browse playlist', e); showToast('Failed to load playlist details', false); }
 }
@@ -1688,24 +2775,36 @@ async function saveSettings(){
   setTimeout(()=>{ location.href = targetUrl; }, 1200);
 }
 
-// initial load + polling
+// initial load + push updates
+connectEvents();
 loadSettings();
-loadNow(); loadMaster(); loadDevices();
-// intervals are created inside loadSettings()
+// With SSE the stream's opening snapshot paints now playing, master and devices
+if (!window.EventSource){ loadNow(); loadMaster(); loadDevices(); }
+// fallback polling intervals are managed inside loadSettings()/connectEvents()
 </script>
 </body></html>
         '''
-    )
+_UI_HTML_BYTES = _UI_HTML.encode('utf-8')
+_UI_HTML_ETAG = _content_tag(_UI_HTML_BYTES)
+
+
+@app.route("/ui")
+def web_ui():
+    """Serve a minimal, nice-looking control page for Apple Music & AirPlay."""
+    try:
+        _start_watchers_once()
+    except Exception:
+        pass
+    # no-cache still lets browsers revalidate to a 304, and a new release shows up on the next load
+    headers = {'ETag': _UI_HTML_ETAG, 'Cache-Control': 'no-cache'}
+    if request.if_none_match.contains(_UI_HTML_ETAG):
+        return Response(status=304, headers=headers)
+    return Response(_UI_HTML_BYTES, mimetype='text/html', headers=headers)
 # --- Settings endpoint ---
 
 @app.route('/airplay_full', methods=['GET'])
 def airplay_full():
-    statuses = _read_airplay_full()
-    volumes = _get_airplay_volumes()
-    for item in statuses:
-        name = item['name']
-        item['volume'] = volumes.get(name, None)
-    return jsonify(statuses)
+    return _jsonify_etag(_airplay_with_volumes())
 
 
 # ---- SSE endpoint ----
@@ -1716,18 +2815,25 @@ def sse_events():
 
     def _stream():
         q = _sse_subscribe()
-        # Initial snapshot
-        snap = _current_snapshot()
-        init = json.dumps({"event": "snapshot", "data": snap, "ts": int(time.time() * 1000)}, ensure_ascii=False)
-        yield f"data: {init}\n\n"
+        # Initial snapshot; reconnect storms share one build and encode
+        yield _snapshot_frame()
         try:
             while True:
-                msg = q.get()
-                yield f"data: {msg}\n\n"
+                try:
+                    msg = q.get(timeout=15)
+                except Empty:
+                    # Comment-line heartbeat: a write to a gone client fails and frees this thread
+                    yield b": ping\n\n"
+                    continue
+                if msg is None:
+                    # Evicted for falling behind; the browser reconnects and gets a fresh snapshot
+                    break
+                yield msg
         finally:
             _sse_unsubscribe(q)
 
-    return Response(_stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    return Response(_stream(), mimetype='text/event-stream', direct_passthrough=True,
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 # --- AirPlay debug endpoint ---
 @app.route('/airplay_debug', methods=['GET'])
@@ -1856,23 +2962,30 @@ def settings_endpoint():
     return jsonify({"ok": True, "restart": need_restart, "settings": out_settings})
 
 
-@app.route('/playlists', methods=['GET'])
-def get_playlists():
+def _load_playlists():
     script = '''
     tell application "Music"
         set playlist_names to name of every playlist
-        return playlist_names
+        set AppleScript's text item delimiters to linefeed
+        return playlist_names as text
     end tell
     '''
     result = run_applescript(script)
     app.logger.debug(f"/playlists result: {result}")
     if isinstance(result, dict):
-        return jsonify({'error': result.get('error', 'Unknown error in AppleScript')}), 500
-    playlists = result.split(', ') if result else []
-    return jsonify(playlists)
+        return result
+    return [name for name in (result.splitlines() if isinstance(result, str) and result else []) if name]
 
-@app.route('/albums', methods=['GET'])
-def get_albums():
+@app.route('/playlists', methods=['GET'])
+def get_playlists():
+    if request.args.get('refresh'):
+        _lib_invalidate('playlists')
+    playlists = _lib_cached('playlists', _load_playlists)
+    if isinstance(playlists, dict):
+        return jsonify({'error': playlists.get('error', 'Unknown error in AppleScript')}), 500
+    return _list_response(playlists)
+
+def _load_albums():
     script = '''
     tell application "Music"
         set album_names to album of every track of library playlist 1
@@ -1885,31 +2998,42 @@ def get_albums():
         app.logger.debug(f"/albums result: {result}")
     if isinstance(result, dict):
         app.logger.error(f"/albums AppleScript error: {result.get('error')}")
-        # Stay AppleScript-only but keep HA UI happy
-        return jsonify([])
+        return result
     albums = [name for name in (result.splitlines() if isinstance(result, str) and result else []) if name]
     # De-duplicate while preserving first occurrence, then sort case-insensitively
     albums = list(dict.fromkeys(albums))
     albums.sort(key=str.casefold)
-    return jsonify(albums)
+    return albums
+
+@app.route('/albums', methods=['GET'])
+def get_albums():
+    if request.args.get('refresh'):
+        _lib_invalidate('albums')
+    albums = _lib_cached('albums', _load_albums)
+    if isinstance(albums, dict):
+        # Stay AppleScript-only but keep HA UI happy
+        return jsonify([])
+    return _list_response(albums)
 
 @app.route('/songs/<playlist>', methods=['GET'])
 def get_songs(playlist):
-    script = f'''
-    tell application "Music"
-        set song_names to name of every track of playlist "{playlist}"
-        return song_names
-    end tell
+    script = '''
+    on run argv
+        tell application "Music"
+            set song_names to name of every track of playlist (item 1 of argv)
+            set AppleScript's text item delimiters to linefeed
+            return song_names as text
+        end tell
+    end run
     '''
-    result = run_applescript(script)
+    result = run_applescript(script, playlist)
     app.logger.debug(f"/songs result for {playlist}: {result}")
     if isinstance(result, dict):
         return jsonify({'error': result.get('error', 'Unknown error in AppleScript')}), 500
-    songs = result.split(', ') if result else []
-    return jsonify(songs)
+    songs = [name for name in (result.splitlines() if isinstance(result, str) and result else []) if name]
+    return _list_response(songs)
 
-@app.route('/artists', methods=['GET'])
-def get_artists():
+def _load_artists():
     script = '''
     tell application "Music"
         set artist_names to artist of every track of library playlist 1
@@ -1921,10 +3045,18 @@ def get_artists():
     if LIB_LIST_DEBUG:
         app.logger.debug(f"/artists result: {result}")
     if isinstance(result, dict):
-        return jsonify({'error': result.get('error', 'Unknown error in AppleScript')}), 500
+        return result
     # Deduplicate and sort alphabetically (case-insensitive)
-    artists = sorted({name for name in (result.splitlines() if isinstance(result, str) and result else []) if name}, key=str.casefold)
-    return jsonify(artists)
+    return sorted({name for name in (result.splitlines() if isinstance(result, str) and result else []) if name}, key=str.casefold)
+
+@app.route('/artists', methods=['GET'])
+def get_artists():
+    if request.args.get('refresh'):
+        _lib_invalidate('artists')
+    artists = _lib_cached('artists', _load_artists)
+    if isinstance(artists, dict):
+        return jsonify({'error': artists.get('error', 'Unknown error in AppleScript')}), 500
+    return _list_response(artists)
 
 
 @app.route('/search', methods=['GET'])
@@ -1936,8 +3068,7 @@ def search_endpoint():
       - types: comma-separated in {album, artist, playlist, song} (optional; default all)
         (also accepts singular 'type' for compatibility)
       - limit: maximum results per type (default 25, max 100)
-
-    Returns JSON like {"albums": [...], "artists": [...], "playlists": [...], "songs": [...]}.
+    All requested types are fetched in a single AppleScript. Returns JSON like {"albums": [...], "artists": [...], "playlists": [...], "songs": [...]}.
     """
     q = (request.args.get('q') or '').strip()
     if not q:
@@ -1956,8 +3087,6 @@ def search_endpoint():
     except Exception:
         limit = 25
 
-    safe = applescript_escape(q)
-
     def _dedupe_limit(items):
         seen = set()
         out = []
@@ -1969,80 +3098,53 @@ def search_endpoint():
                 break
         return out
 
-    def _run_list_script(script):
-        r = run_applescript(script)
-        if isinstance(r, dict):
-            app.logger.error(f"/search AppleScript error: {r.get('error')}")
-            return []
-        lines = [ln for ln in (r.splitlines() if isinstance(r, str) and r else []) if ln]
-        return _dedupe_limit(lines)
-
     result = {"albums": [], "artists": [], "playlists": [], "songs": []}
 
-    # Albums
-    if 'album' in allowed:
-        script = f'''
-        tell application "Music"
-            ignoring case
-                set xs to album of (every track of library playlist 1 whose album contains "{safe}")
-            end ignoring
-            set AppleScript's text item delimiters to linefeed
-            return xs as text
-        end tell
-        '''
-        try:
-            result["albums"] = _run_list_script(script)
-        except Exception as e:
-            app.logger.debug(f"/search albums fallback: {e}")
-
-    # Artists
-    if 'artist' in allowed:
-        script = f'''
-        tell application "Music"
-            ignoring case
-                set xs to artist of (every track of library playlist 1 whose artist contains "{safe}")
-            end ignoring
-            set AppleScript's text item delimiters to linefeed
-            return xs as text
-        end tell
-        '''
-        try:
-            # De-duplicate and limit; artists are often highly duplicated
-            result["artists"] = _run_list_script(script)
-        except Exception as e:
-            app.logger.debug(f"/search artists fallback: {e}")
-
-    # Playlists
-    if 'playlist' in allowed:
-        script = f'''
-        tell application "Music"
-            ignoring case
-                set xs to name of (every playlist whose name contains "{safe}")
-            end ignoring
-            set AppleScript's text item delimiters to linefeed
-            return xs as text
-        end tell
-        '''
-        try:
-            result["playlists"] = _run_list_script(script)
-        except Exception as e:
-            app.logger.debug(f"/search playlists fallback: {e}")
-
-    # Songs (tracks)
-    if 'song' in allowed:
-        script = f'''
+    # One AppleScript for every requested type; each requested section starts with a §<key>§
+    # label line, so sections are found by label (an empty one leaves just its label)
+    queries = {
+        "albums": ('album', 'album of (every track of library playlist 1 whose album contains q)'),
+        "artists": ('artist', 'artist of (every track of library playlist 1 whose artist contains q)'),
+        "playlists": ('playlist', 'name of (every playlist whose name contains q)'),
+        "songs": ('song', 'name of (every track of library playlist 1 whose name contains q)'),
+    }
+    sections = []
+    for key, (kind, expr) in queries.items():
+        if kind in allowed:
+            sections.append(f'''
+            set end of outParts to "§{key}§"
+            try
+                ignoring case
+                    set xs to {expr}
+                end ignoring
+                set end of outParts to (xs as text)
+            end try''')
+    # The term goes in via argv, so there are only as many script bodies as type combinations
+    script = f'''
+    on run argv
+        set q to item 1 of argv
         tell application "Music"
-            ignoring case
-                set xs to name of (every track of library playlist 1 whose name contains "{safe}")
-            end ignoring
+            set outParts to {{}}
             set AppleScript's text item delimiters to linefeed
-            return xs as text
+            {"".join(sections)}
+            return outParts as text
         end tell
-        '''
-        try:
-            result["songs"] = _run_list_script(script)
-        except Exception as e:
-            app.logger.debug(f"/search songs fallback: {e}")
+    end run
+    '''
+    r = run_applescript(script, q)
+    if isinstance(r, dict):
+        app.logger.error(f"/search AppleScript error: {r.get('error')}")
+    elif isinstance(r, str) and r:
+        chunks = {}
+        current = None
+        for ln in r.splitlines():
+            if ln.startswith("§") and ln.endswith("§") and ln[1:-1] in queries:
+                current = chunks.setdefault(ln[1:-1], [])
+            elif ln and current is not None:
+                current.append(ln)
+        # Artists are often highly duplicated; _dedupe_limit collapses them
+        for key, lines in chunks.items():
+            result[key] = _dedupe_limit(lines)
 
     # Optionally return a 'tracks' alias for compatibility
     result["tracks"] = list(result["songs"]) if result.get("songs") else []
@@ -2055,93 +3157,75 @@ def search_endpoint():
 
 @app.route('/songs_by_album/<album>', methods=['GET'])
 def get_songs_by_album(album):
-    safe = applescript_escape(album)
-    script = f'''
-    tell application "Music"
-        try
-            set track_list to every track of library playlist 1 whose album is "{safe}"
-        on error
-            set track_list to {{}}
-        end try
-        set song_names to {{}}
-        repeat with t in track_list
+    script = '''
+    on run argv
+        tell application "Music"
             try
-                set n to name of t
-                if n is not missing value and n is not "" then set end of song_names to n
+                set song_names to name of (every track of library playlist 1 whose album is (item 1 of argv))
+            on error
+                set song_names to {}
             end try
-        end repeat
-        set AppleScript's text item delimiters to linefeed
-        return song_names as text
-    end tell
+            set AppleScript's text item delimiters to linefeed
+            return song_names as text
+        end tell
+    end run
     '''
-    result = run_applescript(script)
+    result = run_applescript(script, album)
     app.logger.debug(f"/songs_by_album result for {album}: {result}, type: {type(result)}")
     if isinstance(result, dict) and 'error' in result:
         app.logger.error(f"Error fetching songs for album {album}: {result['error']}")
         return jsonify([])
-    # Preserve the album's track order; do not sort
+    # Preserve the album's track order; do not sort. Blank names are dropped here
     songs = [name for name in (result.splitlines() if isinstance(result, str) and result else []) if name]
-    return jsonify(songs)
+    return _list_response(songs)
 
 @app.route('/songs_by_artist/<artist>', methods=['GET'])
 def get_songs_by_artist(artist):
-    safe = applescript_escape(artist)
-    script = f'''
-    tell application "Music"
-        try
-            set track_list to every track of library playlist 1 whose artist is "{safe}"
-        on error
-            set track_list to {{}}
-        end try
-        set song_names to {{}}
-        repeat with t in track_list
+    script = '''
+    on run argv
+        tell application "Music"
             try
-                set n to name of t
-                if n is not missing value and n is not "" then set end of song_names to n
+                set song_names to name of (every track of library playlist 1 whose artist is (item 1 of argv))
+            on error
+                set song_names to {}
             end try
-        end repeat
-        set AppleScript's text item delimiters to linefeed
-        return song_names as text
-    end tell
+            set AppleScript's text item delimiters to linefeed
+            return song_names as text
+        end tell
+    end run
     '''
-    result = run_applescript(script)
+    result = run_applescript(script, artist)
     app.logger.debug(f"/songs_by_artist result for {artist}: {result}")
     if isinstance(result, dict) and 'error' in result:
         app.logger.error(f"/songs_by_artist AppleScript error for '{artist}': {result['error']}")
         return jsonify([])
     songs = [name for name in (result.splitlines() if isinstance(result, str) and result else []) if name]
-    return jsonify(songs)
+    return _list_response(songs)
 
 @app.route('/albums_by_artist/<artist>', methods=['GET'])
 def get_albums_by_artist(artist):
-    safe = applescript_escape(artist)
-    script = f'''
-    tell application "Music"
-        try
-            set track_list to every track of library playlist 1 whose artist is "{safe}"
-        on error
-            set track_list to {{}}
-        end try
-        set album_names to {{}}
-        repeat with t in track_list
+    script = '''
+    on run argv
+        tell application "Music"
             try
-                set a to album of t
-                if a is not missing value and a is not "" and album_names does not contain a then set end of album_names to a
+                set album_names to album of (every track of library playlist 1 whose artist is (item 1 of argv))
+            on error
+                set album_names to {}
             end try
-        end repeat
-        set AppleScript's text item delimiters to linefeed
-        set unsorted to album_names as text
-        set sortedText to do shell script "/usr/bin/printf '%s\\n' " & quoted form of unsorted & " | /usr/bin/sort -f"
-        return sortedText
-    end tell
+            set AppleScript's text item delimiters to linefeed
+            return album_names as text
+        end tell
+    end run
     '''
-    result = run_applescript(script)
+    result = run_applescript(script, artist)
     app.logger.debug(f"/albums_by_artist result for {artist}: {result}")
     if isinstance(result, dict) and 'error' in result:
         app.logger.error(f"/albums_by_artist AppleScript error for '{artist}': {result['error']}")
         return jsonify([])
-    albums = [name for name in (result.splitlines() if isinstance(result, str) and result else []) if name]
-    return jsonify(albums)
+    # De-duplicate while preserving first occurrence, then sort case-insensitively
+    albums = list(dict.fromkeys(name for name in (result.splitlines() if isinstance(result, str) and result else []) if name))
+    albums.sort(key=str.casefold)
+    return _list_response(albums)
 
 @app.route('/playlist_tracks/<path:playlist>', methods=['GET'])
 def get_playlist_tracks(playlist):
@@ -2172,8 +3256,9 @@ def play_music():
     elif not isinstance(devices, list):
         devices = []
 
-    # Escape device names for AppleScript safety
-    devices = [applescript_escape(dev) for dev in devices]
+    devices = [str(dev) for dev in devices]
+    # Every value goes in via argv (fixed items first, then the device names), so nothing from
+    # the request is pasted into a script and each body below is one of a few fixed variants
 
     # --- Disambiguated song play: honor album/artist or playlist+index if provided ---
     if music_type == 'song':
@@ -2185,121 +3270,116 @@ def play_music():
             index = int(index) if index is not None else None
         except Exception:
             index = None
-        safe_name = applescript_escape(name)
-        devices_script = ', '.join(f'AirPlay device "{dev}"' for dev in devices)
 
         # Case 1: playlist + index (play the Nth track of the named playlist)
         if playlist and index:
-            safe_pl = applescript_escape(playlist)
-            script = f'''
-            tell application "Music"
-                try
-                    {f'set current AirPlay devices to {{ {devices_script} }}' if devices else ''}
-                    set pl to (first playlist whose name is "{safe_pl}")
-                    set cnt to (count of tracks of pl)
-                    if {index} ≥ 1 and {index} ≤ cnt then
-                        play (track {index} of pl)
-                        return "OK"
-                    else
-                        return "ERROR: index out of range"
-                    end if
-                on error errm number errn
-                    return "ERROR:" & errn & ":" & errm
-                end try
-            end tell
-            '''
-            r = run_applescript(script)
+            script = """
+            on run argv
+                tell application "Music"
+                    try""" + _argv_devices_as(3) + """
+                        set plName to (item 1 of argv)
+                        set pl to (first playlist whose name is plName)
+                        set n to ((item 2 of argv) as integer)
+                        set cnt to (count of tracks of pl)
+                        if n ≥ 1 and n ≤ cnt then
+                            play (track n of pl)
+                            return "OK"
+                        else
+                            return "ERROR: index out of range"
+                        end if
+                    on error errm number errn
+                        return "ERROR:" & errn & ":" & errm
+                    end try
+                end tell
+            end run
+            """
+            r = run_applescript(script, playlist, index, *devices)
             if isinstance(r, dict) or (isinstance(r, str) and r.startswith('ERROR:')):
                 return jsonify({"error": str(r.get('error') if isinstance(r, dict) else r)}), 500
             return jsonify({"status": "playing", "result": r})
 
-        # Case 2: explicit album/artist qualifiers
+        # Case 2: explicit album/artist qualifiers (argv: name, album, artist, devices...)
         if album or artist:
-            safe_album = applescript_escape(album) if album else None
-            safe_artist = applescript_escape(artist) if artist else None
-            where_parts = [f'name is "{safe_name}"']
-            if safe_album:
-                where_parts.append(f'album is "{safe_album}"')
-            if safe_artist:
-                where_parts.append(f'artist is "{safe_artist}"')
+            where_parts = ['name is nm']
+            if album:
+                where_parts.append('album is albm')
+            if artist:
+                where_parts.append('artist is artst')
             where_txt = ' and '.join(where_parts)
-            script = f'''
-            tell application "Music"
-                try
-                    {f'set current AirPlay devices to {{ {devices_script} }}' if devices else ''}
-                    set xs to (every track of library playlist 1 whose {where_txt})
-                    if (count of xs) ≥ 1 then
-                        play (item 1 of xs)
-                        return "OK"
-                    else
-                        return "ERROR: no matching track"
-                    end if
-                on error errm number errn
-                    return "ERROR:" & errn & ":" & errm
-                end try
-            end tell
-            '''
-            r = run_applescript(script)
+            script = f"""
+            on run argv
+                tell application "Music"
+                    try{_argv_devices_as(4)}
+                        set nm to (item 1 of argv)
+                        set albm to (item 2 of argv)
+                        set artst to (item 3 of argv)
+                        set xs to (every track of library playlist 1 whose {where_txt})
+                        if (count of xs) ≥ 1 then
+                            play (item 1 of xs)
+                            return "OK"
+                        else
+                            return "ERROR: no matching track"
+                        end if
+                    on error errm number errn
+                        return "ERROR:" & errn & ":" & errm
+                    end try
+                end tell
+            end run
+            """
+            r = run_applescript(script, name, album or "", artist or "", *devices)
             if isinstance(r, dict) or (isinstance(r, str) and r.startswith('ERROR:')):
                 return jsonify({"error": str(r.get('error') if isinstance(r, dict) else r)}), 500
             return jsonify({"status": "playing", "result": r})
 
-    # Construct play command based on type (escaped)
-    safe_name = applescript_escape(name)
+    # Construct play command based on type (argv: name, shuffle, devices...)
     selection_block = ""
+    queue_block = (
+        'set theName to "Home Assistant"\n'
+        'if (exists user playlist theName) then delete user playlist theName\n'
+        'set q to make new user playlist with properties {name:theName}\n'
+        'repeat with t in theTracks\n'
+        '  try\n'
+        '    duplicate t to q\n'
+        '  end try\n'
+        'end repeat'
+    )
 
     if music_type == 'playlist':
-        selection_block = f'''
+        selection_block = """
         try
-            set thePlaylist to playlist "{safe_name}"
+            set thePlaylist to playlist nm
         end try
-        '''
+        """
         play_command = 'play thePlaylist'
     elif music_type == 'album':
-        selection_block = (
-            f'set theTracks to (every track of library playlist 1 whose album is "{safe_name}")\n'
-            f'set theName to "Home Assistant"\n'
-            f'if (exists user playlist theName) then delete user playlist theName\n'
-            f'set q to make new user playlist with properties {{name:theName}}\n'
-            f'repeat with t in theTracks\n'
-            f'  try\n'
-            f'    duplicate t to q\n'
-            f'  end try\n'
-            f'end repeat'
-        )
+        selection_block = 'set theTracks to (every track of library playlist 1 whose album is nm)\n' + queue_block
         play_command = 'play user playlist theName'
     elif music_type == 'song':
-        play_command = f'play (first track of library playlist 1 whose name is "{safe_name}")'
+        play_command = 'play (first track of library playlist 1 whose name is nm)'
     elif music_type == 'artist':
-        selection_block = (
-            f'set theTracks to (every track of library playlist 1 whose artist is "{safe_name}")\n'
-            f'set theName to "Home Assistant"\n'
-            f'if (exists user playlist theName) then delete user playlist theName\n'
-            f'set q to make new user playlist with properties {{name:theName}}\n'
-            f'repeat with t in theTracks\n'
-            f'  try\n'
-            f'    duplicate t to q\n'
-            f'  end try\n'
-            f'end repeat'
-        )
+        selection_block = 'set theTracks to (every track of library playlist 1 whose artist is nm)\n' + queue_block
         play_command = 'play user playlist theName'
     else:
         return jsonify({'error': 'Invalid type'}), 400
 
-    devices_script = ', '.join(f'AirPlay device "{dev}"' for dev in devices)
-    script = f'''
-    tell application "Music"
-        try
-            -- Only set devices when provided; otherwise keep current selection
-            {f'set current AirPlay devices to {{ {devices_script} }}' if devices else ''}
-            {selection_block}
-            set shuffle enabled to {str(shuffle).lower()}
-            {play_command}
-        end try
-    end tell
-    '''
-    result = run_applescript(script)
+    script = f"""
+    on run argv
+        set nm to (item 1 of argv)
+        tell application "Music"
+            try
+                -- Only set devices when provided; otherwise keep current selection{_argv_devices_as(3)}
+                {selection_block}
+                set shuffle enabled to ((item 2 of argv) is "true")
+                {play_command}
+            end try
+        end tell
+    end run
+    """
+    result = run_applescript(script, name, str(shuffle).lower(), *devices)
     app.logger.debug(f"/play result for {music_type} '{name}' on {devices}: {result}")
+    if music_type in ('album', 'artist'):
+        # (Re)created the "Home Assistant" user playlist
+        _lib_invalidate('playlists')
     if isinstance(result, dict) and 'error' in result:
         return jsonify({'error': result['error']}), 500
     return jsonify({'status': 'playing', 'result': result})
@@ -2311,12 +3391,18 @@ def set_volume():
     level = data.get('level')
     if not device or level is None:
         return jsonify({'error': 'Device and level required'}), 400
-    script = f'''
-    tell application "Music"
-        set sound volume of AirPlay device "{device}" to {level}
-    end tell
+    try:
+        level = max(0, min(100, int(float(level))))
+    except Exception:
+        return jsonify({'error': 'invalid level'}), 400
+    script = '''
+    on run argv
+        tell application "Music"
+            set sound volume of AirPlay device (item 1 of argv) to ((item 2 of argv) as integer)
+        end tell
+    end run
     '''
-    result = run_applescript(script)
+    result = run_applescript(script, device, level)
     app.logger.debug(f"/volume result: {result}")
     if isinstance(result, dict):
         return jsonify({'error': result.get('error', 'Unknown error in AppleScript')}), 500
@@ -2333,8 +3419,7 @@ def set_master_volume():
         vol_int = max(0, min(100, int(round(vol))))
     except Exception:
         return jsonify({'error': 'invalid volume'}), 400
-    script = f'tell application "Music" to set sound volume to {vol_int}'
-    result = run_applescript(script)
+    result = run_applescript(_SET_MASTER_VOLUME_SCRIPT, vol_int)
     app.logger.debug(f"/set_volume result: {result}")
     if isinstance(result, dict):
         return jsonify({'error': result.get('error', 'AppleScript error')}), 500
@@ -2342,8 +3427,7 @@ def set_master_volume():
 
 @app.route('/pause', methods=['POST'])
 def pause_music():
-    script = 'tell application "Music" to pause'
-    result = run_applescript(script)
+    result = run_applescript(_TRANSPORT_SCRIPTS['pause'])
     app.logger.debug(f"/pause result: {result}")
     if isinstance(result, dict):
         return jsonify({'error': result.get('error', 'Unknown error in AppleScript')}), 500
@@ -2351,8 +3435,7 @@ def pause_music():
 
 @app.route('/stop', methods=['POST'])
 def stop_music():
-    script = 'tell application "Music" to stop'
-    result = run_applescript(script)
+    result = run_applescript(_TRANSPORT_SCRIPTS['stop'])
     app.logger.debug(f"/stop result: {result}")
     if isinstance(result, dict):
         return jsonify({'error': result.get('error', 'Unknown error in AppleScript')}), 500
@@ -2360,8 +3443,7 @@ def stop_music():
 
 @app.route('/next', methods=['POST'])
 def next_track():
-    script = 'tell application "Music" to next track'
-    result = run_applescript(script)
+    result = run_applescript(_TRANSPORT_SCRIPTS['next'])
     app.logger.debug(f"/next result: {result}")
     if isinstance(result, dict):
         return jsonify({'error': result.get('error', 'Unknown error in AppleScript')}), 500
@@ -2375,8 +3457,7 @@ def next_track():
 
 @app.route('/previous', methods=['POST'])
 def previous_track():
-    script = 'tell application "Music" to previous track'
-    result = run_applescript(script)
+    result = run_applescript(_TRANSPORT_SCRIPTS['previous'])
     app.logger.debug(f"/previous result: {result}")
     if isinstance(result, dict):
         return jsonify({'error': result.get('error', 'Unknown error in AppleScript')}), 500
@@ -2397,23 +3478,7 @@ def resume():
 
     # If device names provided, try to set current AirPlay devices before playing
     if devices:
-        name_list = ", ".join([f'"{applescript_escape(n)}"' for n in devices])
-        set_devices_script = f'''
-        tell application "Music"
-            try
-                set tlist to {{{name_list}}}
-                set outDevs to {{}}
-                repeat with nm in tlist
-                    try
-                        set d to (first AirPlay device whose name is (nm as text))
-                        set end of outDevs to d
-                    end try
-                end repeat
-                if (count of outDevs) > 0 then set current AirPlay devices to outDevs
-            end try
-        end tell
-        '''
-        res = run_applescript(set_devices_script)
+        res = run_applescript(_SET_DEVICES_SCRIPT, *devices)
         if isinstance(res, dict) and 'error' in res:
             app.logger.warning(f"/resume: failed to set AirPlay devices: {res['error']}")
 
@@ -2425,6 +3490,20 @@ def resume():
         return jsonify({'error': res2.get('error', 'AppleScript error')}), 500
     return jsonify({'status': 'ok'})
 
+def _to_float(s):
+    try:
+        return float(s)
+    except Exception:
+        return 0.0
+
+
+def _to_int(s):
+    try:
+        return int(float(s))
+    except Exception:
+        return None
+
+
 @app.route('/now_playing', methods=['GET'])
 def now_playing():
     """Return current playback info from Music as JSON."""
@@ -2432,39 +3511,7 @@ def now_playing():
         _start_watchers_once()
     except Exception:
         pass
-    script = '''
-    tell application "Music"
-        set pstate to player state as text
-        set shuf to shuffle enabled
-        set rep to song repeat
-        set vol to sound volume
-        if pstate is "stopped" then
-            set AppleScript's text item delimiters to linefeed
-            return pstate & "\n" & "" & "\n" & "" & "\n" & "" & "\n" & "0" & "\n" & (shuf as text) & "\n" & (rep as text) & "\n" & (vol as text) & "\n" & "0"
-        end if
-        set t to current track
-        set nm to ""
-        set ar to ""
-        set al to ""
-        try
-            set nm to name of t
-        end try
-        try
-            set ar to artist of t
-        end try
-        try
-            set al to album of t
-        end try
-        set pos to player position
-        set dur to 0
-        try
-            set dur to duration of t
-        end try
-        set AppleScript's text item delimiters to linefeed
-        return pstate & "\n" & nm & "\n" & ar & "\n" & al & "\n" & (pos as text) & "\n" & (shuf as text) & "\n" & (rep as text) & "\n" & (vol as text) & "\n" & (dur as text)
-    end tell
-    '''
-    result = run_applescript(script)
+    result = _poll_all()
     # app.logger.debug(f"/now_playing result: {result}")
     if isinstance(result, dict):
         # Keep UI happy: return a minimal payload with state unknown
@@ -2480,38 +3527,23 @@ def now_playing():
             'error': result.get('error', 'AppleScript error')
         })
 
-    lines = result.splitlines() if isinstance(result, str) else []
-    # Ensure we have 9 fields
-    while len(lines) < 9:
-        lines.append("")
-    state, title, artist, album, position, shuffle_txt, repeat_txt, volume_txt, duration = lines[:9]
-
-    def _to_float(s):
-        try:
-            return float(s)
-        except Exception:
-            return 0.0
-
-    def _to_int(s):
-        try:
-            return int(float(s))
-        except Exception:
-            return None
-
-    def _to_bool(s):
-        s = (s or "").strip().lower()
-        return s in ("true", "yes", "1")
-
+    state, title, artist, album, position, shuffle_txt, repeat_txt, volume_txt, duration = _split_now_fields(result[0])
+    # Well-formed numbers parse in one try; the per-field helpers only run on odd input
+    try:
+        pos_f, dur_f = float(position or 0), float(duration or 0)
+        vol_i = int(float(volume_txt)) if volume_txt else None
+    except ValueError:
+        pos_f, dur_f, vol_i = _to_float(position), _to_float(duration), _to_int(volume_txt)
     payload = {
         'state': state or 'stopped',
         'title': title or None,
         'artist': artist or None,
         'album': album or None,
-        'position': _to_float(position),
-        'duration': _to_float(duration),
-        'shuffle': _to_bool(shuffle_txt) if shuffle_txt != '' else None,
+        'position': pos_f,
+        'duration': dur_f,
+        'shuffle': (shuffle_txt.strip().lower() in _TRUE_SET) if shuffle_txt != '' else None,
         'repeat': repeat_txt.strip() if repeat_txt.strip() else 'off',
-        'volume': _to_int(volume_txt),
+        'volume': vol_i,
     }
     try:
         # Include current artwork token to help clients align cache keys when polling
@@ -2520,23 +3552,32 @@ def now_playing():
         pass
     return jsonify(payload)
 
+# Use explicit fills so they render regardless of HA theme colors
+_ICON_SVGS = {
+    "playlist": "<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 24 24'><path fill='#9da0a2' d='M3 6h12v2H3V6m0 4h12v2H3v-2m0 4h8v2H3v-2m13-3a3 3 0 1 1 2 5.236V21h-2v-4.764A3 3 0 0 1 16 11Z'/></svg>",
+    "album": "<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 24 24'><path fill='#9da0a2' d='M12 2a10 10 0 1 0 0 20a10 10 0 0 0 0-20m0 5a5 5 0 1 1 0 10a5 5 0 0 1 0-10m0 3a2 2 0 1 0 0 4a2 2 0 0 0 0-4'/></svg>",
+    "artist": "<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 24 24'><path fill='#9da0a2' d='M12 12a4 4 0 1 0-4-4a4 4 0 0 0 4 4m0 2c-4 0-8 2-8 5v1h16v-1c0-3-4-5-8-5Z'/></svg>",
+    "default": "<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 24 24'><circle cx='12' cy='12' r='10' fill='#9da0a2'/></svg>",
+}
+_ICONS = {k: (v.encode('utf-8'), _content_tag(v.encode('utf-8'))) for k, v in _ICON_SVGS.items()}
+
+
 @app.route('/icon/<name>', methods=['GET'])
 def icon(name: str):
     """Return a small SVG icon for browse categories (playlist/album/artist)."""
-    name = (name or "").lower()
-    # Use explicit fills so they render regardless of HA theme colors
-    if name == "playlist":
-        svg = "<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 24 24'><path fill='#9da0a2' d='M3 6h12v2H3V6m0 4h12v2H3v-2m0 4h8v2H3v-2m13-3a3 3 0 1 1 2 5.236V21h-2v-4.764A3 3 0 0 1 16 11Z'/></svg>"
-    elif name == "album":
-        svg = "<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 24 24'><path fill='#9da0a2' d='M12 2a10 10 0 1 0 0 20a10 10 0 0 0 0-20m0 5a5 5 0 1 1 0 10a5 5 0 0 1 0-10m0 3a2 2 0 1 0 0 4a2 2 0 0 0 0-4'/></svg>"
-    elif name == "artist":
-        svg = "<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 24 24'><path fill='#9da0a2' d='M12 12a4 4 0 1 0-4-4a4 4 0 0 0 4 4m0 2c-4 0-8 2-8 5v1h16v-1c0-3-4-5-8-5Z'/></svg>"
-    else:
-        svg = "<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 24 24'><circle cx='12' cy='12' r='10' fill='#9da0a2'/></svg>"
-    return Response(svg, mimetype='image/svg+xml')
+    svg, etag = _ICONS.get((name or "").lower()) or _ICONS["default"]
+    # Icons only change with a release; a week of caching plus the ETag keeps refetches to 304s
+    headers = {'ETag': etag, 'Cache-Control': 'public, max-age=604800'}
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+    return Response(svg, mimetype='image/svg+xml', headers=headers)
 
 @app.route('/devices', methods=['GET'])
 def get_devices():
+    polled = _poll_all()
+    if isinstance(polled, tuple) and not polled[1].startswith("ERROR:"):
+        names = (ln.split("\t", 1)[0].strip() for ln in polled[1].splitlines())
+        return jsonify(list(dict.fromkeys(n for n in names if n)))
     script = '''
     tell application "Music"
         try
@@ -2576,14 +3617,14 @@ def purge_album_cache():
     try:
         os.makedirs(ARTWORK_DIR, exist_ok=True)
         cnt = 0
-        for name in os.listdir(ARTWORK_DIR):
-            p = os.path.join(ARTWORK_DIR, name)
-            try:
-                if os.path.isfile(p):
-                    os.remove(p)
-                    cnt += 1
-            except Exception:
-                pass
+        with os.scandir(ARTWORK_DIR) as it:
+            for entry in it:
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        os.remove(entry.path)
+                        cnt += 1
+                except Exception:
+                    pass
         return jsonify({"status": "ok", "deleted": cnt, "path": ARTWORK_DIR})
     except Exception as e:
         return jsonify({"status": "error", "error": str(e)}), 500
@@ -2599,17 +3640,18 @@ def debug_cache_index():
     try:
         os.makedirs(ARTWORK_DIR, exist_ok=True)
         items = []
-        for name in sorted(os.listdir(ARTWORK_DIR)):
-            p = os.path.join(ARTWORK_DIR, name)
-            try:
-                st = os.stat(p)
-                items.append({
-                    "name": name,
-                    "size": st.st_size,
-                    "mtime": int(st.st_mtime),
-                })
-            except Exception:
-                continue
+        with os.scandir(ARTWORK_DIR) as it:
+            for entry in it:
+                try:
+                    st = entry.stat()
+                    items.append({
+                        "name": entry.name,
+                        "size": st.st_size,
+                        "mtime": int(st.st_mtime),
+                    })
+                except Exception:
+                    continue
+        items.sort(key=lambda d: d["name"])
         return jsonify({"dir": ARTWORK_DIR, "count": len(items), "files": items})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -2660,40 +3702,8 @@ def set_devices():
         # No-op if empty; don't clear devices implicitly
         return jsonify({"status": "ok", "applied": []})
 
-    # Build AppleScript list of names safely
-    name_list = ", ".join([f'"{applescript_escape(n)}"' for n in names])
-    script = f'''
-    tell application "Music"
-        try
-            set tlist to {{{name_list}}}
-            set outDevs to {{}}
-            repeat with nm in tlist
-                try
-                    set d to (first AirPlay device whose name is (nm as text))
-                    set end of outDevs to d
-                end try
-            end repeat
-            if (count of outDevs) > 0 then set current AirPlay devices to outDevs
-            -- Reflect what Music actually accepted:
-            set appliedNames to {{}}
-            try
-                repeat with d in current AirPlay devices
-                    set end of appliedNames to (name of d as text)
-                end repeat
-            on error
-                -- Fallback if class not scriptable on this version
-                repeat with d in outDevs
-                    set end of appliedNames to (name of d as text)
-                end repeat
-            end try
-            set AppleScript's text item delimiters to ","
-            return appliedNames as text
-        on error errm number errn
-            return "ERROR:" & errn & ":" & errm
-        end try
-    end tell
-    '''
-    result = run_applescript(script)
+    # Names go in via argv, so no escaping is needed and the script stays compiled
+    result = run_applescript(_SET_DEVICES_SCRIPT, *names)
     app.logger.debug(f"/set_devices result: {result}")
     if isinstance(result, dict):
         return jsonify({"error": result.get('error', 'AppleScript error')}), 500
@@ -2704,21 +3714,16 @@ def set_devices():
     if isinstance(result, str) and result:
         applied = [s.strip() for s in result.split(',') if s and s.strip()]
     # Push an immediate AirPlay devices update so UIs refresh without waiting for poll
-    try:
-        statuses = _read_airplay_full()
-        volumes = _get_airplay_volumes()
-        for item in statuses:
-            name = item['name']
-            item['volume'] = volumes.get(name, None)
-        _last_snapshot['airplay'] = statuses
-        _sse_publish('airplay_full', statuses)
-    except Exception:
-        pass
+    _publish_airplay_soon()
     return jsonify({"status": "ok", "applied": applied})
 
 @app.route('/device_volumes', methods=['GET'])
 def device_volumes():
     """Return a JSON mapping of AirPlay device name -> current volume (0-100)."""
+    clamp = lambda v: max(0, min(100, v)) if v >= 0 else None
+    polled = _poll_all()
+    if isinstance(polled, tuple) and not polled[1].startswith("ERROR:"):
+        return jsonify({k: v for k, v in _parse_device_volumes(polled[1], clamp).items() if k})
     script = '''
     tell application "Music"
         try
@@ -2750,19 +3755,7 @@ def device_volumes():
         if '-1731' in err or 'Unknown object type' in err:
             return jsonify({})
         return jsonify({'error': err or 'AppleScript error'}), 500
-    volumes = {}
-    if isinstance(result, str) and result:
-        for line in result.splitlines():
-            if "\t" in line:
-                name, vol = line.split("\t", 1)
-                name = name.strip()
-                try:
-                    v = int(float(vol.strip()))
-                except Exception:
-                    v = -1
-                if name:
-                    volumes[name] = max(0, min(100, v)) if v >= 0 else None
-    return jsonify(volumes)
+    return jsonify({k: v for k, v in _parse_device_volumes(result, clamp).items() if k})
 
 
 @app.route('/artwork', methods=['GET'])
@@ -2799,59 +3792,109 @@ def artwork():
         except Exception:
             pass
     force_refresh = str(request.args.get('refresh') or '').strip() in ('1', 'true', 'yes')
+    # The web UI versions the URL per track (?ts=<track key>), so those responses can be cached
+    cache_hdr = {'Cache-Control': 'max-age=3600'} if request.args.get('ts') else {}
     try:
         app.logger.info(f"/artwork: req title='{title}' album='{album}' artist='{artist}' pid='{pid}' refresh={force_refresh}")
     except Exception:
         pass
 
+    # Revalidations for an unchanged track are answered from the remembered ETag, before any read or hash
+    track = (title, album, artist, pid)
+    tok = _last_snapshot.get('art_tok')
+    seen = _artwork_etags.get(track)
+    if seen and not force_refresh and seen[0] == tok and request.if_none_match.contains(seen[1]):
+        return Response(status=304, headers={**cache_hdr, 'ETag': seen[1]})
+
+    # A cached WEBP needs no conversion, so stream it straight from disk (conditional, sendfile-capable)
+    if album and not force_refresh:
+        hit = _find_album_cache(album, artist)
+        if hit and hit[1] == 'webp':
+            try:
+                return send_file(hit[0], mimetype='image/webp', conditional=True, etag=True,
+                                 max_age=3600 if cache_hdr else None)
+            except OSError:
+                pass
+
+    key = (title, album, artist, pid, force_refresh)
+    data, mime, etag = _artwork_shared(key, lambda: _current_artwork(title, album, artist, pid, force_refresh))
+    if data is _BLANK_PNG:
+        return Response(_BLANK_PNG, mimetype='image/png')
+    if etag:
+        if len(_artwork_etags) >= 256:
+            _artwork_etags.clear()
+        _artwork_etags[track] = (tok, etag)
+    return _image_response(data, mime, etag, cache_hdr)
+
+
+# (title, album, artist, pid) -> (art_tok, etag) of the last /artwork body; the now watcher
+# bumps art_tok on every track change, which retires the entry
+_artwork_etags = {}
+
+
+def _image_response(data, mime, etag, headers=None):
+    """Image Response with an ETag; 304 without a body when If-None-Match already matches, 206 for a Range."""
+    headers = dict(headers or {})
+    if etag:
+        headers['ETag'] = etag
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers=headers)
+    resp = Response(data, mimetype=mime, headers=headers)
+    if request.range is not None:
+        # Byte ranges (media players, resumed fetches) get a 206 slice; If-Range is checked against the ETag
+        resp.make_conditional(request, accept_ranges=True, complete_length=len(data))
+    return resp
+
+
+# Concurrent artwork requests for the same track (or album/playlist/artist) share one read/convert
+_art_inflight = {}  # key -> Future
+_art_lock = threading.Lock()
+
+
+def _artwork_shared(key, fn):
+    with _art_lock:
+        fut = _art_inflight.get(key)
+        owner = fut is None
+        if owner:
+            fut = _art_inflight[key] = Future()
+    if not owner:
+        return fut.result(timeout=30)
+    try:
+        value = fn()
+    except Exception as e:
+        fut.set_exception(e)
+        raise
+    else:
+        fut.set_result(value)
+    finally:
+        with _art_lock:
+            _art_inflight.pop(key, None)
+    return value
+
+
+def _etagged(data, mime):
+    try:
+        etag = _content_tag(data)
+    except Exception:
+        etag = None
+    return data, mime, etag
+
+
+def _current_artwork(title, album, artist, pid, force_refresh):
+    """Return (bytes, mime, etag) of the current track's artwork for /artwork; _BLANK_PNG bytes mean no artwork."""
     if album and not force_refresh:
         data, mime_cached = _try_read_album_cache(album, artist)
         if data:
             app.logger.info(f"/artwork: serve from cache for album='{album}' artist='{artist}'")
             # If cache is not WEBP, convert on the fly for consistency
-            out = _convert_to_webp(data)
+            out = _webp_cached(data)
             if out is not None:
-                try:
-                    etag = hashlib.sha1(out[0]).hexdigest()
-                except Exception:
-                    etag = None
-                headers = {'ETag': etag} if etag else {}
-                return Response(out[0], mimetype=out[1], headers=headers)
-            mime_r = (mime_cached or _guess_image_mime(data))
-            try:
-                etag = hashlib.sha1(data).hexdigest()
-            except Exception:
-                etag = None
-            headers = {'ETag': etag} if etag else {}
-            return Response(data, mimetype=mime_r, headers=headers)
+                return out
+            return _etagged(data, mime_cached or _guess_image_mime(data))
 
     # Fallback to reading directly from Music for the current track
-    script = '''
-    tell application "Music"
-        try
-            set t to current track
-            if t is missing value then return "NOART"
-            if (count of artworks of t) is 0 then return "NOART"
-            set fmtText to ""
-            try
-                set fmtText to (format of artwork 1 of t) as text
-            end try
-            set ext to "jpg"
-            if fmtText contains "PNG" then set ext to "png"
-            set raw_data to data of artwork 1 of t
-            set tmp to (POSIX path of (path to temporary items)) & "ha_music_art." & ext
-            set outFile to open for access (POSIX file tmp) with write permission
-            set eof outFile to 0
-            write raw_data to outFile
-            close access outFile
-            return tmp
-        on error
-            return "NOART"
-        end try
-    end tell
-    '''
-    result = run_applescript(script)
-    if not isinstance(result, str) or not result.strip() or result.strip() == "NOART":
+    data = _current_track_artwork()
+    if not data:
         # Fallback: try album-wide search (often another track has embedded art)
         if album:
             try:
@@ -2863,28 +3906,10 @@ def artwork():
                 if key_album:
                     _write_album_cache(key_album, artist, data)
                     app.logger.info(f"/artwork: fallback(album_scan) cached key='{key_album}' artist='{artist}' -> {ARTWORK_DIR}")
-                try:
-                    etag = hashlib.sha1(data).hexdigest()
-                except Exception:
-                    etag = None
-                headers = {'ETag': etag} if etag else {}
-                return Response(data, mimetype=_guess_image_mime(data), headers=headers)
+                return _etagged(data, _guess_image_mime(data))
         # Final fallback: return a tiny PNG (not SVG) so HA color extraction doesn't error
         app.logger.info("/artwork: NOART after current+fallback; serving tiny PNG")
-        return Response(_BLANK_PNG, mimetype='image/png')
-
-    path = result.strip()
-    try:
-        with open(path, 'rb') as f:
-            data = f.read()
-    except Exception as e:
-        app.logger.error(f"/artwork file read error: {e}")
-        return Response(status=404)
-    finally:
-        try:
-            os.remove(path)
-        except Exception:
-            pass
+        return _BLANK_PNG, 'image/png', None
 
     # Save into album cache for future fast reads
     # Cache under album when possible; otherwise fall back to a composite or pid-based key
@@ -2900,28 +3925,17 @@ def artwork():
         app.logger.info(f"/artwork: cached key='{key_album}' artist='{artist}' -> {ARTWORK_DIR}")
 
     # Serve WEBP if possible
-    out = _convert_to_webp(data)
+    out = _webp_cached(data)
     if out is not None:
-        try:
-            etag = hashlib.sha1(out[0]).hexdigest()
-        except Exception:
-            etag = None
-        headers = {'ETag': etag} if etag else {}
-        return Response(out[0], mimetype=out[1], headers=headers)
-    mime = _guess_image_mime(data)
-    try:
-        etag = hashlib.sha1(data).hexdigest()
-    except Exception:
-        etag = None
-    headers = {'ETag': etag} if etag else {}
-    return Response(data, mimetype=mime, headers=headers)
+        return out
+    return _etagged(data, _guess_image_mime(data))
 
 
 @app.route('/artwork_thumb/<int:size>', methods=['GET'])
 def artwork_thumb(size: int):
     """Return current track artwork resized to <= size px, with album-scan fallback.
 
-    This mirrors /artwork but applies a resize step using macOS 'sips' for speed.
+    This mirrors /artwork but resizes in-process with Pillow (sips only when Pillow is unavailable).
     """
     try:
         _start_watchers_once()
@@ -2931,44 +3945,7 @@ def artwork_thumb(size: int):
     album = (now.get('album') or '').strip()
     artist = (now.get('artist') or '').strip()
     # Try direct current-track artwork first
-    script = '''
-    tell application "Music"
-        try
-            set t to current track
-            if t is missing value then return "NOART"
-            if (count of artworks of t) is 0 then return "NOART"
-            set fmtText to ""
-            try
-                set fmtText to (format of artwork 1 of t) as text
-            end try
-            set ext to "jpg"
-            if fmtText contains "PNG" then set ext to "png"
-            set raw_data to data of artwork 1 of t
-            set tmp to (POSIX path of (path to temporary items)) & "ha_music_art." & ext
-            set outFile to open for access (POSIX file tmp) with write permission
-            set eof outFile to 0
-            write raw_data to outFile
-            close access outFile
-            return tmp
-        on error
-            return "NOART"
-        end try
-    end tell
-    '''
-    result = run_applescript(script)
-    data = None
-    if isinstance(result, str) and result and result.strip() != 'NOART':
-        p = result.strip()
-        try:
-            with open(p, 'rb') as f:
-                data = f.read()
-        except Exception:
-            data = None
-        finally:
-            try:
-                os.remove(p)
-            except Exception:
-                pass
+    data = _current_track_artwork()
     # Fallback: scan album
     if not data and album:
         try:
@@ -2977,21 +3954,75 @@ def artwork_thumb(size: int):
             data = None
     if not data:
         return Response(_BLANK_PNG, mimetype='image/png')
-    # Resize via sips
+    # Resize via Pillow (ETag memoized with the encode), or sips as a fallback
+    size = max(32, min(2048, int(size)))
+    cached = _webp_cached(data, size)
+    if cached is not None:
+        return _image_response(*cached)
     try:
-        out, mime = _resize_bytes_with_sips(data, max(32, min(2048, int(size))))
+        out, mime = _resize_bytes_with_sips(data, size)
     except Exception:
         out = data
         mime = _guess_image_mime(data)
     try:
-        etag = hashlib.sha1(out).hexdigest()
+        etag = _content_tag(out)
     except Exception:
         etag = None
-    headers = {'ETag': etag} if etag else {}
-    return Response(out, mimetype=mime, headers=headers)
+    return _image_response(out, mime, etag)
 
 # ---- Helpers for artwork bytes (unified logic for full & thumbnails) ----
 
+_CURRENT_ART_DATA_SCRIPT = '''
+tell application "Music"
+    try
+        set t to current track
+        if (count of artworks of t) is 0 then return "NOART"
+        return data of artwork 1 of t
+    on error
+        return "NOART"
+    end try
+end tell
+'''
+# osascript can only hand back text, so without a helper the bytes go through a temp file.
+# The name is randomized per call so concurrent exports never read each other's half-written file.
+_CURRENT_ART_FILE_SCRIPT = '''
+tell application "Music"
+    try
+        set t to current track
+        if t is missing value then return "NOART"
+        if (count of artworks of t) is 0 then return "NOART"
+        set fmtText to ""
+        try
+            set fmtText to (format of artwork 1 of t) as text
+        end try
+        set ext to "jpg"
+        if fmtText contains "PNG" then set ext to "png"
+        set raw_data to data of artwork 1 of t
+        set tmp to (POSIX path of (path to temporary items)) & "ha_music_art." & ((random number from 100000000 to 999999999) as text) & "." & ext
+        set outFile to open for access (POSIX file tmp) with write permission
+        set eof outFile to 0
+        write raw_data to outFile
+        close access outFile
+        return tmp
+    on error
+        return "NOART"
+    end try
+end tell
+'''
+
+
+def _current_track_artwork() -> bytes | None:
+    """Return the current track's embedded artwork bytes, or None if it has none."""
+    r = _run_via_helper(_CURRENT_ART_DATA_SCRIPT, (), binary=True) if _OSA_HELPERS else None
+    if isinstance(r, bytes):
+        return r or None
+    if r is not None:
+        return None  # "NOART" or an AppleScript error
+    result = run_applescript(_CURRENT_ART_FILE_SCRIPT)
+    if not isinstance(result, str) or not result.strip() or result.strip() == "NOART":
+        return None
+    return _read_and_cleanup(result.strip())
+
 def _read_and_cleanup(path: str) -> bytes | None:
     if not path:
         return None
@@ -3006,40 +4037,77 @@ def _read_and_cleanup(path: str) -> bytes | None:
         except Exception:
             pass
 
+# \w is Unicode-aware like str.isalnum() (plus "_"), so slugs of existing cache files are unchanged
+_SLUG_BAD = re.compile(r"[^\w .-]")
+_SLUG_SPACES = re.compile(r" +")
+
+
+@functools.lru_cache(maxsize=1024)
 def _safe_slug(s: str) -> str:
     try:
         s = s.strip()
     except Exception:
         return ""
-    # Replace path separators and illegal characters, collapse whitespace
-    out = []
-    for ch in s:
-        if ch.isalnum() or ch in (" ", "-", "_", "."):
-            out.append(ch)
-        else:
-            out.append("_")
-    slug = "".join(out).strip().strip("._")
-    # Collapse spaces and underscores
-    while "  " in slug:
-        slug = slug.replace("  ", " ")
-    slug = slug.replace(" ", "_")
+    # Replace path separators and illegal characters, then each run of spaces with one "_"
+    slug = _SLUG_SPACES.sub("_", _SLUG_BAD.sub("_", s).strip().strip("._"))
     if not slug:
         slug = "unknown"
     # Limit filename length
     return slug[:120]
 
+@functools.lru_cache(maxsize=1024)
 def _album_cache_path(album: str, artist: str | None, ext: str = "jpg") -> str:
     base = _safe_slug(album or "unknown")
-    # Add a short hash suffix to ensure uniqueness across artists
+    # Add a short hash suffix to ensure uniqueness across artists. It names files already
+    # on disk, so keep sha1; the lru_cache means it is computed once per key anyway.
     key = f"{(artist or '').lower()}|{(album or '').lower()}".encode("utf-8", "ignore")
     suf = hashlib.sha1(key).hexdigest()[:8]
     fn = f"{base}__{suf}.{ext.lower()}"
-    try:
-        os.makedirs(ARTWORK_DIR, exist_ok=True)
-    except Exception as e:
-        app.logger.debug(f"artwork cache: failed to ensure dir {ARTWORK_DIR}: {e}")
     return os.path.join(ARTWORK_DIR, fn)
 
+# _write_album_cache only uses these extensions for bytes of that type; .jpg holds anything else
+_CACHE_EXT_MIME = {"webp": "image/webp", "png": "image/png"}
+
+
+_CACHE_READS_MAX = 64
+_cache_reads = OrderedDict()  # path -> (mtime_ns, bytes) for the most recently used cache files
+_cache_reads_lock = threading.Lock()
+
+
+def _read_cache_file(path: str) -> bytes:
+    """Bytes of an artwork cache file, from memory while its mtime is unchanged; raises OSError."""
+    mtime_ns = os.stat(path).st_mtime_ns
+    with _cache_reads_lock:
+        hit = _cache_reads.get(path)
+        if hit and hit[0] == mtime_ns:
+            _cache_reads.move_to_end(path)
+            return hit[1]
+    with open(path, "rb") as f:
+        data = f.read()
+    with _cache_reads_lock:
+        _cache_reads[path] = (mtime_ns, data)
+        _cache_reads.move_to_end(path)
+        if len(_cache_reads) > _CACHE_READS_MAX:
+            _cache_reads.popitem(last=False)
+    return data
+
+
+def _prewarm_cache_reads():
+    """Load the most recently written artwork cache files into memory in the background."""
+    def _run():
+        try:
+            with os.scandir(ARTWORK_DIR) as it:
+                entries = [(e.stat().st_mtime_ns, e.path) for e in it if e.is_file()]
+        except OSError:
+            return
+        for _, path in sorted(entries, reverse=True)[:_CACHE_READS_MAX]:
+            try:
+                _read_cache_file(path)
+            except OSError:
+                pass
+    threading.Thread(target=_run, daemon=True).start()
+
+
 def _try_read_album_cache(album: str, artist: str | None) -> tuple[bytes | None, str | None]:
     """Attempt reading cached artwork for multiple key variants.
 
@@ -3047,26 +4115,35 @@ def _try_read_album_cache(album: str, artist: str | None) -> tuple[bytes | None,
     This prevents noisy initial misses when the artist was unknown during prefetch
     but becomes available a moment later for the request.
     """
-    tried = []
+    hit = _find_album_cache(album, artist)
+    if hit:
+        p, ext = hit
+        try:
+            data = _read_cache_file(p)
+            app.logger.debug(f"artwork cache: HIT {p} ({len(data)} bytes)")
+            return data, _CACHE_EXT_MIME.get(ext) or _guess_image_mime(data)
+        except Exception:
+            pass
+    return None, None
+
+
+def _find_album_cache(album: str, artist: str | None) -> tuple[str, str] | None:
+    """(path, ext) of the first cached artwork file for (album, artist), then (album, "")."""
     variants = [artist or ""]
     if (artist or ""):
         variants.append("")
+    tried = 0
     for who in variants:
         for ext in ("webp", "jpg", "png", "jpeg"):
             p = _album_cache_path(album, who, ext)
-            tried.append(p)
-            try:
-                with open(p, "rb") as f:
-                    data = f.read()
-                    app.logger.debug(f"artwork cache: HIT {p} ({len(data)} bytes)")
-                    return data, _guess_image_mime(data)
-            except Exception:
-                continue
+            tried += 1
+            if os.path.isfile(p):
+                return p, ext
     # Only log a single MISS per (album, artist) request to reduce noise
     app.logger.debug(
-        f"artwork cache: MISS for album='{album}' artist='{artist}' (tried {len(tried)} paths)"
+        f"artwork cache: MISS for album='{album}' artist='{artist}' (tried {tried} paths)"
     )
-    return None, None
+    return None
 
 def _write_album_cache(album: str, artist: str | None, data: bytes) -> None:
     if not data:
@@ -3085,6 +4162,11 @@ def _write_album_cache(album: str, artist: str | None, data: bytes) -> None:
             app.logger.debug("artwork cache: WEBP conversion unavailable; wrote %s", path)
         except Exception:
             pass
+    # Reads just miss when the directory is gone, so only writers make sure it exists
+    try:
+        os.makedirs(ARTWORK_DIR, exist_ok=True)
+    except Exception as e:
+        app.logger.debug(f"artwork cache: failed to ensure dir {ARTWORK_DIR}: {e}")
     try:
         with open(path, "wb") as f:
             f.write(data_to_write)
@@ -3092,111 +4174,80 @@ def _write_album_cache(album: str, artist: str | None, data: bytes) -> None:
     except Exception as e:
         app.logger.debug(f"artwork cache write failed: {e}")
 
-def _album_art_bytes(album: str) -> bytes | None:
-    """Return raw artwork bytes for an album, with cache and artist fallback."""
-    # Attempt cached read first using album + first-track artist
-    try:
-        # Find primary artist name for this album for cache keying
-        safe = applescript_escape(album)
-        script_artist = f'''
-        tell application "Music"
-            try
-                set t to (first track of library playlist 1 whose album is "{safe}")
-                return (artist of t as text)
-            on error
-                return ""
-            end try
-        end tell
-        '''
-        artist_name = run_applescript(script_artist)
-        if isinstance(artist_name, dict):
-            artist_name = ""
-    except Exception:
-        artist_name = ""
-    data, _ = _try_read_album_cache(album, artist_name if isinstance(artist_name, str) else "")
-    if data:
-        return data
-    safe = applescript_escape(album)
-    script = f'''
+_album_artists = {}  # album -> first-track artist (the artwork cache key); rarely changes
+_ALBUM_ARTIST_SCRIPT = '''
+on run argv
     tell application "Music"
+        set albumName to item 1 of argv
         try
-            set tlist to every track of library playlist 1 whose album is "{safe}"
+            set t to (first track of library playlist 1 whose album is albumName)
+            return (artist of t as text)
         on error
-            set tlist to {{}}
+            return ""
         end try
-        set found to false
-        set tmp to ""
-        set fmtText to ""
-        repeat with t in tlist
-            try
-                if (count of artworks of t) > 0 then
-                    try
-                        set fmtText to (format of artwork 1 of t) as text
-                    end try
-                    set ext to "jpg"
-                    if fmtText contains "PNG" then set ext to "png"
-                    set raw_data to data of artwork 1 of t
-                    set tmp to (POSIX path of (path to temporary items)) & "ha_music_art." & ext
-                    set outFile to open for access (POSIX file tmp) with write permission
-                    set eof outFile to 0
-                    write raw_data to outFile
-                    close access outFile
-                    set found to true
-                    exit repeat
-                end if
-            end try
-        end repeat
-        if not found then
-            -- Fallback: try artist artwork for the first track of this album
-            set artistName to ""
-            try
-                set artistName to artist of (first track of library playlist 1 whose album is "{safe}")
-            end try
-            if artistName is not missing value and artistName is not "" then
-                try
-                    set alist to every track of library playlist 1 whose artist is artistName
-                on error
-                    set alist to {{}}
-                end try
-                repeat with t in alist
-                    try
-                        if (count of artworks of t) > 0 then
-                            try
-                                set fmtText to (format of artwork 1 of t) as text
-                            end try
-                            set ext to "jpg"
-                            if fmtText contains "PNG" then set ext to "png"
-                            set raw_data to data of artwork 1 of t
-                            set tmp to (POSIX path of (path to temporary items)) & "ha_music_art." & ext
-                            set outFile to open for access (POSIX file tmp) with write permission
-                            set eof outFile to 0
-                            write raw_data to outFile
-                            close access outFile
-                            set found to true
-                            exit repeat
-                        end if
-                    end try
-                end repeat
-            end if
-        end if
-        if found then return tmp
-        return "NOART"
     end tell
-    '''
-    result = run_applescript(script)
-    if not isinstance(result, str) or not result.strip() or result.strip() == "NOART":
-        return None
-    bytes_out = _read_and_cleanup(result.strip())
+end run
+'''
+
+
+def _album_artist(album: str) -> str:
+    """Artist of the album's first library track, or "" if unknown; memoized."""
+    hit = _album_artists.get(album)
+    if hit is not None:
+        return hit
+    try:
+        r = run_applescript(_ALBUM_ARTIST_SCRIPT, album)
+    except Exception:
+        r = None
+    if not isinstance(r, str):
+        return ""  # AppleScript failed; ask again next time
+    if len(_album_artists) >= 2048:
+        _album_artists.clear()
+    _album_artists[album] = r
+    return r
+
+
+def _album_art_bytes(album: str) -> bytes | None:
+    """Return raw artwork bytes for an album, with cache and artist fallback."""
+    # Attempt cached read first using album + first-track artist (no AppleScript once known)
+    artist_name = _album_artist(album)
+    data, _ = _try_read_album_cache(album, artist_name)
+    if data:
+        return data
+    # Falls back to the album artist's artwork when no album track has any
+    bytes_out = _scope_art_fetch('album', album, artist_name or "")
     if bytes_out:
-        _write_album_cache(album, artist_name if isinstance(artist_name, str) else "", bytes_out)
+        _write_album_cache(album, artist_name, bytes_out)
     return bytes_out
 
+def _pillow_resize(data: bytes, size: int) -> tuple[bytes, str] | None:
+    """Resize to <=size with Pillow as JPEG (PNG when there is transparency); None on failure."""
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            im.thumbnail((int(size), int(size)), resample=getattr(Image, 'LANCZOS', Image.BICUBIC))
+            buf = io.BytesIO()
+            if im.mode in ("RGBA", "LA", "P"):
+                im.save(buf, format="PNG", optimize=False)
+                return buf.getvalue(), "image/png"
+            if im.mode != "RGB":
+                im = im.convert("RGB")
+            im.save(buf, format="JPEG", quality=85)
+            return buf.getvalue(), "image/jpeg"
+    except Exception:
+        return None
+
+
 def _resize_bytes_with_sips(data: bytes, size: int) -> tuple[bytes, str]:
     """Resize image bytes to <=size; prefer WEBP via Pillow, else fall back to sips/JPEG."""
-    # Try Pillow → WEBP first
+    # Try Pillow → WEBP first: in-process, and memoized per (input, size)
     out = _convert_to_webp(data, size)
     if out is not None:
         return out
+    # Pillow without a WEBP encoder can still resize in-process
+    if Image is not None:
+        out = _pillow_resize(data, size)
+        if out is not None:
+            return out
     # Fallback: use sips to resize JPEG, return JPEG
     with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as inf:
         inf.write(data)
@@ -3220,34 +4271,26 @@ def _resize_bytes_with_sips(data: bytes, size: int) -> tuple[bytes, str]:
 
 # --- Prefetch helper (on-demand) ---
 def _prefetch_now_and_next(delay: float = 0.3) -> None:
-    """Spawn a background task to cache current and next-track album artwork after a short delay."""
+    """Spawn a background task to cache the current album's artwork once the track change lands."""
+    seq = _now_seq
+
     def _run():
         try:
             app.logger.debug(f"prefetch(on-demand): begin (delay={delay})")
-            if delay and delay > 0:
-                time.sleep(delay)
-            # Retry a few times while Music updates metadata
-            attempts = 6
-            for i in range(attempts):
-                now = _get_now_playing_dict() or {}
-                alb = (now.get('album') or '').strip()
-                art = (now.get('artist') or '').strip()
-                if not alb:
-                    # Fallback to last snapshot if watcher populated it
-                    try:
-                        snap = _last_snapshot.get('now') or {}
-                        alb = (snap.get('album') or '').strip() or alb
-                        art = (snap.get('artist') or '').strip() or art
-                    except Exception:
-                        pass
-                if alb:
-                    app.logger.debug(f"prefetch(on-demand): current album='{alb}' (attempt {i+1})")
-                    try:
-                        _album_art_bytes(alb)
-                    except Exception as e:
-                        app.logger.debug(f"prefetch current error: {e}")
-                    break
-                time.sleep(0.35)
+            # Wait for the watcher to see the new track rather than polling Music ourselves
+            with _now_cond:
+                changed = _now_cond.wait_for(lambda: _now_seq != seq, timeout=(delay or 0) + 2.1)
+            if changed:
+                now = _last_snapshot.get('now') or {}
+            else:
+                now = _get_now_playing_dict() or {}  # watcher not running (or missed it): poll once
+            alb = (now.get('album') or '').strip()
+            if alb:
+                app.logger.debug(f"prefetch(on-demand): current album='{alb}' (changed={changed})")
+                try:
+                    _artwork_shared(('album', alb), lambda: _album_art_bytes(alb))
+                except Exception as e:
+                    app.logger.debug(f"prefetch current error: {e}")
 
             # NOTE: Do not attempt to read "next track" via AppleScript — using that term can invoke the skip command.
             # If you want next-track prefetch in the future, compute it via playlist + index safely, not "next track".
@@ -3258,684 +4301,386 @@ def _prefetch_now_and_next(delay: float = 0.3) -> None:
 
 # --- ARTWORK ENDPOINTS FOR ALBUM, PLAYLIST, ARTIST (Browse Media thumbnails) ---
 
-@app.route('/artwork_album/<path:album>', methods=['GET'])
-def artwork_album(album):
-    data = _album_art_bytes(album)
-    app.logger.debug(f"/artwork_album album='{album}' bytes={len(data) if data else 0}")
-    if not data:
-        placeholder = (
-            "<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 24 24'>"
-            "<rect width='24' height='24' fill='#e0e3e7'/><text x='12' y='14' font-size='8' text-anchor='middle' fill='#9aa0a6'>ALBUM</text></svg>"
-        )
-        return Response(placeholder, mimetype='image/svg+xml')
-    # Prefer WEBP serve
-    out = _convert_to_webp(data)
-    if out is not None:
-        try:
-            etag = hashlib.sha1(out[0]).hexdigest()
-        except Exception:
-            etag = None
-        headers = {'ETag': etag} if etag else {}
-        return Response(out[0], mimetype=out[1], headers=headers)
-    mime = _guess_image_mime(data)
-    try:
-        etag = hashlib.sha1(data).hexdigest()
-    except Exception:
-        etag = None
-    headers = {'ETag': etag} if etag else {}
-    return Response(data, mimetype=mime, headers=headers)
-
-
-@app.route('/artwork_playlist/<path:plist>', methods=['GET'])
-def artwork_playlist(plist):
-    safe = applescript_escape(plist)
-    script = f'''
-    tell application "Music"
-        try
-            set tlist to every track of playlist "{safe}"
-        on error
-            set tlist to {{}}
-        end try
-        set found to false
-        set tmp to ""
-        set fmtText to ""
-        repeat with t in tlist
-            try
-                if (count of artworks of t) > 0 then
+# One template for every artwork lookup: return the artwork of the first track in a list that has
+# any (or "NOART"). Names arrive via argv, so the source never changes. The helper can return the
+# raw data; osascript can only print text, so its variant exports to a temp file and returns the path.
+_ART_EMIT_DATA = 'return data of artwork 1 of t'
+_ART_EMIT_FILE = '''set fmtText to ""
                     try
                         set fmtText to (format of artwork 1 of t) as text
                     end try
                     set ext to "jpg"
                     if fmtText contains "PNG" then set ext to "png"
                     set raw_data to data of artwork 1 of t
-                    set tmp to (POSIX path of (path to temporary items)) & "ha_music_art." & ext
+                    set tmp to (POSIX path of (path to temporary items)) & "ha_music_art." & ((random number from 100000000 to 999999999) as text) & "." & ext
                     set outFile to open for access (POSIX file tmp) with write permission
                     set eof outFile to 0
                     write raw_data to outFile
                     close access outFile
-                    set found to true
-                    exit repeat
+                    return tmp'''
+_ARTWORK_SCRIPT_TMPL = '''
+on firstArt(tlist)
+    tell application "Music"
+        repeat with t in tlist
+            try
+                if (count of artworks of t) > 0 then
+                    %(emit)s
                 end if
             end try
         end repeat
-        if found then return tmp
-        return "NOART"
-    end tell
-    '''
-    result = run_applescript(script)
-    if not isinstance(result, str) or not result.strip() or result.strip() == "NOART":
-        placeholder = (
-            "<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 24 24'>"
-            "<rect width='24' height='24' fill='#e0e3e7'/><text x='12' y='14' font-size='8' text-anchor='middle' fill='#9aa0a6'>LIST</text></svg>"
-        )
-        return Response(placeholder, mimetype='image/svg+xml')
-    path = result.strip()
-    try:
-        with open(path, 'rb') as f:
-            data = f.read()
-    except Exception:
-        return Response(status=404)
-    finally:
-        try:
-            os.remove(path)
-        except Exception:
-            pass
-    out = _convert_to_webp(data)
-    if out is not None:
-        try:
-            etag = hashlib.sha1(out[0]).hexdigest()
-        except Exception:
-            etag = None
-        headers = {'ETag': etag} if etag else {}
-        return Response(out[0], mimetype=out[1], headers=headers)
-    mime = _guess_image_mime(data)
-    try:
-        etag = hashlib.sha1(data).hexdigest()
-    except Exception:
-        etag = None
-    headers = {'ETag': etag} if etag else {}
-    return Response(data, mimetype=mime, headers=headers)
-
-
-@app.route('/artwork_artist/<path:artist>', methods=['GET'])
-def artwork_artist(artist):
-    safe = applescript_escape(artist)
-    script = f'''
-    tell application "Music"
-        try
-            set tlist to every track of library playlist 1 whose artist is "{safe}"
-        on error
-            set tlist to {{}}
-        end try
-        set found to false
-        set tmp to ""
-        set fmtText to ""
-        repeat with t in tlist
-            try
-                if (count of artworks of t) > 0 then
-                    try
-                        set fmtText to (format of artwork 1 of t) as text
-                    end try
-                    set ext to "jpg"
-                    if fmtText contains "PNG" then set ext to "png"
-                    set raw_data to data of artwork 1 of t
-                    set tmp to (POSIX path of (path to temporary items)) & "ha_music_art." & ext
-                    set outFile to open for access (POSIX file tmp) with write permission
-                    set eof outFile to 0
-                    write raw_data to outFile
-                    close access outFile
-                    set found to true
-                    exit repeat
-                end if
-            end try
-        end repeat
-        if found then return tmp
-        return "NOART"
-    end tell
-    '''
-    result = run_applescript(script)
-    if not isinstance(result, str) or not result.strip() or result.strip() == "NOART":
-        placeholder = (
-            "<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 24 24'>"
-            "<rect width='24' height='24' fill='#e0e3e7'/><text x='12' y='14' font-size='8' text-anchor='middle' fill='#9aa0a6'>ART</text></svg>"
-        )
-        return Response(placeholder, mimetype='image/svg+xml')
-    path = result.strip()
-    try:
-        with open(path, 'rb') as f:
-            data = f.read()
-    except Exception:
-        return Response(status=404)
-    finally:
-        try:
-            os.remove(path)
-        except Exception:
-            pass
-    out = _convert_to_webp(data)
-    if out is not None:
-        return Response(out[0], mimetype=out[1])
-    mime = _guess_image_mime(data)
-    return Response(data, mimetype=mime)
-
-
-# --- THUMBNAIL ARTWORK ENDPOINTS (resized with sips) ---
-
-@app.route('/artwork_album_thumb/<int:size>/<path:album>', methods=['GET'])
-def artwork_album_thumb(size, album):
-    data = _album_art_bytes(album)
-    app.logger.debug(f"/artwork_album_thumb/{size} album='{album}' base_bytes={len(data) if data else 0}")
-    if not data:
-        placeholder = (
-            "<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 24 24'>"
-            "<rect width='24' height='24' fill='#e0e3e7'/><text x='12' y='14' font-size='8' text-anchor='middle' fill='#9aa0a6'>ALBUM</text></svg>"
-        )
-        return Response(placeholder, mimetype='image/svg+xml')
-    thumb_bytes, mime = _resize_bytes_with_sips(data, size)
-    # Ensure WEBP serve
-    out = _convert_to_webp(thumb_bytes, None)
-    if out is not None:
-        try:
-            etag = hashlib.sha1(out[0]).hexdigest()
-        except Exception:
-            etag = None
-        headers = {'ETag': etag} if etag else {}
-        return Response(out[0], mimetype=out[1], headers=headers)
-    try:
-        etag = hashlib.sha1(thumb_bytes).hexdigest()
-    except Exception:
-        etag = None
-    headers = {'ETag': etag} if etag else {}
-    return Response(thumb_bytes, mimetype=mime, headers=headers)
-
-
-@app.route('/artwork_playlist_thumb/<int:size>/<path:plist>', methods=['GET'])
-def artwork_playlist_thumb(size, plist):
-    safe = applescript_escape(plist)
-    script = f'''
-    tell application "Music"
-        try
-            set tlist to every track of playlist "{safe}"
-        on error
-            set tlist to {{}}
-        end try
-        set found to false
-        set tmp to ""
-        set fmtText to ""
-        repeat with t in tlist
-            try
-                if (count of artworks of t) > 0 then
-                    try
-                        set fmtText to (format of artwork 1 of t) as text
-                    end try
-                    set ext to "jpg"
-                    if fmtText contains "PNG" then set ext to "png"
-                    set raw_data to data of artwork 1 of t
-                    set tmp to (POSIX path of (path to temporary items)) & "ha_music_art." & ext
-                    set outFile to open for access (POSIX file tmp) with write permission
-                    set eof outFile to 0
-                    write raw_data to outFile
-                    close access outFile
-                    set found to true
-                    exit repeat
-                end if
-            end try
-        end repeat
-        if found then return tmp
-        return "NOART"
-    end tell
-    '''
-    result = run_applescript(script)
-    if not isinstance(result, str) or not result.strip() or result.strip() == "NOART":
-        placeholder = (
-            "<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 24 24'>"
-            "<rect width='24' height='24' fill='#e0e3e7'/><text x='12' y='14' font-size='8' text-anchor='middle' fill='#9aa0a6'>LIST</text></svg>"
-        )
-        return Response(placeholder, mimetype='image/svg+xml')
-    path = result.strip()
-    try:
-        try:
-            subprocess.run(["/usr/bin/sips", "-Z", str(int(size)), path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
-        except Exception:
-            pass
-        with open(path, 'rb') as f:
-            data = f.read()
-    except Exception:
-        return Response(status=404)
-    finally:
-        try:
-            os.remove(path)
-        except Exception:
-            pass
-    # Ensure WEBP serve (and size-resized by sips already)
-    out = _convert_to_webp(data, None)
-    if out is not None:
-        try:
-            etag = hashlib.sha1(out[0]).hexdigest()
-        except Exception:
-            etag = None
-        headers = {'ETag': etag} if etag else {}
-        return Response(out[0], mimetype=out[1], headers=headers)
-    mime = _guess_image_mime(data)
-    try:
-        etag = hashlib.sha1(data).hexdigest()
-    except Exception:
-        etag = None
-    headers = {'ETag': etag} if etag else {}
-    return Response(data, mimetype=mime, headers=headers)
-
-
-@app.route('/artwork_artist_thumb/<int:size>/<path:artist>', methods=['GET'])
-def artwork_artist_thumb(size, artist):
-    safe = applescript_escape(artist)
-    script = f'''
-    tell application "Music"
-        try
-            set tlist to every track of library playlist 1 whose artist is "{safe}"
-        on error
-            set tlist to {{}}
-        end try
-        set found to false
-        set tmp to ""
-        set fmtText to ""
-        repeat with t in tlist
-            try
-                if (count of artworks of t) > 0 then
-                    try
-                        set fmtText to (format of artwork 1 of t) as text
-                    end try
-                    set ext to "jpg"
-                    if fmtText contains "PNG" then set ext to "png"
-                    set raw_data to data of artwork 1 of t
-                    set tmp to (POSIX path of (path to temporary items)) & "ha_music_art." & ext
-                    set outFile to open for access (POSIX file tmp) with write permission
-                    set eof outFile to 0
-                    write raw_data to outFile
-                    close access outFile
-                    set found to true
-                    exit repeat
-                end if
-            end try
-        end repeat
-        if found then return tmp
-        return "NOART"
-    end tell
-    '''
-    result = run_applescript(script)
-    if not isinstance(result, str) or not result.strip() or result.strip() == "NOART":
-        placeholder = (
-            "<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 24 24'>"
-            "<rect width='24' height='24' fill='#e0e3e7'/><text x='12' y='14' font-size='8' text-anchor='middle' fill='#9aa0a6'>ART</text></svg>"
-        )
-        return Response(placeholder, mimetype='image/svg+xml')
-    path = result.strip()
-    try:
-        try:
-            subprocess.run(["/usr/bin/sips", "-Z", str(int(size)), path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
-        except Exception:
-            pass
-        with open(path, 'rb') as f:
-            data = f.read()
-    except Exception:
-        return Response(status=404)
-    finally:
-        try:
-            os.remove(path)
-        except Exception:
-            pass
-    out = _convert_to_webp(data, None)
-    if out is not None:
-        return Response(out[0], mimetype=out[1])
-    mime = _guess_image_mime(data)
-    return Response(data, mimetype=mime)
-
-@app.route('/artwork_album_meta/<path:album>', methods=['GET'])
-def artwork_album_meta(album):
-    """Return metadata (etag, ctype) for an album's artwork without sending the bytes."""
-    safe = applescript_escape(album)
-    script = f'''
-    tell application "Music"
-        try
-            set tlist to every track of library playlist 1 whose album is "{safe}"
-        on error
-            set tlist to {{}}
-        end try
-        set found to false
-        set tmp to ""
-        set fmtText to ""
-        repeat with t in tlist
-            try
-                if (count of artworks of t) > 0 then
-                    try
-                        set fmtText to (format of artwork 1 of t) as text
-                    end try
-                    set ext to "jpg"
-                    if fmtText contains "PNG" then set ext to "png"
-                    set raw_data to data of artwork 1 of t
-                    set tmp to (POSIX path of (path to temporary items)) & "ha_music_art." & ext
-                    set outFile to open for access (POSIX file tmp) with write permission
-                    set eof outFile to 0
-                    write raw_data to outFile
-                    close access outFile
-                    set found to true
-                    exit repeat
-                end if
-            end try
-        end repeat
-        if found then return tmp
-        return "NOART"
     end tell
-    '''
-    result = run_applescript(script)
-    if not isinstance(result, str) or not result.strip() or result.strip() == "NOART":
-        return jsonify({"etag": "noart", "ctype": "image/svg+xml"})
-    path = result.strip()
-    try:
-        with open(path, 'rb') as f:
-            data = f.read()
-    except Exception:
-        return jsonify({"etag": "noart", "ctype": "image/svg+xml"})
-    finally:
-        try:
-            os.remove(path)
-        except Exception:
-            pass
-    # Report WEBP meta/etag if conversion available
-    out = _convert_to_webp(data)
-    if out is not None:
-        wbytes, wmime = out
-        etag = hashlib.sha1(wbytes).hexdigest()
-        return jsonify({"etag": etag, "ctype": wmime})
-    mime = _guess_image_mime(data)
-    etag = hashlib.sha1(data).hexdigest()
-    return jsonify({"etag": etag, "ctype": mime})
-
-
-# --- META THUMBNAIL ENDPOINTS ---
-
-@app.route('/artwork_album_thumb_meta/<int:size>/<path:album>', methods=['GET'])
-def artwork_album_thumb_meta(size, album):
-    data = _album_art_bytes(album)
-    if not data:
-        return jsonify({"etag": "noart", "ctype": "image/svg+xml"})
-    thumb_bytes, mime = _resize_bytes_with_sips(data, size)
-    out = _convert_to_webp(thumb_bytes)
-    if out is not None:
-        b, m = out
-        etag = hashlib.sha1(b).hexdigest()
-        return jsonify({"etag": etag, "ctype": m})
-    etag = hashlib.sha1(thumb_bytes).hexdigest()
-    return jsonify({"etag": etag, "ctype": mime})
-
-
+    return "NOART"
+end firstArt
 
-@app.route('/artwork_playlist_thumb_meta/<int:size>/<path:plist>', methods=['GET'])
-def artwork_playlist_thumb_meta(size, plist):
-    safe = applescript_escape(plist)
-    script = f'''
+on run argv
     tell application "Music"
         try
-            set tlist to every track of playlist "{safe}"
+            set tlist to %(tracks)s
         on error
-            set tlist to {{}}
+            set tlist to {}
         end try
-        set found to false
-        set tmp to ""
-        set fmtText to ""
-        repeat with t in tlist
-            try
-                if (count of artworks of t) > 0 then
-                    try
-                        set fmtText to (format of artwork 1 of t) as text
-                    end try
-                    set ext to "jpg"
-                    if fmtText contains "PNG" then set ext to "png"
-                    set raw_data to data of artwork 1 of t
-                    set tmp to (POSIX path of (path to temporary items)) & "ha_music_art." & ext
-                    set outFile to open for access (POSIX file tmp) with write permission
-                    set eof outFile to 0
-                    write raw_data to outFile
-                    close access outFile
-                    set found to true
-                    exit repeat
-                end if
-            end try
-        end repeat
-        if found then return tmp
-        return "NOART"
     end tell
-    '''
-    result = run_applescript(script)
-    if not isinstance(result, str) or not result.strip() or result.strip() == "NOART":
-        return jsonify({"etag": "noart", "ctype": "image/svg+xml"})
-    path = result.strip()
-    try:
-        try:
-            subprocess.run(["/usr/bin/sips", "-Z", str(int(size)), path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
-        except Exception:
-            pass
-        with open(path, 'rb') as f:
-            data = f.read()
-    except Exception:
-        return jsonify({"etag": "noart", "ctype": "image/svg+xml"})
-    finally:
-        try:
-            os.remove(path)
-        except Exception:
-            pass
-    out = _convert_to_webp(data)
-    if out is not None:
-        b, m = out
-        etag = hashlib.sha1(b).hexdigest()
-        return jsonify({"etag": etag, "ctype": m})
-    mime = _guess_image_mime(data)
-    etag = hashlib.sha1(data).hexdigest()
-    return jsonify({"etag": etag, "ctype": mime})
-
-
-@app.route('/artwork_artist_thumb_meta/<int:size>/<path:artist>', methods=['GET'])
-def artwork_artist_thumb_meta(size, artist):
-    safe = applescript_escape(artist)
-    script = f'''
-    tell application "Music"
-        try
-            set tlist to every track of library playlist 1 whose artist is "{safe}"
-        on error
-            set tlist to {{}}
-        end try
-        set found to false
-        set tmp to ""
-        set fmtText to ""
-        repeat with t in tlist
+    set r to my firstArt(tlist)
+    %(fallback)s
+    return r
+end run
+'''
+_ALBUM_ARTIST_FALLBACK = '''if r is "NOART" and (item 2 of argv) is not "" then
+        tell application "Music"
             try
-                if (count of artworks of t) > 0 then
-                    try
-                        set fmtText to (format of artwork 1 of t) as text
-                    end try
-                    set ext to "jpg"
-                    if fmtText contains "PNG" then set ext to "png"
-                    set raw_data to data of artwork 1 of t
-                    set tmp to (POSIX path of (path to temporary items)) & "ha_music_art." & ext
-                    set outFile to open for access (POSIX file tmp) with write permission
-                    set eof outFile to 0
-                    write raw_data to outFile
-                    close access outFile
-                    set found to true
-                    exit repeat
-                end if
+                set tlist to every track of library playlist 1 whose artist is (item 2 of argv)
+            on error
+                set tlist to {}
             end try
-        end repeat
-        if found then return tmp
-        return "NOART"
-    end tell
-    '''
-    result = run_applescript(script)
-    if not isinstance(result, str) or not result.strip() or result.strip() == "NOART":
-        return jsonify({"etag": "noart", "ctype": "image/svg+xml"})
-    path = result.strip()
-    try:
-        try:
-            subprocess.run(["/usr/bin/sips", "-Z", str(int(size)), path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
-        except Exception:
-            pass
-        with open(path, 'rb') as f:
-            data = f.read()
-    except Exception:
-        return jsonify({"etag": "noart", "ctype": "image/svg+xml"})
-    finally:
-        try:
-            os.remove(path)
-        except Exception:
-            pass
-    out = _convert_to_webp(data)
-    if out is not None:
-        b, m = out
-        etag = hashlib.sha1(b).hexdigest()
-        return jsonify({"etag": etag, "ctype": m})
-    mime = _guess_image_mime(data)
-    etag = hashlib.sha1(data).hexdigest()
-    return jsonify({"etag": etag, "ctype": mime})
+        end tell
+        set r to my firstArt(tlist)
+    end if'''
+_SCOPE_ART_TRACKS = {
+    'album': ('every track of library playlist 1 whose album is (item 1 of argv)', _ALBUM_ARTIST_FALLBACK),
+    'playlist': ('every track of playlist (item 1 of argv)', ''),
+    'artist': ('every track of library playlist 1 whose artist is (item 1 of argv)', ''),
+}
+# scope -> (raw-data script, temp-file script)
+_SCOPE_ART_SCRIPTS = {
+    scope: tuple(_ARTWORK_SCRIPT_TMPL % {'tracks': tracks, 'fallback': fallback, 'emit': emit}
+                 for emit in (_ART_EMIT_DATA, _ART_EMIT_FILE))
+    for scope, (tracks, fallback) in _SCOPE_ART_TRACKS.items()
+}
 
 
-@app.route('/artwork_playlist_meta/<path:plist>', methods=['GET'])
-def artwork_playlist_meta(plist):
-    """Return metadata (etag, ctype) for a playlist's artwork."""
-    safe = applescript_escape(plist)
-    script = f'''
-    tell application "Music"
-        try
-            set tlist to every track of playlist "{safe}"
-        on error
-            set tlist to {{}}
-        end try
-        set found to false
-        set tmp to ""
-        set fmtText to ""
-        repeat with t in tlist
-            try
-                if (count of artworks of t) > 0 then
-                    try
-                        set fmtText to (format of artwork 1 of t) as text
-                    end try
-                    set ext to "jpg"
-                    if fmtText contains "PNG" then set ext to "png"
-                    set raw_data to data of artwork 1 of t
-                    set tmp to (POSIX path of (path to temporary items)) & "ha_music_art." & ext
-                    set outFile to open for access (POSIX file tmp) with write permission
-                    set eof outFile to 0
-                    write raw_data to outFile
-                    close access outFile
-                    set found to true
-                    exit repeat
-                end if
-            end try
-        end repeat
-        if found then return tmp
-        return "NOART"
-    end tell
-    '''
-    result = run_applescript(script)
-    if not isinstance(result, str) or not result.strip() or result.strip() == "NOART":
-        return jsonify({"etag": "noart", "ctype": "image/svg+xml"})
-    path = result.strip()
-    try:
-        with open(path, 'rb') as f:
-            data = f.read()
-    except Exception:
-        return jsonify({"etag": "noart", "ctype": "image/svg+xml"})
-    finally:
-        try:
-            os.remove(path)
-        except Exception:
-            pass
-    mime = _guess_image_mime(data)
-    etag = hashlib.sha1(data).hexdigest()
-    return jsonify({"etag": etag, "ctype": mime})
+# Names whose tracks have no artwork at all; rechecked after a while in case art gets added
+_NOART_TTL = 300.0
+_noart_cache = {}  # (scope, *args) -> monotonic time of the NOART answer
+_noart_lock = threading.Lock()
 
 
-@app.route('/artwork_artist_meta/<path:artist>', methods=['GET'])
-def artwork_artist_meta(artist):
-    """Return metadata (etag, ctype) for an artist's artwork (first track with art)."""
-    safe = applescript_escape(artist)
-    script = f'''
-    tell application "Music"
-        try
-            set tlist to every track of library playlist 1 whose artist is "{safe}"
-        on error
-            set tlist to {{}}
-        end try
-        set found to false
-        set tmp to ""
-        set fmtText to ""
-        repeat with t in tlist
-            try
-                if (count of artworks of t) > 0 then
-                    try
-                        set fmtText to (format of artwork 1 of t) as text
-                    end try
-                    set ext to "jpg"
-                    if fmtText contains "PNG" then set ext to "png"
-                    set raw_data to data of artwork 1 of t
-                    set tmp to (POSIX path of (path to temporary items)) & "ha_music_art." & ext
-                    set outFile to open for access (POSIX file tmp) with write permission
-                    set eof outFile to 0
-                    write raw_data to outFile
-                    close access outFile
-                    set found to true
-                    exit repeat
-                end if
-            end try
-        end repeat
-        if found then return tmp
-        return "NOART"
-    end tell
-    '''
-    result = run_applescript(script)
-    if not isinstance(result, str) or not result.strip() or result.strip() == "NOART":
-        return jsonify({"etag": "noart", "ctype": "image/svg+xml"})
-    path = result.strip()
+def _scope_art_fetch(scope: str, *args) -> bytes | None:
+    """Artwork bytes straight from a helper's reply, else via osascript and a temp file."""
+    key = (scope, *args)
+    with _noart_lock:
+        seen = _noart_cache.get(key)
+    if seen is not None and time.monotonic() - seen < _NOART_TTL:
+        return None
+    data_script, file_script = _SCOPE_ART_SCRIPTS[scope]
+    r = _run_via_helper(data_script, args, binary=True) if _OSA_HELPERS else None
+    if isinstance(r, bytes):
+        return r or None
+    if r is None:
+        r = run_applescript(file_script, *args)
+        if isinstance(r, str) and r.strip() and r.strip() != "NOART":
+            return _read_and_cleanup(r.strip())
+    if r == "NOART":
+        # Only a definite answer is remembered; AppleScript errors are retried next time
+        with _noart_lock:
+            if len(_noart_cache) >= 2048:
+                _noart_cache.clear()
+            _noart_cache[key] = time.monotonic()
+    return None
+# Playlist contents change more often than albums do, so their cached art is re-read after a day
+_SCOPE_ART_TTL = 86400
+_ART_PLACEHOLDERS = {
+    scope: (
+        "<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 24 24'>"
+        "<rect width='24' height='24' fill='#e0e3e7'/><text x='12' y='14' font-size='8' text-anchor='middle' fill='#9aa0a6'>"
+        f"{label}</text></svg>"
+    ).encode('utf-8')
+    for scope, label in (('album', 'ALBUM'), ('playlist', 'LIST'), ('artist', 'ART'))
+}
+# Same "noart" tag the meta endpoints report; short-lived since art may be added to the library
+_NOART_HEADERS = {'Cache-Control': 'public, max-age=300'}
+# Name-keyed art rarely changes (playlist art is re-read daily anyway): reuse it for a day, then
+# revalidate against the ETag in the background. Not "immutable", since the URL is not versioned.
+_ARTWORK_CACHE_HDR = {'Cache-Control': 'public, max-age=86400, stale-while-revalidate=604800', 'Vary': 'Accept'}
+
+
+def _artwork_cache_stamp(scope: str, name: str) -> tuple[str, int] | None:
+    """(path, mtime_ns) of the usable disk-cache file for (scope, name), or None."""
+    if scope == 'album':
+        hit = _find_album_cache(name, _album_artist(name))
+    else:
+        # Namespaced so a playlist and an album with the same name keep separate files
+        hit = _find_album_cache(f"{scope}:{name}", scope)
+    if not hit:
+        return None
     try:
-        with open(path, 'rb') as f:
-            data = f.read()
-    except Exception:
-        return jsonify({"etag": "noart", "ctype": "image/svg+xml"})
-    finally:
+        mtime_ns = os.stat(hit[0]).st_mtime_ns
+    except OSError:
+        return None
+    if scope != 'album' and time.time() - mtime_ns / 1e9 >= _SCOPE_ART_TTL:
+        return None
+    return hit[0], mtime_ns
+
+
+def _artwork_bytes(scope: str, name: str) -> bytes | None:
+    """Artwork bytes for an album, playlist or artist; disk cache first, AppleScript on a miss."""
+    if scope == 'album':
+        return _album_art_bytes(name)
+    stamp = _artwork_cache_stamp(scope, name)
+    if stamp:
         try:
-            os.remove(path)
+            return _read_cache_file(stamp[0])
         except Exception:
             pass
-    mime = _guess_image_mime(data)
-    etag = hashlib.sha1(data).hexdigest()
+    data = _scope_art_fetch(scope, name)
+    if data:
+        _write_album_cache(f"{scope}:{name}", scope, data)
+    return data
+
+
+def _artwork_payload(data: bytes, size: int | None = None, webp: bool = True) -> tuple[bytes, str, str]:
+    """(bytes, mime, etag) as served: WEBP when Pillow is available, resized to <=size if given.
+
+    With webp=False the source bytes go out untouched when they are already JPEG/PNG (no encode at
+    all); cached WEBP is transcoded, and thumbs are resized to JPEG/PNG.
+    """
+    if webp:
+        out = _webp_cached(data, size)
+        if out is not None:
+            return out
+    elif Image is not None and (size or _guess_image_mime(data) == "image/webp"):
+        out = _pillow_resize(data, size or _NO_RESIZE)
+        if out is not None:
+            return _etagged(*out)
+    if size:
+        data, mime = _resize_bytes_with_sips(data, size)
+    else:
+        mime = _guess_image_mime(data)
+    return _etagged(data, mime)
+
+
+# Thumbs are a few tens of KB; full-size entries are larger but far fewer
+_ART_SERVED_MAX = 256
+_NO_RESIZE = 1 << 16  # a bound no artwork reaches, for re-encoding at the original size
+_art_served = OrderedDict()  # (scope, name, size, webp) -> (cache stamp, (bytes, mime, etag))
+_art_served_lock = threading.Lock()
+
+
+def _client_takes_webp() -> bool:
+    """True unless the client's Accept header rules WEBP out (a missing header or */* allows it)."""
+    if not request.accept_mimetypes:
+        return True
+    return request.accept_mimetypes['image/webp'] > 0
+
+
+def _artwork_served(scope, name, size=None, webp=True):
+    """Payload served for (scope, name, size), memoized against the cache file's mtime.
+
+    A repeat request for unchanged art is a stat() and a dict lookup: no read, hash or encode.
+    """
+    key = (scope, name, size, webp)
+    stamp = _artwork_cache_stamp(scope, name)
+    with _art_served_lock:
+        hit = _art_served.get(key)
+        if hit and (hit[0] == stamp if stamp else _memory_stamp_fresh(hit[0])):
+            _art_served.move_to_end(key)
+            return hit[1]
+    # A Browse grid asks for the same album's thumb and meta at once; only one caller runs the lookup
+    data = _artwork_shared((scope, name), lambda: _artwork_bytes(scope, name))
+    if not data:
+        return None
+    payload = _artwork_payload(data, size, webp)
+    # A miss has just written the cache file; stamp against it so the ETag stays put on the next hit.
+    # If nothing landed on disk (unwritable cache dir), the entry is kept for a while by age instead.
+    stamp = stamp or _artwork_cache_stamp(scope, name) or (None, time.monotonic())
+    with _art_served_lock:
+        _art_served[key] = (stamp, payload)
+        _art_served.move_to_end(key)
+        if len(_art_served) > _ART_SERVED_MAX:
+            _art_served.popitem(last=False)
+    return payload
+
+
+def _memory_stamp_fresh(stamp):
+    return stamp[0] is None and time.monotonic() - stamp[1] < _NOART_TTL
+
+
+def _artwork_image(scope, name, size=None):
+    payload = _artwork_served(scope, name, size, _client_takes_webp())
+    app.logger.debug(f"/artwork_{scope} name='{name}' size={size} bytes={len(payload[0]) if payload else 0}")
+    if not payload:
+        return _image_response(_ART_PLACEHOLDERS[scope], 'image/svg+xml', 'noart', _NOART_HEADERS)
+    return _image_response(*payload, _ARTWORK_CACHE_HDR)
+
+
+def _artwork_meta(scope, name, size=None):
+    """etag/ctype of exactly what _artwork_image serves, so clients can compare without the bytes."""
+    payload = _artwork_served(scope, name, size, _client_takes_webp())
+    if not payload:
+        return jsonify({"etag": "noart", "ctype": "image/svg+xml"})
+    _, mime, etag = payload
     return jsonify({"etag": etag, "ctype": mime})
 
+
+@app.route('/artwork_album/<path:album>', methods=['GET'])
+def artwork_album(album):
+    return _artwork_image('album', album)
+
+
+@app.route('/artwork_playlist/<path:plist>', methods=['GET'])
+def artwork_playlist(plist):
+    return _artwork_image('playlist', plist)
+
+
+@app.route('/artwork_artist/<path:artist>', methods=['GET'])
+def artwork_artist(artist):
+    return _artwork_image('artist', artist)
+
+
+# --- THUMBNAIL ARTWORK ENDPOINTS (resized with Pillow, sips fallback) ---
+
+@app.route('/artwork_album_thumb/<int:size>/<path:album>', methods=['GET'])
+def artwork_album_thumb(size, album):
+    return _artwork_image('album', album, size)
+
+
+@app.route('/artwork_playlist_thumb/<int:size>/<path:plist>', methods=['GET'])
+def artwork_playlist_thumb(size, plist):
+    return _artwork_image('playlist', plist, size)
+
+
+@app.route('/artwork_artist_thumb/<int:size>/<path:artist>', methods=['GET'])
+def artwork_artist_thumb(size, artist):
+    return _artwork_image('artist', artist, size)
+
+
+# --- META ENDPOINTS (etag/ctype without the bytes) ---
+
+@app.route('/artwork_album_meta/<path:album>', methods=['GET'])
+def artwork_album_meta(album):
+    """Return metadata (etag, ctype) for an album's artwork without sending the bytes."""
+    return _artwork_meta('album', album)
+
+
+@app.route('/artwork_playlist_meta/<path:plist>', methods=['GET'])
+def artwork_playlist_meta(plist):
+    """Return metadata (etag, ctype) for a playlist's artwork."""
+    return _artwork_meta('playlist', plist)
+
+
+@app.route('/artwork_artist_meta/<path:artist>', methods=['GET'])
+def artwork_artist_meta(artist):
+    """Return metadata (etag, ctype) for an artist's artwork (first track with art)."""
+    return _artwork_meta('artist', artist)
+
+
+@app.route('/artwork_album_thumb_meta/<int:size>/<path:album>', methods=['GET'])
+def artwork_album_thumb_meta(size, album):
+    return _artwork_meta('album', album, size)
+
+
+@app.route('/artwork_playlist_thumb_meta/<int:size>/<path:plist>', methods=['GET'])
+def artwork_playlist_thumb_meta(size, plist):
+    return _artwork_meta('playlist', plist, size)
+
+
+@app.route('/artwork_artist_thumb_meta/<int:size>/<path:artist>', methods=['GET'])
+def artwork_artist_thumb_meta(size, artist):
+    return _artwork_meta('artist', artist, size)
+
 ### --- PLAYBACK CONTROLS AND VOLUME for Web UI / API --- ###
 @app.route('/playpause', methods=['POST'])
 def playpause():
-    script = '''
-    tell application "Music"
-        try
-            playpause
-            return "ok"
-        on error errm number errn
-            return "ERROR:" & errn & ":" & errm
-        end try
-    end tell
-    '''
-    result = run_applescript(script)
+    result = run_applescript(_TRANSPORT_SCRIPTS['playpause'])
     if isinstance(result, str) and result.startswith("ERROR:"):
         return jsonify({'error': result}), 500
     if isinstance(result, dict) and 'error' in result:
         return jsonify({'error': result['error']}), 500
     return jsonify({'ok': True})
 
+# Volume writes are last-write-wins per target: while one osascript set is running, newer levels
+# for the same target only replace the queued value, and the latest is applied once it finishes.
+# A slider drag therefore costs one set per round trip instead of one per POST.
+_volume_writes = {}  # key -> {"busy": bool, "pending": level or None}
+_volume_lock = threading.Lock()
+
+
+def _coalesced_volume_write(key, level, apply):
+    """apply(level) now and return its result, or queue level behind a running write and return None."""
+    with _volume_lock:
+        st = _volume_writes.setdefault(key, {"busy": False, "pending": None})
+        if st["busy"]:
+            st["pending"] = level
+            return None
+        st["busy"] = True
+    try:
+        return apply(level)
+    finally:
+        _drain_volume_writes(key, apply)
+
+
+def _drain_volume_writes(key, apply):
+    with _volume_lock:
+        st = _volume_writes[key]
+        level, st["pending"] = st["pending"], None
+        if level is None:
+            st["busy"] = False
+            return
+
+    def _run():
+        try:
+            apply(level)
+        except Exception as e:
+            app.logger.debug(f"queued volume write {key} failed: {e}")
+        finally:
+            _drain_volume_writes(key, apply)
+    # Later values are applied off the request thread so the caller's response isn't held up
+    _sse_refresh_pool.submit(_run)
+
+
+def _apply_master_volume(level):
+    result = run_applescript(_SET_MASTER_VOLUME_SCRIPT, level)
+    if not isinstance(result, dict):
+        _poll_invalidate()
+    return result
+
+
+def _apply_device_volume(device, level):
+    result = run_applescript(_SET_DEVICE_VOLUME_SCRIPT, device, level)
+    if isinstance(result, str) and not result.startswith('ERROR:'):
+        _poll_invalidate()
+        # Push an immediate AirPlay snapshot so per-device volume and selection update quickly;
+        # the device table came back with the set, so no second read is needed
+        try:
+            rows = result.partition("\n")[2]
+            if rows and not rows.startswith("ERROR:"):
+                _publish_airplay(_airplay_items(rows, with_volume=True))
+            else:
+                _publish_airplay_soon()
+        except Exception:
+            pass
+    return result
+
+
 @app.route('/master_volume', methods=['GET', 'POST'])
 def master_volume():
     if request.method == 'GET':
-        script = 'tell application "Music" to get sound volume'
-        result = run_applescript(script)
-        if isinstance(result, dict):
-            return Response("0", mimetype="text/plain")
+        v = _last_snapshot.get('master')
+        if v is None or time.monotonic() - _master_seen["at"] >= _MASTER_TTL:
+            v = _get_master_volume_percent()
+            if v >= 0:
+                _note_master_volume(v)
         # return plain text number to keep it simple
-        return Response(str(int(float(result or 0))), mimetype="text/plain")
+        return Response(str(max(0, v)), mimetype="text/plain")
 
     # POST
     data = request.get_json(silent=True) or {}
@@ -3944,16 +4689,17 @@ def master_volume():
     except Exception:
         return jsonify({'error': 'invalid level'}), 400
     level = max(0, min(100, level))
-    script = f'tell application "Music" to set sound volume to {level}'
-    result = run_applescript(script)
+    result = _coalesced_volume_write('master', level, _apply_master_volume)
     if isinstance(result, dict):
         return jsonify({'error': result.get('error', 'AppleScript error')}), 500
     # Publish instant master volume SSE so UIs reflect change without waiting for poll
     try:
-        _last_snapshot['master'] = level
+        _note_master_volume(level)
         _sse_publish('master_volume', level)
     except Exception:
         pass
+    if result is None:
+        return jsonify({'ok': True, 'level': level, 'queued': True})
     return jsonify({'ok': True, 'level': level})
 
 @app.route('/set_device_volume', methods=['POST'])
@@ -3968,63 +4714,77 @@ def set_device_volume():
     except Exception:
         return jsonify({'error': 'invalid level'}), 400
     level = max(0, min(100, level))
-    device_safe = applescript_escape(device)
-    script = f'''
-    tell application "Music"
-        try
-            set sound volume of (first AirPlay device whose name is "{device_safe}") to {level}
-            return "ok"
-        on error errm number errn
-            return "ERROR:" & errn & ":" & errm
-        end try
-    end tell
-    '''
-    result = run_applescript(script)
+    result = _coalesced_volume_write(('device', device), level, functools.partial(_apply_device_volume, device))
+    if result is None:
+        return jsonify({'ok': True, 'device': device, 'level': level, 'queued': True})
     if isinstance(result, str) and result.startswith('ERROR:'):
         return jsonify({'error': result}), 500
     if isinstance(result, dict) and 'error' in result:
         return jsonify({'error': result['error']}), 500
-    # Push an immediate AirPlay snapshot so per-device volume and selection update quickly
-    try:
-        statuses = _read_airplay_full()
-        volumes = _get_airplay_volumes()
-        for item in statuses:
-            name = item['name']
-            item['volume'] = volumes.get(name, None)
-        _last_snapshot['airplay'] = statuses
-        _sse_publish('airplay_full', statuses)
-    except Exception:
-        pass
     return jsonify({'ok': True, 'device': device, 'level': level})
 
-@app.route('/current_devices', methods=['GET'])
-def current_devices():
+@app.route('/set_device_volumes', methods=['POST'])
+def set_device_volumes():
+    """Set several AirPlay device volumes in one AppleScript round-trip.
+    Body: { "levels": { "Name 1": 40, "Name 2": 65 } }
+       or { "updates": [ {"device": "Name 1", "level": 40}, ... ] } (last write per device wins)
+    """
+    data = request.get_json(silent=True) or {}
+    levels = data.get('levels')
+    if levels is None and isinstance(data.get('updates'), list):
+        levels = {u.get('device'): u.get('level') for u in data['updates'] if isinstance(u, dict)}
+    if not isinstance(levels, dict) or not levels:
+        return jsonify({'error': 'levels required'}), 400
+    applied = {}
+    for device, level in levels.items():
+        if not device or level is None:
+            continue
+        try:
+            applied[str(device)] = max(0, min(100, int(level)))
+        except Exception:
+            return jsonify({'error': f'invalid level for {device}'}), 400
+    if not applied:
+        return jsonify({'error': 'levels required'}), 400
+    # argv is name, level pairs, so the script body never changes and stays compiled
     script = '''
-    tell application "Music"
-        set out to {}
-        try
-            repeat with d in AirPlay devices
+    on run argv
+        tell application "Music"
+            set failed to {}
+            repeat with i from 1 to (count of argv) by 2
+                set nm to item i of argv
                 try
-                    if (selected of d) is true then set end of out to (name of d as text)
+                    set sound volume of (first AirPlay device whose name is nm) to ((item (i + 1) of argv) as integer)
+                on error
+                    set end of failed to nm
                 end try
             end repeat
-        end try
-        set AppleScript's text item delimiters to linefeed
-        return out as text
-    end tell
+            set AppleScript's text item delimiters to linefeed
+            return failed as text
+        end tell
+    end run
     '''
-    result = run_applescript(script)
-    if isinstance(result, dict):
-        return jsonify([])
-    raw = [ (n.strip() if isinstance(n, str) else n) for n in (result.splitlines() if isinstance(result, str) and result else []) ]
-    devs = []
-    seen = set()
-    for n in raw:
-        if not n or n in seen:
-            continue
-        seen.add(n)
-        devs.append(n)
-    return jsonify(devs)
+    result = run_applescript(script, *(x for pair in applied.items() for x in pair))
+    if isinstance(result, dict) and 'error' in result:
+        return jsonify({'error': result['error']}), 500
+    failed = [n for n in (result.splitlines() if isinstance(result, str) and result else []) if n]
+    for name in failed:
+        applied.pop(name, None)
+    # Push an immediate AirPlay snapshot so per-device volumes update quickly
+    _publish_airplay_soon()
+    return jsonify({'ok': not failed, 'applied': applied, 'failed': failed})
+
+@app.route('/current_devices', methods=['GET'])
+def current_devices():
+    polled = _poll_all()
+    if isinstance(polled, tuple) and not polled[1].startswith("ERROR:"):
+        rows = (ln.split("\t") for ln in polled[1].splitlines())
+        names = (p[0].strip() for p in rows if len(p) >= 2 and p[1].strip().lower() in ("true", "yes", "1"))
+    else:
+        result = run_applescript(_SELECTED_DEVICES_SCRIPT)  # de-duplicated on the AppleScript side
+        if isinstance(result, dict):
+            return jsonify([])
+        names = (ln.strip() for ln in result.splitlines())
+    return jsonify(list(dict.fromkeys(n for n in names if n)))
 
 # ---- Media Player Endpoints for AirPlay Devices ----
 
@@ -4106,16 +4866,7 @@ def set_media_player_volume(entity_suffix):
         if not ok:
             return jsonify({"error": "Failed to set volume"}), 500
         # Update snapshot
-        try:
-            statuses = _read_airplay_full()
-            volumes = _get_airplay_volumes()
-            for item in statuses:
-                name = item['name']
-                item['volume'] = volumes.get(name, None)
-            _last_snapshot['airplay'] = statuses
-            _sse_publish('airplay_full', statuses)
-        except Exception:
-            pass
+        _publish_airplay_soon()
         return jsonify({"success": True})
     except Exception as e:
         return jsonify({"error": "Invalid volume"}), 400
@@ -4213,40 +4964,7 @@ def set_devices_endpoint_internal(devices_list):
     if not devices_list:
         # No-op if empty; don't clear devices implicitly
         return {"status": True, "applied": []}
-    # Build AppleScript list of names safely
-    name_list = ", ".join([f'"{applescript_escape(n)}"' for n in devices_list])
-    script = f'''
-    tell application "Music"
-        try
-            set tlist to {{{name_list}}}
-            set outDevs to {{}}
-            repeat with nm in tlist
-                try
-                    set d to (first AirPlay device whose name is (nm as text))
-                    set end of outDevs to d
-                end try
-            end repeat
-            if (count of outDevs) > 0 then set current AirPlay devices to outDevs
-            -- Reflect what Music actually accepted:
-            set appliedNames to {{}}
-            try
-                repeat with d in current AirPlay devices
-                    set end of appliedNames to (name of d as text)
-                end repeat
-            on error
-                -- Fallback if class not scriptable on this version
-                repeat with d in outDevs
-                    set end of appliedNames to (name of d as text)
-                end repeat
-            end try
-            set AppleScript's text item delimiters to ","
-            return appliedNames as text
-        on error errm number errn
-            return "ERROR:" & errn & ":" & errm
-        end try
-    end tell
-    '''
-    result = run_applescript(script)
+    result = run_applescript(_SET_DEVICES_SCRIPT, *devices_list)
     if isinstance(result, dict):
         return {"status": False, "error": result.get('error', 'AppleScript error')}
     if isinstance(result, str) and result.startswith("ERROR:"):
@@ -4255,36 +4973,16 @@ def set_devices_endpoint_internal(devices_list):
     if isinstance(result, str) and result:
         applied = [s.strip() for s in result.split(',') if s and s.strip()]
     # Push an immediate AirPlay snapshot so UIs refresh without waiting for poll
-    try:
-        statuses = _read_airplay_full()
-        volumes = _get_airplay_volumes()
-        for item in statuses:
-            name = item['name']
-            item['volume'] = volumes.get(name, None)
-        _last_snapshot['airplay'] = statuses
-        _sse_publish('airplay_full', statuses)
-    except Exception:
-        pass
+    _publish_airplay_soon()
     return {"status": True, "applied": applied}
 
-@app.route('/queue_artist_shuffled', methods=['POST'])
-def queue_artist_shuffled():
-    """Build playlist of all tracks by artist, enable shuffle, and play.
-       Body: {"artist": "Name"}  Returns: {ok, count, playlist}
-    """
-    payload = request.get_json(silent=True) or {}
-    artist = (payload.get('artist') or '').strip()
-    if not artist:
-        return jsonify({"ok": False, "error": "artist required"}), 400
-
-    safe_artist = applescript_escape(artist)
-    playlist_name = "Home Assistant"
-
-    script = f'''
+# argv: target playlist name, artist
+_QUEUE_ARTIST_SHUFFLED_SCRIPT = '''
+on run argv
     tell application "Music"
-        set tgtName to "{applescript_escape(playlist_name)}"
+        set tgtName to item 1 of argv
         if not (exists (playlist tgtName)) then
-            make new user playlist with properties {{name:tgtName}}
+            make new user playlist with properties {name:tgtName}
         end if
         set tgt to playlist tgtName
 
@@ -4293,15 +4991,24 @@ def queue_artist_shuffled():
             delete (every track of tgt)
         end try
 
-        -- Collect tracks by artist and duplicate into tgt
-        set libTracks to (every track of library playlist 1 whose artist is "{safe_artist}")
+        -- Duplicate the artist's tracks into tgt with one event; per track only if that fails
         set addedCount to 0
-        repeat with t in libTracks
+        try
+            duplicate (every track of library playlist 1 whose artist is (item 2 of argv)) to tgt
+            set addedCount to count of tracks of tgt
+        on error
+            -- A partial duplicate leaves copies behind; start over so nothing is queued twice
             try
-                duplicate t to tgt
-                set addedCount to addedCount + 1
+                delete (every track of tgt)
             end try
-        end repeat
+            set libTracks to (every track of library playlist 1 whose artist is (item 2 of argv))
+            repeat with t in libTracks
+                try
+                    duplicate t to tgt
+                    set addedCount to addedCount + 1
+                end try
+            end repeat
+        end try
 
         -- Enable shuffle and play
         try
@@ -4310,8 +5017,23 @@ def queue_artist_shuffled():
         play tgt
         return addedCount as text
     end tell
-    '''
-    r = run_applescript(script)
+end run
+'''
+
+
+@app.route('/queue_artist_shuffled', methods=['POST'])
+def queue_artist_shuffled():
+    """Build playlist of all tracks by artist, enable shuffle, and play.
+       Body: {"artist": "Name"}  Returns: {ok, count, playlist}
+    """
+    payload = request.get_json(silent=True) or {}
+    artist = (payload.get('artist') or '').strip()
+    if not artist:
+        return jsonify({"ok": False, "error": "artist required"}), 400
+
+    playlist_name = "Home Assistant"
+    r = run_applescript(_QUEUE_ARTIST_SHUFFLED_SCRIPT, playlist_name, artist)
+    _lib_invalidate('playlists')
     if isinstance(r, dict):
         app.logger.error(f"/queue_artist_shuffled AppleScript error: {r.get('error')}")
         return jsonify({"ok": False, "error": r.get('error', 'AppleScript error')})
@@ -4356,14 +5078,31 @@ def open_browser():
     if os.getenv("AM_OPEN_BROWSER", "1").lower() not in ("1", "true", "yes", "on"):  # opt-out
         return
     try:
-        import webbrowser as _wb
-        port = int(settings.get("port", 7766))
-        threading.Timer(1.5, lambda: _wb.open(f'http://127.0.0.1:{port}')).start()
+        url = f'http://127.0.0.1:{int(settings.get("port", 7766))}'
+        if sys.platform == 'darwin':
+            # open(1) hands the URL straight to LaunchServices; webbrowser would probe for browsers first
+            def _open():
+                try:
+                    subprocess.Popen(['/usr/bin/open', url], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                except OSError as e:
+                    app.logger.warning(f"open_browser failed: {e}")
+        else:
+            import webbrowser as _wb
+            def _open():
+                _wb.open(url)
+        threading.Timer(1.5, _open).start()
     except Exception as e:
         app.logger.warning(f"open_browser failed: {e}")
 
 def launch_apple_music():
     """Launch Apple Music if not already running."""
+    # A process lookup settles the common already-running case without an osascript round-trip
+    try:
+        if subprocess.call(['pgrep', '-x', 'Music'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) == 0:
+            app.logger.debug("Apple Music already running")
+            return
+    except OSError:
+        pass
     script = '''
     tell application "Music"
         if it is not running then
@@ -4379,26 +5118,25 @@ def launch_apple_music():
         app.logger.debug("Apple Music launched successfully")
 
 
+def serve_app(port):
+    """Serve on all interfaces with a thread per connection, so open /events streams never starve other requests."""
+    _osa_prewarm()
+    _precompile_scripts()
+    _prewarm_cache_reads()
+    if waitress_serve is not None:
+        # Each SSE client and each request waiting on osascript holds a thread (the wait
+        # releases the GIL, so they overlap); AM_THREADS sizes the pool for busy households
+        threads = max(8, int(os.getenv("AM_THREADS", "32") or 32))
+        # Open /events streams count against waitress's default limit of 100 connections
+        waitress_serve(app, host='0.0.0.0', port=port, threads=threads, channel_timeout=3600,
+                       connection_limit=max(100, int(os.getenv("AM_CONNECTIONS", "256") or 256)))
+    else:
+        app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
+
+
 if __name__ == '__main__':
     # Hide console output when bundled
     if os.environ.get('PYINSTALLER_BUNDLED') == '1':
-        import sys
-        sys.stdout = open(os.devnull, 'w')
-        sys.stderr = open(os.devnull, 'w')
-    try:
-        launch_apple_music()
-        # Start background watchers immediately so state and tokens update
-        try:
-            _start_watchers_once()
-        except Exception:
-            pass
-        open_browser()
-        _settings = load_settings()
-        app.run(host='0.0.0.0', port=int(_settings.get('port', 7766)), debug=False)
-    except Exception as e:
-        app.logger.error(f"Server failed to start: {e}")
-        raise
-        import sys
         sys.stdout = open(os.devnull, 'w')
         sys.stderr = open(os.devnull, 'w')
     try:
@@ -4410,7 +5148,7 @@ if __name__ == '__main__':
             pass
         open_browser()
         _settings = load_settings()
-        app.run(host='0.0.0.0', port=int(_settings.get('port', 7766)), debug=False)
+        serve_app(int(_settings.get('port', 7766)))
     except Exception as e:
         app.logger.error(f"Server failed to start: {e}")
         raise